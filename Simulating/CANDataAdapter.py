@@ -1,21 +1,20 @@
 from scoring.CANDataPackage import CANDataPackage
-from cantools.database.namedsignalvalue import NamedSignalValue
 
 class CANDataAdapter:
+    # Signals the package actually consumes; decoders should project onto these
+    SIGNALS = tuple(CANDataPackage._DEFAULT_SIGNALS)
+
     def __init__(self):
         self.data_package = CANDataPackage(0)
 
     def msg_to_package(self, timestamp, decoded_data):
         """
         Convert a CAN message to a CANDataPackage.
-        :param decoded_data: A decoded object.
+        :param decoded_data: A decoded {signal: value} dict with plain int/float
+            values, restricted to SIGNALS, as returned by FrameDecoder.decode.
         :return: A CANDataPackage object.
         """
-        normalized_data = {
-            k: v.value if isinstance(v, NamedSignalValue) else v
-            for k, v in decoded_data.items()
-        }
-        self.data_package.update(timestamp, **normalized_data)
+        self.data_package.update(timestamp, **decoded_data)
 
     def get_data_package(self):
-        return self.data_package
\ No newline at end of file
+        return self.data_package
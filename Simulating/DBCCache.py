@@ -0,0 +1,124 @@
+import contextlib
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import NamedTuple
+
+
+class SignalLayout(NamedTuple):
+    """The parts of a cantools Signal needed to decode it, as plain values."""
+    name: str
+    start: int
+    length: int
+    byte_order: str
+    is_signed: bool
+    is_float: bool
+    scale: float
+    offset: float
+
+
+class MessageLayout(NamedTuple):
+    """The parts of a cantools Message needed to decode it, as plain values."""
+    frame_id: int
+    name: str
+    length: int
+    is_multiplexed: bool
+    signals: tuple
+
+
+class DBCCache:
+    """
+    Pickled cantools databases so a restart doesn't re-parse the DBC text.
+
+    load() hashes the DBC file (together with the cantools version) and
+    unpickles the matching entry from `cache_dir`, by default a .dbc_cache
+    folder next to the DBC. On a miss, or if the entry can't be read, the DBC
+    is parsed with cantools and the entry (re)written; older entries for the
+    same DBC are removed. If the entry can't be written, the parsed database
+    is returned uncached. Any edit to the DBC changes the hash, so a stale
+    database is never returned.
+
+    load_layouts() caches just the frame/signal layouts as plain tuples;
+    reading those back doesn't import cantools at all, which is what the
+    detector's fast path (FrameDecoder) needs at startup.
+    """
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+
+    def _entry(self, dbc_path, kind):
+        dbc_path = os.path.abspath(dbc_path)
+        with open(dbc_path, 'rb') as f:
+            digest = hashlib.sha1(f.read())
+        # Only the full database depends on how cantools pickles its classes
+        if kind == 'pickle':
+            import cantools
+            digest.update(cantools.__version__.encode('utf-8'))
+        cache_dir = self.cache_dir or os.path.join(os.path.dirname(dbc_path), '.dbc_cache')
+        return cache_dir, os.path.join(cache_dir, f"{os.path.basename(dbc_path)}-{digest.hexdigest()[:16]}.{kind}")
+
+    @staticmethod
+    def _read(entry):
+        try:
+            with open(entry, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            # Missing, truncated or written by an incompatible version: rebuild it
+            return None
+
+    def load(self, dbc_path):
+        cache_dir, entry = self._entry(dbc_path, 'pickle')
+        db = self._read(entry)
+        if db is None:
+            import cantools
+            db = cantools.database.load_file(dbc_path)
+            self._write(cache_dir, entry, db)
+        return db
+
+    def load_layouts(self, dbc_path):
+        """{frame_id: MessageLayout} for every message in the DBC."""
+        cache_dir, entry = self._entry(dbc_path, 'layout')
+        layouts = self._read(entry)
+        if layouts is None:
+            layouts = self.layouts_from_db(self.load(dbc_path))
+            self._write(cache_dir, entry, layouts)
+        return layouts
+
+    @staticmethod
+    def layouts_from_db(db):
+        return {
+            message.frame_id: MessageLayout(
+                message.frame_id, message.name, message.length, bool(message.is_multiplexed()),
+                tuple(SignalLayout(s.name, s.start, s.length, s.byte_order, bool(s.is_signed),
+                                   bool(s.is_float), s.scale, s.offset) for s in message.signals))
+            for message in db.messages
+        }
+
+    @staticmethod
+    def _write(cache_dir, entry, obj):
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=cache_dir)
+        except OSError:
+            return  # Read-only location; what we parsed is still good
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, entry)
+        except (OSError, pickle.PicklingError):
+            # Disk full, read-only, or not picklable: what we parsed is still good
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            return
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+        # Older entries of the same kind for the same DBC
+        name = os.path.basename(entry)
+        prefix, kind = name.rsplit('-', 1)[0] + '-', os.path.splitext(name)[1]
+        for other in os.listdir(cache_dir):
+            if other.startswith(prefix) and other.endswith(kind) and other != name:
+                # Another process rebuilding the cache may have removed it already
+                with contextlib.suppress(OSError):
+                    os.unlink(os.path.join(cache_dir, other))
@@ -0,0 +1,120 @@
+from DBCCache import DBCCache
+
+# CAN IDs the detector listens to
+MONITORED_FRAME_IDS = (0x13C, 0x1D0, 0x191, 0x17C, 0x091)
+
+
+class FrameDecoder:
+    """
+    Fast-path decoder for a fixed set of CAN frames.
+
+    The DBC is read once and every frame ID gets its own generated Python
+    function: the payload is turned into one integer with int.from_bytes and
+    each signal is a precomputed shift + mask (+ two's complement for signed
+    signals) followed by raw * scale + offset. The result is a plain dict of
+    ints/floats, the same values db.decode_message(..., decode_choices=False)
+    returns, without any NamedSignalValue to unwrap. As in cantools, a payload
+    shorter than the message raises ValueError and bytes past its length (a
+    padded CAN FD frame) are ignored.
+
+    If `signals` is given, only those signals are extracted (projection) and
+    frame IDs that carry none of them are dropped from `frame_ids` and decode
+    to an empty dict.
+
+    Frames the compiler can't handle (multiplexed, float signals) and frame IDs
+    outside `frame_ids` fall back to cantools.
+
+    `db` is a cantools database or the path of a DBC. Given a path, decoding
+    is compiled from the cached layouts (DBCCache.load_layouts) and cantools
+    itself is only imported if a frame ever needs the fallback.
+    """
+    def __init__(self, db, frame_ids=MONITORED_FRAME_IDS, signals=None):
+        if isinstance(db, str):
+            self._dbc_path, self._db = db, None
+            layouts = DBCCache().load_layouts(db)
+        else:
+            self._dbc_path, self._db = None, db
+            layouts = DBCCache.layouts_from_db(db)
+        self.signals = frozenset(signals) if signals is not None else None
+        self._decoders = {}
+        kept_ids = []
+        for frame_id in dict.fromkeys(frame_ids):
+            message = layouts[frame_id]
+            if self.signals is not None and not any(s.name in self.signals for s in message.signals):
+                self._decoders[frame_id] = lambda data: {}
+                continue
+            kept_ids.append(frame_id)
+            source = self._compile_source(message, self.signals)
+            if source is None:
+                continue
+            namespace = {}
+            exec(compile(source, f"<FrameDecoder {message.name}>", 'exec'), namespace)
+            self._decoders[frame_id] = namespace['decode']
+        # Frame IDs worth receiving at all
+        self.frame_ids = tuple(kept_ids)
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = DBCCache().load(self._dbc_path)
+        return self._db
+
+    @staticmethod
+    def _compile_source(message, wanted=None):
+        signals = [s for s in message.signals if wanted is None or s.name in wanted]
+        if message.is_multiplexed or any(signal.is_float for signal in signals):
+            return None
+
+        total_bits = message.length * 8
+        uses = set()
+        fields = []
+        for signal in signals:
+            mask = (1 << signal.length) - 1
+            if signal.byte_order == 'big_endian':
+                # DBC start bit is the MSB in sawtooth numbering; turn it into
+                # a position counted from the MSB of byte 0.
+                msb = (signal.start // 8) * 8 + (7 - signal.start % 8)
+                shift = total_bits - msb - signal.length
+                word = 'big'
+            else:
+                shift = signal.start
+                word = 'little'
+            uses.add(word)
+
+            raw = f"(({word} >> {shift}) & {mask:#x})" if shift else f"({word} & {mask:#x})"
+            if signal.is_signed:
+                sign_bit = 1 << (signal.length - 1)
+                raw = f"(({raw} ^ {sign_bit:#x}) - {sign_bit:#x})"
+            # Same conversion as cantools: identity keeps the raw int
+            if signal.scale == 1 and signal.offset == 0:
+                value = raw
+            else:
+                value = f"{raw} * {signal.scale!r} + {signal.offset!r}"
+            fields.append(f"        {signal.name!r}: {value},")
+
+        # Like cantools: a short payload is an error, bytes past the message length are ignored
+        lines = [
+            "def decode(data):",
+            f"    if len(data) < {message.length}:",
+            f"        raise ValueError(f'Wrong data size: {{len(data)}} instead of {message.length} bytes')",
+        ]
+        if 'big' in uses:
+            lines.append(f"    big = int.from_bytes(data[:{message.length}], 'big')")
+        if 'little' in uses:
+            lines.append("    little = int.from_bytes(data, 'little')")
+        lines.append("    return {")
+        lines.extend(fields)
+        lines.append("    }")
+        return "\n".join(lines) + "\n"
+
+    def decode(self, frame_id, data):
+        """Decode one frame into {signal_name: int | float}."""
+        decoder = self._decoders.get(frame_id)
+        if decoder is not None:
+            return decoder(data)
+        decoded = self.db.decode_message(frame_id, data, decode_choices=False)
+        return {k: v.value if hasattr(v, "value") else v for k, v in decoded.items()
+                if self.signals is None or k in self.signals}
+
+    def is_compiled(self, frame_id):
+        return frame_id in self._decoders
@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import deque
+
+OVERLOAD_POLICIES = ('block', 'drop-oldest', 'sample')
+
+
+def recv_available(bus, timeout, max_msgs):
+    """Wait up to `timeout` for a python-can frame, then take whatever else is already queued."""
+    msg = bus.recv(timeout=timeout)
+    messages = []
+    while msg is not None:
+        messages.append(msg)
+        if len(messages) >= max_msgs:
+            break
+        msg = bus.recv(timeout=0)
+    return messages
+
+
+class FrameQueue:
+    """
+    Bounded FIFO between the receive and the decode/score stage.
+
+    What put_many() does when the scorer falls behind is the overload policy:
+      * 'block': the receiver waits for room, so nothing is dropped here
+        (the kernel socket buffer takes up the slack, and drops if it fills);
+      * 'drop-oldest': the oldest queued frame makes room and is counted in
+        stats['dropped'], so the scorer always works on recent data;
+      * 'sample': above half full only every `sample_every`-th new frame is
+        queued (the rest are counted in stats['sampled_out']); a full queue
+        then drops its oldest frame.
+
+    `stats` are running counters; depth() is the current gauge and
+    stats['max_depth'] its high-water mark.
+    """
+    def __init__(self, capacity, policy='block', sample_every=4):
+        if policy not in OVERLOAD_POLICIES:
+            raise ValueError(f"Unknown overload policy '{policy}', expected one of {', '.join(OVERLOAD_POLICIES)}")
+        self.capacity = capacity
+        self.policy = policy
+        self.sample_every = sample_every
+
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+        self._arrivals = 0
+
+        self.stats = {
+            'queued': 0,
+            'taken': 0,
+            'dropped': 0,
+            'sampled_out': 0,
+            'blocked_sec': 0.0,
+            'max_depth': 0,
+        }
+
+    def depth(self):
+        return len(self._items)
+
+    def put_many(self, frames):
+        """Queue frames according to the policy; frames put after close() are dropped."""
+        items = self._items
+        stats = self.stats
+        with self._lock:
+            for frame in frames:
+                if self._closed:
+                    stats['dropped'] += 1
+                    continue
+                if self.policy == 'sample' and len(items) >= self.capacity // 2:
+                    self._arrivals += 1
+                    if self._arrivals % self.sample_every:
+                        stats['sampled_out'] += 1
+                        continue
+                if len(items) >= self.capacity:
+                    if self.policy == 'block':
+                        start = time.perf_counter()
+                        while len(items) >= self.capacity and not self._closed:
+                            self._not_full.wait()
+                        stats['blocked_sec'] += time.perf_counter() - start
+                        if self._closed:
+                            stats['dropped'] += 1
+                            continue
+                    else:
+                        items.popleft()
+                        stats['dropped'] += 1
+                items.append(frame)
+                stats['queued'] += 1
+                if len(items) > stats['max_depth']:
+                    stats['max_depth'] = len(items)
+                # Wake the scorer per frame so a blocked receiver can't starve it
+                self._not_empty.notify()
+
+    def get_batch(self, max_items, timeout=None):
+        """
+        Up to `max_items` frames, waiting up to `timeout` seconds (None:
+        forever) for the first one. Empty once the queue is closed and drained.
+        """
+        items = self._items
+        with self._lock:
+            if not items and not self._closed:
+                self._not_empty.wait(timeout)
+            batch = [items.popleft() for _ in range(min(max_items, len(items)))]
+            self.stats['taken'] += len(batch)
+            if batch:
+                self._not_full.notify_all()
+            return batch
+
+    def closed(self):
+        return self._closed and not self._items
+
+    def close(self):
+        """No more frames: the scorer drains what is queued, a blocked receiver gives up."""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+
+class FramePipeline:
+    """
+    Receive on one thread, decode and score on another.
+
+    A receiver thread calls `read(timeout)` (an iterable of frames, empty when
+    nothing arrived) and puts what it gets into a bounded FrameQueue. run()
+    takes frames off the queue in batches of up to `batch_size` and calls
+    `handle(frame)` on each, on the calling thread. A slow scorer therefore no
+    longer stalls the socket reads; how a persistent backlog is absorbed is
+    the queue's overload policy.
+
+    Going `idle_timeout` seconds without a frame stops the receiver; run()
+    returns once the queue is drained. Every `stats_interval` seconds (if set)
+    the stage gauges are printed.
+    """
+    POLL_SEC = 0.1  # Longest the receiver blocks in read(), so it notices a stop
+
+    def __init__(self, read, handle, capacity=4096, policy='block', batch_size=64, idle_timeout=10.0,
+                 stats_interval=None, sample_every=4):
+        self.read = read
+        self.handle = handle
+        self.batch_size = batch_size
+        self.idle_timeout = idle_timeout
+        self.stats_interval = stats_interval
+        self.queue = FrameQueue(capacity, policy, sample_every)
+        self._stop = threading.Event()
+        self._started = None
+
+        self.receiver_stats = {'frames': 0, 'reads': 0, 'errors': 0}
+        self.scorer_stats = {'frames': 0, 'batches': 0, 'busy_sec': 0.0}
+
+    def run(self):
+        self._started = time.perf_counter()
+        receiver = threading.Thread(target=self._receive, name="FramePipeline-receiver", daemon=True)
+        receiver.start()
+        try:
+            self._score()
+        finally:
+            self._stop.set()
+            self.queue.close()
+            receiver.join()
+
+    def _receive(self):
+        stats = self.receiver_stats
+        poll = min(self.POLL_SEC, self.idle_timeout)
+        last_frame = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                try:
+                    frames = list(self.read(poll))
+                except Exception as e:
+                    stats['errors'] += 1
+                    print(f"Receive error: {e}")
+                    break
+                stats['reads'] += 1
+                if frames:
+                    last_frame = time.monotonic()
+                    stats['frames'] += len(frames)
+                    self.queue.put_many(frames)
+                elif time.monotonic() - last_frame > self.idle_timeout:
+                    print(f"No messages received for {self.idle_timeout:g} seconds. Stopping.")
+                    break
+        finally:
+            self.queue.close()
+
+    def _score(self):
+        stats = self.scorer_stats
+        handle = self.handle
+        next_report = time.monotonic() + self.stats_interval if self.stats_interval else None
+        while True:
+            batch = self.queue.get_batch(self.batch_size, timeout=self.POLL_SEC)
+            if batch:
+                start = time.perf_counter()
+                for frame in batch:
+                    handle(frame)
+                stats['busy_sec'] += time.perf_counter() - start
+                stats['frames'] += len(batch)
+                stats['batches'] += 1
+            elif self.queue.closed():
+                break
+            if next_report is not None and time.monotonic() >= next_report:
+                print(self.format_stats())
+                next_report += self.stats_interval
+
+    def stats(self):
+        """Gauges and counters of every stage."""
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        queue = dict(self.queue.stats, depth=self.queue.depth(), capacity=self.queue.capacity,
+                     policy=self.queue.policy)
+        return {
+            'elapsed_sec': elapsed,
+            'receiver': dict(self.receiver_stats),
+            'queue': queue,
+            'scorer': dict(self.scorer_stats, frames_per_sec=self.scorer_stats['frames'] / elapsed if elapsed else 0.0),
+        }
+
+    def format_stats(self):
+        stats = self.stats()
+        queue = stats['queue']
+        return (f"[pipeline] received {stats['receiver']['frames']} | "
+                f"queue {queue['depth']}/{queue['capacity']} (max {queue['max_depth']}, {queue['policy']}) "
+                f"dropped {queue['dropped']} sampled out {queue['sampled_out']} "
+                f"blocked {queue['blocked_sec']:.2f}s | "
+                f"scored {stats['scorer']['frames']} ({stats['scorer']['frames_per_sec']:.0f}/s, "
+                f"busy {stats['scorer']['busy_sec']:.2f}s)")
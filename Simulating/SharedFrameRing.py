@@ -0,0 +1,176 @@
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from SocketCANReader import FrameBatch
+
+# One frame per slot; aligned to 24 bytes
+RING_SLOT_DTYPE = np.dtype([('timestamp', '<f8'), ('can_id', '<u4'), ('dlc', 'u1'), ('data', 'u1', (8,))], align=True)
+
+# Header: the indices live on their own cache lines so the two processes don't
+# keep invalidating each other's line
+_HEAD, _TAIL, _DROPPED, _CLOSED = 0, 64, 128, 136
+HEADER_SIZE = 192
+
+
+class SharedFrameRing:
+    """
+    Single-producer / single-consumer ring of CAN frames in shared memory.
+
+    The capture process write()s frames into fixed-size slots (timestamp, ID,
+    DLC, 8 data bytes) and the scoring process read()s them back, as numpy
+    column copies: nothing is pickled per frame and no lock is taken. `head`
+    (slots written) only moves forward in the writer and `tail` (slots read)
+    only in the reader; each publishes its index with one aligned 64-bit store
+    after touching the slots, so the other side never sees a half-written slot.
+
+    A full ring drops the newest frames and counts them in `dropped`; the
+    capture side is never held up by a slow scorer. close() marks the end of
+    the stream.
+
+    create() makes a new ring; attach() opens an existing one by name in
+    another process. release() unmaps it, and in the creator also frees it.
+    """
+    def __init__(self, shm, capacity, owner):
+        self.shm = shm
+        self.capacity = capacity
+        self._owner = owner
+        buf = shm.buf
+        self._head = np.ndarray((1,), dtype='<u8', buffer=buf, offset=_HEAD)
+        self._tail = np.ndarray((1,), dtype='<u8', buffer=buf, offset=_TAIL)
+        self._dropped = np.ndarray((1,), dtype='<u8', buffer=buf, offset=_DROPPED)
+        self._closed = np.ndarray((1,), dtype='<u8', buffer=buf, offset=_CLOSED)
+        self._slots = np.ndarray((capacity,), dtype=RING_SLOT_DTYPE, buffer=buf, offset=HEADER_SIZE)
+
+    @classmethod
+    def create(cls, capacity):
+        shm = shared_memory.SharedMemory(create=True, size=HEADER_SIZE + capacity * RING_SLOT_DTYPE.itemsize)
+        shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        return cls(shm, capacity, owner=True)
+
+    @classmethod
+    def attach(cls, name, capacity):
+        # Child processes share the creator's resource tracker, so attaching
+        # doesn't make anyone else responsible for unlinking it
+        return cls(shared_memory.SharedMemory(name=name), capacity, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def dropped(self):
+        return int(self._dropped[0])
+
+    @property
+    def closed(self):
+        return bool(self._closed[0])
+
+    def __len__(self):
+        return int(self._head[0]) - int(self._tail[0])
+
+    def write(self, timestamps, can_ids, dlc, data):
+        """Append columns of frames (data: (n, 8) uint8); returns how many fitted."""
+        count = len(timestamps)
+        head = int(self._head[0])
+        free = self.capacity - (head - int(self._tail[0]))
+        if count > free:
+            self._dropped[0] += count - free
+            count = free
+        if count == 0:
+            return 0
+        start = head % self.capacity
+        first = min(count, self.capacity - start)
+        slots = self._slots
+        for lo, src, n in ((start, 0, first), (0, first, count - first)):
+            if n:
+                slots['timestamp'][lo:lo + n] = timestamps[src:src + n]
+                slots['can_id'][lo:lo + n] = can_ids[src:src + n]
+                slots['dlc'][lo:lo + n] = dlc[src:src + n]
+                slots['data'][lo:lo + n] = data[src:src + n]
+        self._head[0] = head + count  # Publish only once the slots are written
+        return count
+
+    def write_frames(self, frames):
+        """Append frame objects (timestamp, arbitration_id, data), e.g. can.Message."""
+        count = len(frames)
+        data = np.zeros((count, 8), dtype=np.uint8)
+        dlc = np.empty(count, dtype=np.uint8)
+        for i, frame in enumerate(frames):
+            payload = bytes(frame.data[:8])
+            dlc[i] = len(payload)
+            data[i, :len(payload)] = np.frombuffer(payload, dtype=np.uint8)
+        return self.write(np.fromiter((f.timestamp for f in frames), dtype=np.float64, count=count),
+                          np.fromiter((f.arbitration_id for f in frames), dtype=np.uint32, count=count),
+                          dlc, data)
+
+    def read(self, max_items):
+        """Take up to `max_items` frames off the ring as a FrameBatch (a copy)."""
+        tail = int(self._tail[0])
+        count = min(int(self._head[0]) - tail, max_items)
+        taken = self._slots[(tail + np.arange(count)) % self.capacity]
+        self._tail[0] = tail + count  # The slots are copied; the writer may reuse them
+        return FrameBatch(taken['timestamp'], taken['can_id'], taken['dlc'], taken['data'])
+
+    def close(self):
+        """Writer side: no more frames will come."""
+        self._closed[0] = 1
+
+    def release(self):
+        # The views must go before the mapping can be closed
+        self._head = self._tail = self._dropped = self._closed = self._slots = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+def pin_to_cpu(cpu):
+    """Run this process on one CPU, where the platform allows it; returns whether it did."""
+    if cpu is None or not hasattr(os, 'sched_setaffinity'):
+        return False
+    try:
+        os.sched_setaffinity(0, {cpu})
+    except OSError:
+        return False
+    return True
+
+
+def capture_to_ring(ring_name, capacity, channel, frame_ids, bulk=False, batch_size=256, idle_timeout=10.0,
+                    cpu=None):
+    """
+    Capture process: read `channel` (SocketCANReader recvmmsg batches with
+    `bulk`, python-can otherwise) into the ring until `idle_timeout` seconds
+    pass without a frame, then close it.
+    """
+    pin_to_cpu(cpu)
+    ring = SharedFrameRing.attach(ring_name, capacity)
+    try:
+        if bulk:
+            from SocketCANReader import SocketCANReader
+
+            with SocketCANReader(channel, frame_ids, batch_size=batch_size) as reader:
+                while True:
+                    batch = reader.read(timeout=idle_timeout)
+                    if not len(batch):
+                        break
+                    ring.write(*batch)
+        else:
+            import can
+            from FramePipeline import recv_available
+
+            bus = can.interface.Bus(channel=channel, bustype='socketcan')
+            bus.set_filters([{"can_id": frame_id, "can_mask": 0x7FF} for frame_id in frame_ids])
+            try:
+                while True:
+                    frames = recv_available(bus, idle_timeout, batch_size)
+                    if not frames:
+                        break
+                    ring.write_frames(frames)
+            finally:
+                bus.shutdown()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.close()
+        ring.release()
@@ -1,14 +1,22 @@
-from can import ASCReader
 from CANDataAdapter import CANDataAdapter
+from FrameDecoder import FrameDecoder
+from TraceCache import TraceCache
+from TraceReader import ASCTraceReader
 from scoring.CANDataPackage import CANDataPackage
-import cantools
-import can
 from scoring.DrivingScoreEvaluator import DrivingScoreEvaluator
+import asyncio
+import os
 import time 
 
 DBC_FILE = 'data/BOSCH_CAN.dbc'
 ASC_FILE = 'data/CANWIN.asc'
 CAN_INTERFACE = 'vcan0'
+RECV_BATCH_SIZE = 50  # Most frames scored per wake-up
+RECV_MAX_DELAY = 0.005  # Longest a received frame waits for its batch to fill (s)
+IDLE_TIMEOUT = 10.0  # Stop after this long without any messages (s)
+PIPELINE_QUEUE_SIZE = 4096  # Frames buffered between the receiver and scorer threads
+RING_SIZE = 65536  # Frame slots shared between the capture and scoring processes
+RING_POLL_SEC = 0.001  # Scorer's nap when the ring is empty
 
 class Simulator:
     def __init__(self):
@@ -23,65 +31,204 @@ class Simulator:
         self.eco_timestamps_log = []
         self.safety_timestamps_log = []
 
-    def run_simulation(self):
+    def run_simulation(self, batch_size=RECV_BATCH_SIZE, max_delay=RECV_MAX_DELAY, idle_timeout=IDLE_TIMEOUT,
+                       bulk=False):
         try:
-            db = cantools.db.load_file(DBC_FILE)
-            bus = can.interface.Bus(channel=CAN_INTERFACE, bustype='socketcan')
-            bus.set_filters([
-                {"can_id": 0x13C, "can_mask": 0x7FF},
-                {"can_id": 0x1D0, "can_mask": 0x7FF},
-                {"can_id": 0x191, "can_mask": 0x7FF},
-                {"can_id": 0x17C, "can_mask": 0x7FF},
-                {"can_id": 0x091, "can_mask": 0x7FF},
-            ])
-            print(f"Detector started. Listening on {CAN_INTERFACE}...")
+            decoder = FrameDecoder(DBC_FILE, signals=self.adapter.SIGNALS)
         except FileNotFoundError:
             print(f"Error: DBC file '{DBC_FILE}' not found.")
             exit()
 
-        timeout = 10.0  # seconds without any messages
-        start_time = time.time()
-        running = True
+        if bulk:
+            # Linux only: recvmmsg batches from a raw socket instead of python-can
+            from SocketCANReader import SocketCANReader
 
-        while running:
-            messages = self._recv_many(bus)
+            with SocketCANReader(CAN_INTERFACE, decoder.frame_ids, batch_size=batch_size) as reader:
+                print(f"Detector started. Listening on {CAN_INTERFACE} (recvmmsg)...")
+                self._receive_bulk(reader, decoder, idle_timeout)
+            return
 
-            if messages:
-                start_time = time.time()  # Reset timer when messages are received
+        import can  # python-can is only needed on a live bus
 
-                for msg in messages:
-                    # print(f"Received Message with ID: {hex(msg.arbitration_id)}")
+        bus = can.interface.Bus(channel=CAN_INTERFACE, bustype='socketcan')
+        bus.set_filters([{"can_id": frame_id, "can_mask": 0x7FF} for frame_id in decoder.frame_ids])
+        print(f"Detector started. Listening on {CAN_INTERFACE}...")
 
-                    try:
-                        decoded_data = db.decode_message(msg.arbitration_id, msg.data, decode_choices=False)
-                    except Exception as e:
-                        print(f"Failed to decode message {hex(msg.arbitration_id)}: {e}")
-                        continue
+        try:
+            asyncio.run(self._receive(bus, decoder, batch_size, max_delay, idle_timeout))
+        finally:
+            bus.shutdown()
+
+    def run_simulation_pipelined(self, queue_size=PIPELINE_QUEUE_SIZE, policy='block', batch_size=RECV_BATCH_SIZE,
+                                 idle_timeout=IDLE_TIMEOUT, bulk=False, stats_interval=None):
+        """
+        Live bus through FramePipeline: a receiver thread queues frames for
+        the decode/score loop on this thread, with `policy` deciding what
+        happens when more than `queue_size` frames are waiting.
+        """
+        from FramePipeline import FramePipeline, recv_available
+
+        try:
+            decoder = FrameDecoder(DBC_FILE, signals=self.adapter.SIGNALS)
+        except FileNotFoundError:
+            print(f"Error: DBC file '{DBC_FILE}' not found.")
+            exit()
 
-                    normalized_data = {
-                        k: v.value if hasattr(v, "value") else v for k, v in decoded_data.items()
-                    }
+        if bulk:
+            from SocketCANReader import SocketCANReader
 
-                    timestamp = msg.timestamp
-                    self.adapter.msg_to_package(timestamp, normalized_data)
+            reader = SocketCANReader(CAN_INTERFACE, decoder.frame_ids, batch_size=batch_size)
+            read = lambda timeout: reader.read(timeout).frames()
+            close = reader.close
+        else:
+            import can
 
-                    can_package = self.adapter.get_data_package()
-                    eco_score, safety_score = self.evaluator.process_can_data(can_package)
+            bus = can.interface.Bus(channel=CAN_INTERFACE, bustype='socketcan')
+            bus.set_filters([{"can_id": frame_id, "can_mask": 0x7FF} for frame_id in decoder.frame_ids])
+            read = lambda timeout: recv_available(bus, timeout, batch_size)
+            close = bus.shutdown
+        print(f"Detector started. Listening on {CAN_INTERFACE} ({policy} pipeline)...")
+
+        pipeline = FramePipeline(read, lambda frame: self._score_frame(decoder, frame), capacity=queue_size,
+                                 policy=policy, batch_size=batch_size, idle_timeout=idle_timeout,
+                                 stats_interval=stats_interval)
+        try:
+            pipeline.run()
+        finally:
+            close()
+        print(pipeline.format_stats())
+        return pipeline.stats()
+
+    def run_simulation_multiprocess(self, ring_size=RING_SIZE, batch_size=RECV_BATCH_SIZE, idle_timeout=IDLE_TIMEOUT,
+                                    bulk=False):
+        """
+        Live bus in two processes: a capture process reads the bus into a
+        SharedFrameRing and this process decodes and scores from it. Where
+        there are at least two CPUs, each process is pinned to its own.
+        """
+        import multiprocessing
+        from SharedFrameRing import SharedFrameRing, capture_to_ring, pin_to_cpu
 
-                    if eco_score is not None:
-                        self.eco_scores_log.append(eco_score)
-                        self.eco_timestamps_log.append(timestamp)
-                        print(f"Time: {timestamp:.1f}s | Eco Score: {eco_score:.2f}")
+        try:
+            decoder = FrameDecoder(DBC_FILE, signals=self.adapter.SIGNALS)
+        except FileNotFoundError:
+            print(f"Error: DBC file '{DBC_FILE}' not found.")
+            exit()
 
-                    if safety_score is not None:
-                        self.safety_scores_log.append(safety_score)
-                        self.safety_timestamps_log.append(timestamp)
-                        print(f"Time: {timestamp:.1f}s | Safety Score: {safety_score:.2f}")
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else []
+        capture_cpu, scoring_cpu = (cpus[0], cpus[1]) if len(cpus) >= 2 else (None, None)
+
+        ring = SharedFrameRing.create(ring_size)
+        capture = multiprocessing.Process(
+            target=capture_to_ring, name="CANCapture",
+            args=(ring.name, ring_size, CAN_INTERFACE, decoder.frame_ids, bulk, batch_size, idle_timeout, capture_cpu))
+        try:
+            capture.start()
+            pin_to_cpu(scoring_cpu)
+            print(f"Detector started. Listening on {CAN_INTERFACE} (capture process {capture.pid})...")
+            self._score_ring(ring, decoder, batch_size, capture.is_alive)
+            capture.join()
+            dropped = ring.dropped
+        finally:
+            if capture.is_alive():
+                capture.terminate()
+                capture.join()
+            ring.release()
+
+        if capture.exitcode == 0:
+            print(f"No messages received for {idle_timeout:g} seconds. Stopping.")
+        else:
+            print(f"Capture process exited with code {capture.exitcode}.")
+        print(f"{dropped} frames dropped by a full ring.")
+
+    def _score_ring(self, ring, decoder, batch_size, capture_alive):
+        """Score frames off the ring until the capture side closes it (or dies) and it is drained."""
+        while True:
+            closed = ring.closed  # Checked before reading, so no frame written before close() is missed
+            batch = ring.read(batch_size)
+            if len(batch):
+                for frame in batch.frames():
+                    self._score_frame(decoder, frame)
+            elif closed or not capture_alive():
+                if not len(ring):
+                    break
             else:
-                if time.time() - start_time > timeout:
-                    print("No messages received for 10 seconds. Stopping.")
-                    running = False
+                time.sleep(RING_POLL_SEC)
 
+    async def _receive(self, bus, decoder, batch_size, max_delay, idle_timeout):
+        """
+        Score frames as the bus delivers them.
+
+        A python-can Notifier feeds an AsyncBufferedReader from the event loop
+        (socketcan buses are watched with loop.add_reader, no polling thread).
+        The first frame of a batch wakes us up; frames already buffered, or
+        arriving within `max_delay` of it, join the batch up to `batch_size`.
+        Going `idle_timeout` seconds without a frame ends the run.
+        """
+        import can
+
+        reader = can.AsyncBufferedReader()
+        notifier = can.Notifier(bus, [reader], loop=asyncio.get_running_loop())
+        buffered = reader.buffer
+        try:
+            while True:
+                try:
+                    batch = [await asyncio.wait_for(reader.get_message(), idle_timeout)]
+                except asyncio.TimeoutError:
+                    print(f"No messages received for {idle_timeout:g} seconds. Stopping.")
+                    break
+
+                deadline = time.monotonic() + max_delay
+                while len(batch) < batch_size:
+                    if not buffered.empty():
+                        batch.append(buffered.get_nowait())
+                        continue
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(reader.get_message(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+                for msg in batch:
+                    self._score_frame(decoder, msg)
+        finally:
+            notifier.stop()
+            reader.stop()
+
+    def _receive_bulk(self, reader, decoder, idle_timeout):
+        """Score each recvmmsg batch as it is read; `idle_timeout` seconds without a frame ends the run."""
+        while True:
+            batch = reader.read(timeout=idle_timeout)
+            if not len(batch):
+                print(f"No messages received for {idle_timeout:g} seconds. Stopping.")
+                break
+            for frame in batch.frames():
+                self._score_frame(decoder, frame)
+
+    def _score_frame(self, decoder, msg):
+        try:
+            decoded_data = decoder.decode(msg.arbitration_id, msg.data)
+        except Exception as e:
+            print(f"Failed to decode message {hex(msg.arbitration_id)}: {e}")
+            return
+
+        timestamp = msg.timestamp
+        self.adapter.msg_to_package(timestamp, decoded_data)
+
+        can_package = self.adapter.get_data_package()
+        eco_score, safety_score = self.evaluator.process_can_data(can_package)
+
+        if eco_score is not None:
+            self.eco_scores_log.append(eco_score)
+            self.eco_timestamps_log.append(timestamp)
+            print(f"Time: {timestamp:.1f}s | Eco Score: {eco_score:.2f}")
+
+        if safety_score is not None:
+            self.safety_scores_log.append(safety_score)
+            self.safety_timestamps_log.append(timestamp)
+            print(f"Time: {timestamp:.1f}s | Safety Score: {safety_score:.2f}")
 
     def plot_results(self):
         """
@@ -108,74 +255,42 @@ class Simulator:
         plt.tight_layout() # Adjust layout to prevent overlapping
         plt.show()
 
-    def _recv_many(self, bus, dur=0.5, max_msgs=50):
-        """
-        Fallback function to collect multiple messages within a timeout.
-        """
-        from time import time
-        messages = []
-        start = time()
-        while time() - start < dur and len(messages) < max_msgs:
-            msg = bus.recv(timeout=0.1)
-            if msg:
-                messages.append(msg)
-        return messages
-    
-    def run_simulation_local(self):
+    def run_simulation_local(self, use_cache=False):
         try:
-            db = cantools.db.load_file(DBC_FILE)
+            decoder = FrameDecoder(DBC_FILE, signals=self.adapter.SIGNALS)
             print("DBC loaded.")
         except FileNotFoundError:
             print(f"Error: DBC file '{DBC_FILE}' not found.")
             exit()
 
         # Path to your CANWIN.asc file
-        print(f"Loading CAN log from {ASC_FILE}...")
-
-        # Only keep necessary CAN IDs
-        allowed_ids = {0x13C, 0x1D0, 0x191, 0x17C, 0x091}
-
-        # Read messages from .asc file
-        log = ASCReader(ASC_FILE)
-        messages = list(log)
-
-        print(f"{len(messages)} messages loaded from log.")
+        messages = None
+        if use_cache:
+            # The first run converts the log into an indexed binary cache; later
+            # runs only read the frames with the IDs we need
+            try:
+                trace = TraceCache().load(ASC_FILE)
+                messages = trace.frames(can_ids=decoder.frame_ids)
+                print(f"{len(trace)} frames in cached trace {trace.path}")
+            except OSError as e:
+                print(f"Trace cache unavailable ({e}), streaming the log instead.")
+        if messages is None:
+            # Frames are read lazily; IDs we don't need are dropped while parsing
+            print(f"Streaming CAN log from {ASC_FILE}...")
+            messages = ASCTraceReader(ASC_FILE, can_ids=decoder.frame_ids)
 
         # Simulate real-time replay
         last_time = None
+        replayed = 0
 
         for msg in messages:
-            if msg.arbitration_id not in allowed_ids:
-                continue  # Skip irrelevant messages
-
+            replayed += 1
             if last_time is not None:
                 sleep_time = msg.timestamp - last_time
                 if sleep_time > 0:
                     time.sleep(sleep_time)
             last_time = msg.timestamp
 
-            try:
-                decoded_data = db.decode_message(msg.arbitration_id, msg.data, decode_choices=False)
-            except Exception as e:
-                print(f"Failed to decode message {hex(msg.arbitration_id)}: {e}")
-                continue
-
-            normalized_data = {
-                k: v.value if hasattr(v, "value") else v for k, v in decoded_data.items()
-            }
-
-            timestamp = msg.timestamp
-            self.adapter.msg_to_package(timestamp, normalized_data)
-
-            can_package = self.adapter.get_data_package()
-            eco_score, safety_score = self.evaluator.process_can_data(can_package)
-
-            if eco_score is not None:
-                self.eco_scores_log.append(eco_score)
-                self.eco_timestamps_log.append(timestamp)
-                print(f"Time: {timestamp:.1f}s | Eco Score: {eco_score:.2f}")
-
-            if safety_score is not None:
-                self.safety_scores_log.append(safety_score)
-                self.safety_timestamps_log.append(timestamp)
-                print(f"Time: {timestamp:.1f}s | Safety Score: {safety_score:.2f}")
+            self._score_frame(decoder, msg)
+
+        print(f"{replayed} messages replayed from log.")
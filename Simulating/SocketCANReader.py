@@ -0,0 +1,185 @@
+import ctypes
+import errno
+import os
+import select
+import socket
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from TraceReader import Frame
+
+SO_TIMESTAMPNS = 35  # Not exported by the socket module
+CAN_FRAME_SIZE = 16  # struct can_frame (classic CAN, CAN FD frames are not enabled)
+
+# struct can_frame: id (with EFF/RTR/ERR flags), length, 3 pad bytes, 8 data bytes
+CAN_FRAME_DTYPE = np.dtype([('can_id', '=u4'), ('dlc', 'u1'), ('pad', 'u1', (3,)), ('data', 'u1', (8,))])
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_name', ctypes.c_void_p),
+        ('msg_namelen', ctypes.c_uint32),
+        ('msg_iov', ctypes.POINTER(_IOVec)),
+        ('msg_iovlen', ctypes.c_size_t),
+        ('msg_control', ctypes.c_void_p),
+        ('msg_controllen', ctypes.c_size_t),
+        ('msg_flags', ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _MsgHdr), ('msg_len', ctypes.c_uint)]
+
+
+def _cmsg_align(size):
+    word = ctypes.sizeof(ctypes.c_size_t)
+    return (size + word - 1) & ~(word - 1)
+
+
+# One SO_TIMESTAMPNS control message (struct cmsghdr + struct timespec) per frame
+_CMSG_HEADER = _cmsg_align(ctypes.sizeof(ctypes.c_size_t) + 2 * ctypes.sizeof(ctypes.c_int))
+CONTROL_SIZE = _CMSG_HEADER + _cmsg_align(2 * ctypes.sizeof(ctypes.c_long))
+_CONTROL_DTYPE = np.dtype({
+    'names': ['len', 'level', 'type', 'sec', 'nsec'],
+    'formats': [np.uintp, np.intc, np.intc, np.int_, np.int_],
+    'offsets': [0, ctypes.sizeof(ctypes.c_size_t), ctypes.sizeof(ctypes.c_size_t) + ctypes.sizeof(ctypes.c_int),
+                _CMSG_HEADER, _CMSG_HEADER + ctypes.sizeof(ctypes.c_long)],
+    'itemsize': CONTROL_SIZE,
+})
+
+
+class FrameBatch(NamedTuple):
+    """Frames of one read, as columns: kernel timestamps, IDs, DLCs and (n, 8) zero-padded payloads."""
+    timestamps: np.ndarray
+    can_ids: np.ndarray
+    dlc: np.ndarray
+    data: np.ndarray
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def frames(self):
+        """Yield Frame tuples, the fields the decoder and scorer use."""
+        payload = self.data.tobytes()
+        for i, (ts, frame_id, dlc) in enumerate(zip(self.timestamps.tolist(), self.can_ids.tolist(),
+                                                      self.dlc.tolist())):
+            yield Frame(ts, frame_id, payload[i * 8:i * 8 + dlc])
+
+
+class SocketCANReader:
+    """
+    Linux-only bulk reader for a SocketCAN interface (vcan0, can0, ...).
+
+    Frames are read from a raw AF_CAN socket with recvmmsg(2), up to
+    `batch_size` per system call, straight into preallocated buffers: one
+    struct can_frame and one SO_TIMESTAMPNS control message per slot. read()
+    turns them into a FrameBatch with numpy column operations, so the per-frame
+    cost in Python is only what the consumer does with the batch.
+
+    `can_ids` become kernel filters (data frames with those IDs: standard
+    frames up to 0x7FF, extended above), so nothing else reaches user space.
+    Remote and error frames never come through. The arrays of a batch are
+    only valid until the next read().
+    """
+    def __init__(self, channel, can_ids=None, batch_size=256, rcvbuf=1 << 20):
+        self.channel = channel
+        self.batch_size = batch_size
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._recvmmsg = self._libc.recvmmsg
+        self._recvmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+        self._recvmmsg.restype = ctypes.c_int
+        self.sock = self._open(channel, can_ids, rcvbuf)
+
+        # Preallocated receive buffers and the message headers pointing into them
+        self._frames = np.zeros(batch_size, dtype=CAN_FRAME_DTYPE)
+        self._control = np.zeros(batch_size, dtype=_CONTROL_DTYPE)
+        self._iovecs = (_IOVec * batch_size)()
+        self._msgs = (_MMsgHdr * batch_size)()
+        frames_address = self._frames.ctypes.data
+        control_address = self._control.ctypes.data
+        for i in range(batch_size):
+            self._iovecs[i].iov_base = frames_address + i * CAN_FRAME_SIZE
+            self._iovecs[i].iov_len = CAN_FRAME_SIZE
+            header = self._msgs[i].msg_hdr
+            header.msg_iov = ctypes.pointer(self._iovecs[i])
+            header.msg_iovlen = 1
+            header.msg_control = control_address + i * CONTROL_SIZE
+            header.msg_controllen = CONTROL_SIZE
+        # The kernel shrinks msg_controllen to what it wrote; reset it column-wise before each call
+        self._controllen = np.ndarray((batch_size,), dtype=np.uintp, buffer=self._msgs,
+                                      offset=_MMsgHdr.msg_hdr.offset + _MsgHdr.msg_controllen.offset,
+                                      strides=(ctypes.sizeof(_MMsgHdr),))
+
+    @staticmethod
+    def _open(channel, can_ids, rcvbuf):
+        sock = socket.socket(socket.AF_CAN, socket.SOCK_RAW, socket.CAN_RAW)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+            sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+            if can_ids is not None:
+                # IDs above the 11-bit range are matched as extended (29-bit) frames
+                standard = socket.CAN_EFF_FLAG | socket.CAN_RTR_FLAG | socket.CAN_SFF_MASK
+                extended = socket.CAN_EFF_FLAG | socket.CAN_RTR_FLAG | socket.CAN_EFF_MASK
+                filters = np.array([(frame_id | socket.CAN_EFF_FLAG, extended) if frame_id > socket.CAN_SFF_MASK
+                                    else (frame_id, standard) for frame_id in can_ids], dtype='=u4')
+                sock.setsockopt(socket.SOL_CAN_RAW, socket.CAN_RAW_FILTER, filters.tobytes())
+            sock.bind((channel,))
+            sock.setblocking(False)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def read(self, timeout=None):
+        """
+        Wait up to `timeout` seconds (None: forever) for frames and return
+        everything queued, up to batch_size, as a FrameBatch (empty on timeout).
+        """
+        ready, _, _ = select.select([self.sock], [], [], timeout)
+        if not ready:
+            return self._batch(0)
+        self._controllen[:] = CONTROL_SIZE
+        count = self._recvmmsg(self.sock.fileno(), self._msgs, self.batch_size, socket.MSG_DONTWAIT, None)
+        if count < 0:
+            code = ctypes.get_errno()
+            if code in (errno.EAGAIN, errno.EINTR):
+                return self._batch(0)
+            raise OSError(code, f"recvmmsg on {self.channel}: {os.strerror(code)}")
+        return self._batch(count)
+
+    def _batch(self, count):
+        frames = self._frames[:count]
+        control = self._control[:count]
+        timestamps = control['sec'] + control['nsec'] * 1e-9
+        missing = (self._controllen[:count] == 0) | (control['type'] != SO_TIMESTAMPNS)
+        if missing.any():
+            timestamps[missing] = time.time()
+        can_ids = frames['can_id']
+        data_frames = (can_ids & (socket.CAN_RTR_FLAG | socket.CAN_ERR_FLAG)) == 0
+        if not data_frames.all():
+            frames, timestamps, can_ids = frames[data_frames], timestamps[data_frames], can_ids[data_frames]
+        return FrameBatch(timestamps, can_ids & socket.CAN_EFF_MASK, np.minimum(frames['dlc'], 8), frames['data'])
+
+    def __iter__(self):
+        """Frames one at a time, forever; see read() for batches with a timeout."""
+        while True:
+            yield from self.read().frames()
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
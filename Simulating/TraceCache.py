@@ -0,0 +1,324 @@
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from TraceReader import ASCTraceReader, Frame
+
+CACHE_VERSION = 1
+BLOCK_SEC = 1.0  # Granularity of the time index
+ROW_SPAN = 1 << 18  # Rows frames() reads before releasing their pages
+ID_BUFFER_ROWS = 1 << 20  # Row numbers buffered before the build appends them to the per-ID files
+
+# Column files of a cached trace
+COLUMNS = {
+    'timestamps': (np.float64, ()),
+    'can_ids': (np.uint32, ()),
+    'dlc': (np.uint8, ()),
+    'data': (np.uint8, (8,)),
+}
+
+
+class Trace:
+    """
+    A cached trace: memory-mapped columns plus the per-ID and time-block indexes.
+
+    Rows are in file order. `can_ids`, `timestamps`, `dlc` and `data` (n x 8,
+    zero padded) are read-only views of memory-mapped files, so opening a
+    trace costs nothing until rows are touched. frames() works through the
+    trace ROW_SPAN rows at a time and releases the pages it has read, so a
+    full replay doesn't grow RSS by the size of the columns.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._maps = []
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            self.meta = json.load(f)
+        count = self.meta['count']
+        for name, (dtype, shape) in COLUMNS.items():
+            setattr(self, name, self._open(name, dtype, (count,) + shape))
+        self.id_rows = self._open('id_rows', np.int64, (count,))
+        self.block_rows = self._open('block_rows', np.int64, (self.meta['blocks'] + 1,))
+        # frame ID -> (offset, count) into id_rows
+        self.id_index = {int(k): tuple(v) for k, v in self.meta['id_index'].items()}
+
+    def _open(self, name, dtype, shape):
+        if shape[0] == 0:
+            return np.empty(shape, dtype=dtype)
+        with open(os.path.join(self.path, f"{name}.bin"), 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mm)
+        return np.frombuffer(mm, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+    def _release(self):
+        # Drop the pages read so far from our mappings so they stop counting
+        # against RSS; they are read-only, so touching them again just reloads them
+        if hasattr(mmap, 'MADV_DONTNEED'):
+            for mm in self._maps:
+                mm.madvise(mmap.MADV_DONTNEED)
+
+    def __len__(self):
+        return self.meta['count']
+
+    def frame_ids(self):
+        return sorted(self.id_index)
+
+    def _time_range(self, start, end):
+        # Row range [lo, hi) that can hold timestamps in [start, end]
+        count = len(self)
+        if not self.meta['monotonic'] or count == 0:
+            return 0, count
+        t0 = self.meta['t0']
+        blocks = self.meta['blocks']
+        lo, hi = 0, count
+        if start is not None:
+            block = int(np.clip(np.floor((start - t0) / BLOCK_SEC), 0, blocks))
+            lo = int(self.block_rows[block])
+        if end is not None:
+            block = int(np.clip(np.floor((end - t0) / BLOCK_SEC) + 1, 0, blocks))
+            hi = int(self.block_rows[block])
+        return lo, hi
+
+    def rows(self, can_ids=None, start=None, end=None):
+        """Row numbers (in file order) of frames with these IDs inside [start, end]."""
+        parts = list(self._row_parts(can_ids, start, end))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def _row_parts(self, can_ids, start, end):
+        # rows() in pieces, each from the next ROW_SPAN rows of the trace
+        lo, hi = self._time_range(start, end)
+        if can_ids is not None:
+            id_rows = [self.id_rows[offset:offset + count]
+                       for offset, count in (self.id_index.get(frame_id, (0, 0)) for frame_id in can_ids)]
+        for first in range(lo, hi, ROW_SPAN):
+            last = min(first + ROW_SPAN, hi)
+            if can_ids is None:
+                rows = np.arange(first, last)
+            elif id_rows:
+                # Each ID's rows are sorted, so a row range is a slice of them
+                rows = np.sort(np.concatenate([r[np.searchsorted(r, first):np.searchsorted(r, last)]
+                                               for r in id_rows]))
+            else:
+                rows = np.empty(0, dtype=np.int64)
+            if len(rows) and (start is not None or end is not None):
+                ts = self.timestamps[rows]
+                keep = np.ones(len(rows), dtype=bool)
+                if start is not None:
+                    keep &= ts >= start
+                if end is not None:
+                    keep &= ts <= end
+                rows = rows[keep]
+            if len(rows):
+                yield rows
+
+    def frames(self, can_ids=None, start=None, end=None, chunk_size=4096):
+        """Yield Frame tuples, in file order, like ASCTraceReader does."""
+        for rows in self._row_parts(can_ids, start, end):
+            yield from self.frames_at(rows, chunk_size)
+            self._release()
+
+    def frames_at(self, rows, chunk_size=4096):
+        """Yield the Frame tuples of the given row numbers."""
+        for first in range(0, len(rows), chunk_size):
+            chunk = rows[first:first + chunk_size]
+            timestamps = self.timestamps[chunk].tolist()
+            ids = self.can_ids[chunk].tolist()
+            dlcs = self.dlc[chunk].tolist()
+            payload = self.data[chunk].tobytes()
+            for i, (ts, frame_id, dlc) in enumerate(zip(timestamps, ids, dlcs)):
+                yield Frame(ts, frame_id, payload[i * 8:i * 8 + dlc])
+
+    def __iter__(self):
+        return self.frames()
+
+    def records(self, rows=None):
+        """Copy rows into a (timestamp, can_id, dlc, data) structured array."""
+        if rows is None:
+            rows = slice(None)
+        dtype = np.dtype([('timestamp', np.float64), ('can_id', np.uint32),
+                          ('dlc', np.uint8), ('data', np.uint8, (8,))])
+        timestamps = self.timestamps[rows]
+        out = np.empty(len(timestamps), dtype=dtype)
+        out['timestamp'] = timestamps
+        out['can_id'] = self.can_ids[rows]
+        out['dlc'] = self.dlc[rows]
+        out['data'] = self.data[rows]
+        return out
+
+
+class _IndexWriter:
+    """
+    Builds the per-ID and time-block indexes of a trace while its columns are
+    written, a chunk of frames at a time. Row numbers are appended to one file
+    per frame ID (flushed every ID_BUFFER_ROWS rows) and finish() joins those
+    into id_rows.bin in ID order, so nothing ever holds the whole trace.
+    """
+    def __init__(self, tmp):
+        self.tmp = tmp
+        self.id_dir = os.path.join(tmp, 'id_rows')
+        os.mkdir(self.id_dir)
+        self.count = 0
+        self._pending = {}  # frame ID -> row arrays not yet appended to its file
+        self._pending_rows = 0
+        self._t0 = None
+        self._t_max = None
+        self._last = None
+        self._monotonic = True
+        self._block_rows = []  # First row at or after each block edge resolved so far, per chunk
+        self._edges = 0  # Block edges resolved so far
+
+    def add(self, timestamps, can_ids):
+        count = len(timestamps)
+        if not count:
+            return
+        rows = np.arange(self.count, self.count + count, dtype=np.int64)
+        order = np.argsort(can_ids, kind='stable')
+        ids, starts = np.unique(can_ids[order], return_index=True)
+        for frame_id, id_rows in zip(ids.tolist(), np.split(rows[order], starts[1:])):
+            self._pending.setdefault(frame_id, []).append(id_rows)
+        self._pending_rows += count
+        if self._pending_rows >= ID_BUFFER_ROWS:
+            self._flush_ids()
+
+        if self._t0 is None:
+            self._t0 = self._last = float(timestamps[0])
+        chunk_max = float(timestamps.max())
+        self._t_max = chunk_max if self._t_max is None else max(self._t_max, chunk_max)
+        if self._monotonic and (timestamps[0] < self._last or np.any(np.diff(timestamps) < 0)):
+            self._monotonic = False
+        self._last = float(timestamps[-1])
+        if self._monotonic:
+            # Block edges up to this chunk's last timestamp have their first row in this chunk
+            needed = int(np.floor((self._last - self._t0) / BLOCK_SEC)) + 2
+            edges = self._t0 + BLOCK_SEC * np.arange(self._edges, max(needed, self._edges))
+            edges = edges[edges <= self._last]
+            self._block_rows.append(self.count + np.searchsorted(timestamps, edges, side='left'))
+            self._edges += len(edges)
+        self.count += count
+
+    def _flush_ids(self):
+        for frame_id, parts in self._pending.items():
+            with open(os.path.join(self.id_dir, f"{frame_id}.bin"), 'ab') as f:
+                f.write(np.concatenate(parts).tobytes())
+        self._pending = {}
+        self._pending_rows = 0
+
+    def finish(self):
+        """Write id_rows.bin and block_rows.bin; returns the index part of meta.json."""
+        meta = {'version': CACHE_VERSION, 'count': self.count, 'block_sec': BLOCK_SEC,
+                't0': 0.0, 'blocks': 0, 'monotonic': self._monotonic, 'id_index': {}}
+
+        # Rows grouped by ID, file order kept within each ID
+        self._flush_ids()
+        offset = 0
+        with open(os.path.join(self.tmp, 'id_rows.bin'), 'wb') as out:
+            for frame_id in sorted(int(name[:-len('.bin')]) for name in os.listdir(self.id_dir)):
+                path = os.path.join(self.id_dir, f"{frame_id}.bin")
+                count = os.path.getsize(path) // np.dtype(np.int64).itemsize
+                with open(path, 'rb') as f:
+                    shutil.copyfileobj(f, out)
+                meta['id_index'][str(frame_id)] = [offset, count]
+                offset += count
+        shutil.rmtree(self.id_dir)
+
+        # First row at or after each block boundary (last entry = count)
+        if self.count:
+            meta['t0'] = self._t0
+            meta['blocks'] = int(np.floor((self._t_max - self._t0) / BLOCK_SEC)) + 1
+        block_rows = np.zeros(meta['blocks'] + 1, dtype=np.int64)
+        if self._monotonic:
+            resolved = np.concatenate(self._block_rows) if self._block_rows else np.empty(0, dtype=np.int64)
+            resolved = resolved[:len(block_rows)]
+            block_rows[:len(resolved)] = resolved
+            block_rows[len(resolved):] = self.count
+        block_rows[-1] = self.count
+        block_rows.tofile(os.path.join(self.tmp, 'block_rows.bin'))
+        return meta
+
+
+class TraceCache:
+    """
+    Binary, indexed copies of ASC traces so repeated runs skip text parsing.
+
+    The first load() of a trace streams it through ASCTraceReader into column
+    files (timestamps, IDs, DLCs, 8-byte payloads) and builds two indexes:
+    the rows of every frame ID, and the first row of every BLOCK_SEC time
+    block. Both are built chunk by chunk as the columns are written, so
+    building takes about as little memory as streaming the text does. Entries are keyed by the trace's absolute path, size and mtime, so
+    an edited trace is rebuilt and its stale entry removed.
+
+    Caches live in `cache_dir`, by default a .trace_cache folder next to the trace.
+    """
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+
+    def _entry_dir(self, asc_path):
+        asc_path = os.path.abspath(asc_path)
+        stat = os.stat(asc_path)
+        cache_dir = self.cache_dir or os.path.join(os.path.dirname(asc_path), '.trace_cache')
+        key = f"{CACHE_VERSION}|{asc_path}|{stat.st_size}|{stat.st_mtime_ns}"
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        return cache_dir, f"{os.path.basename(asc_path)}-{digest}"
+
+    def load(self, asc_path):
+        cache_dir, name = self._entry_dir(asc_path)
+        entry = os.path.join(cache_dir, name)
+        if not os.path.exists(os.path.join(entry, 'meta.json')):
+            self._build(asc_path, cache_dir, name)
+        return Trace(entry)
+
+    def _build(self, asc_path, cache_dir, name):
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=f".{name}-", dir=cache_dir)
+        try:
+            index = _IndexWriter(tmp)
+            self._write_columns(asc_path, tmp, index)
+            meta = index.finish()
+            meta['source'] = {'path': os.path.abspath(asc_path), 'size': os.path.getsize(asc_path)}
+            with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+            entry = os.path.join(cache_dir, name)
+            try:
+                os.rename(tmp, entry)
+            except OSError:
+                # Someone else built it first
+                shutil.rmtree(tmp, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self._remove_stale(cache_dir, name, os.path.abspath(asc_path))
+
+    @staticmethod
+    def _write_columns(asc_path, tmp, index):
+        files = {name: open(os.path.join(tmp, f"{name}.bin"), 'wb') for name in COLUMNS}
+        try:
+            for chunk in ASCTraceReader(asc_path).iter_chunks():
+                timestamps = np.array([f.timestamp for f in chunk], dtype=np.float64)
+                can_ids = np.array([f.arbitration_id for f in chunk], dtype=np.uint32)
+                files['timestamps'].write(timestamps.tobytes())
+                files['can_ids'].write(can_ids.tobytes())
+                files['dlc'].write(bytes(len(f.data) for f in chunk))
+                files['data'].write(b"".join(f.data.ljust(8, b"\0") for f in chunk))
+                index.add(timestamps, can_ids)
+        finally:
+            for f in files.values():
+                f.close()
+
+    @staticmethod
+    def _remove_stale(cache_dir, name, source_path):
+        # Older entries built from the same trace path
+        for other in os.listdir(cache_dir):
+            meta_path = os.path.join(cache_dir, other, 'meta.json')
+            if other == name or not os.path.exists(meta_path):
+                continue
+            try:
+                with open(meta_path, 'r') as f:
+                    source = json.load(f).get('source', {})
+            except (OSError, ValueError):
+                continue
+            if source.get('path') == source_path:
+                shutil.rmtree(os.path.join(cache_dir, other), ignore_errors=True)
@@ -0,0 +1,151 @@
+import mmap
+from typing import NamedTuple
+
+# How often parsed pages are handed back while streaming
+RELEASE_EVERY_LINES = 65536
+
+
+class Frame(NamedTuple):
+    """A decoded-from-text CAN frame; has the can.Message fields the replay uses."""
+    timestamp: float
+    arbitration_id: int
+    data: bytes
+
+
+class ASCTraceReader:
+    """
+    Streams data frames out of a Vector ASC trace without loading it.
+
+    The file is memory-mapped and read line by line; pages already parsed are
+    released as it goes, so memory stays flat whatever the trace size. When
+    `can_ids` is given, the ID is parsed straight from the raw line and
+    frames with other IDs are skipped before anything else is converted.
+
+    Frames come out in chunks of up to `chunk_size` (iter_chunks) or one at a
+    time (iteration). Like can.ASCReader, timestamps are taken as written and
+    the hex/dec base comes from the header; remote, error and CAN FD frames
+    longer than 8 bytes are skipped.
+
+    `start` / `end` restrict reading to the lines that begin in that byte
+    range (see split()); a range that doesn't include the header needs the
+    trace's `base` (see read_base()).
+    """
+    def __init__(self, path, can_ids=None, chunk_size=4096, start=0, end=None, base=None):
+        self.path = path
+        self.can_ids = frozenset(can_ids) if can_ids is not None else None
+        self.chunk_size = chunk_size
+        self.start = start
+        self.end = end
+        self.base = base
+
+    @staticmethod
+    def read_base(path, max_header_lines=100):
+        """Number base (16 or 10) declared by the trace header."""
+        with open(path, 'rb') as f:
+            for _ in range(max_header_lines):
+                parts = f.readline().split()
+                if parts and parts[0].lower() == b'base' and len(parts) > 1:
+                    return 10 if parts[1].lower() == b'dec' else 16
+        return 16
+
+    @staticmethod
+    def split(path, parts):
+        """Cut the file into up to `parts` (start, end) byte ranges on line boundaries."""
+        with open(path, 'rb') as f:
+            size = f.seek(0, 2)
+            bounds = [0]
+            for i in range(1, parts):
+                f.seek(max(size * i // parts, bounds[-1]))
+                f.readline()  # finish the line we landed in
+                bounds.append(min(f.tell(), size))
+            bounds.append(size)
+        return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+    def __iter__(self):
+        for chunk in self.iter_chunks():
+            yield from chunk
+
+    def iter_chunks(self):
+        with open(self.path, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty file
+                return
+            with mm:
+                if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                yield from self._read_chunks(mm)
+
+    @staticmethod
+    def _release(mm, start, end):
+        # Drop already-parsed pages from our mapping so they stop counting
+        # against RSS; the page cache can still keep them. Returns the new start.
+        end -= end % mmap.PAGESIZE
+        if end > start and hasattr(mmap, 'MADV_DONTNEED'):
+            mm.madvise(mmap.MADV_DONTNEED, start, end - start)
+            return end
+        return start
+
+    def _read_chunks(self, mm):
+        can_ids = self.can_ids
+        chunk_size = self.chunk_size
+        base = self.base or 16
+        chunk = []
+        position = self.start
+        end = len(mm) if self.end is None else self.end
+        released = position - position % mmap.PAGESIZE
+        mm.seek(position)
+        lines = 0
+        readline = mm.readline
+        while position < end:
+            line = readline()
+            if not line:
+                break
+            position += len(line)
+            lines += 1
+            if lines % RELEASE_EVERY_LINES == 0:
+                released = self._release(mm, released, position)
+            parts = line.split()
+            if len(parts) < 3:
+                continue
+            channel = parts[1]
+            if channel.isdigit():
+                # <ts> <ch> <id>[x] <Rx|Tx> d <dlc> <data...>
+                if len(parts) < 6 or parts[4] != b'd':
+                    continue
+                id_token = parts[2]
+                data_start = 6
+                length_token = parts[5]
+            elif channel == b'CANFD':
+                # <ts> CANFD <ch> <dir> <id> [symbolic name] <brs> <esi> <dlc> <data length> <data...>
+                if len(parts) < 9 or parts[4].lower() == b'errorframe':
+                    continue
+                id_token = parts[4]
+                data_start = 9 if parts[5].isdigit() else 10
+                length_token = parts[data_start - 1]
+            else:
+                if parts[0].lower() == b'base':
+                    base = 10 if parts[1].lower() == b'dec' else 16
+                continue
+            try:
+                if id_token[-1:] in (b'x', b'X'):
+                    id_token = id_token[:-1]
+                can_id = int(id_token, base)
+                if can_ids is not None and can_id not in can_ids:
+                    continue
+                if channel == b'CANFD':
+                    length = int(length_token)
+                    if length == 0 or length > 8:
+                        continue
+                else:
+                    length = min(int(length_token, base), 8)
+                data = bytes(int(b, base) for b in parts[data_start:data_start + length])
+                timestamp = float(parts[0])
+            except ValueError:
+                continue  # Some other event that happens to look like a frame
+            chunk.append(Frame(timestamp, can_id, data))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
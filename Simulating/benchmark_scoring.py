@@ -0,0 +1,200 @@
+# benchmark_scoring.py
+#
+# Throughput / latency benchmark for DrivingScoreEvaluator.process_can_data.
+#
+#   python Simulating/benchmark_scoring.py --workload scenarios --repeats 20
+#   python Simulating/benchmark_scoring.py --workload csv --hours 4 --output bench.json
+#
+# Results are written as JSON so runs can be compared over time. Dashboard
+# publishing is always stubbed out; the event log goes to a temporary file
+# unless --log-file is given (one file per workload, named <stem>-<workload><ext>),
+# and its level can be switched with --log-level.
+# Peak RSS is process-wide, so run one workload per invocation when comparing memory.
+
+import argparse
+import dataclasses
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from scoring.CANDataPackage import CANDataPackage
+from scoring.DrivingScoreEvaluator import DrivingScoreEvaluator
+from scoring.TripScorer import TRIP_COLUMNS, load_trip_csv
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_CSV = BASE_DIR / 'scoring' / 'driving_simulation_data.csv'
+
+
+def scenario_packets(repeats, seed):
+    """DrivingScenarioSimulator scenarios, back to back, `repeats` times."""
+    from simulate_real_data import create_test_scenarios
+
+    random.seed(seed)
+    offset = 0.0
+    for _ in range(repeats):
+        end = offset
+        for _, packets in create_test_scenarios():
+            for packet in packets:
+                end = packet.timestamp + offset
+                yield dataclasses.replace(packet, timestamp=end)
+        offset = end + 0.05
+
+
+def csv_packets(csv_path, hours):
+    """The recorded CSV trip, tiled end to end until it covers `hours` of driving."""
+    arrays = load_trip_csv(csv_path)
+    timestamps = arrays['timestamp']
+    signal_names = TRIP_COLUMNS[1:]
+    columns = [arrays[name].tolist() for name in signal_names]
+    step = float(np.median(np.diff(timestamps))) if len(timestamps) > 1 else 0.1
+    trip_length = float(timestamps[-1] - timestamps[0]) + step
+
+    target = hours * 3600.0
+    offset = 0.0
+    while offset < target:
+        for i, ts in enumerate(timestamps.tolist()):
+            current = ts - timestamps[0] + offset
+            if current > target:
+                return
+            yield CANDataPackage(current, **{name: column[i] for name, column in zip(signal_names, columns)})
+        offset += trip_length
+
+
+def latency_summary(samples_ns):
+    if not samples_ns:
+        return {'count': 0}
+    values = np.asarray(samples_ns, dtype=np.float64) / 1000.0  # microseconds
+    return {
+        'count': int(len(values)),
+        'mean_us': float(values.mean()),
+        'p50_us': float(np.percentile(values, 50)),
+        'p99_us': float(np.percentile(values, 99)),
+        'max_us': float(values.max()),
+    }
+
+
+def peak_rss_kb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+def run_benchmark(name, packets, config, log_file):
+    evaluator = DrivingScoreEvaluator(config=config, log_file_path=log_file)
+    evaluator._send_event = lambda safety_score, eco_score, feedback: None
+
+    latencies = {'eco_tick': [], 'safety_tick': [], 'plain': []}
+    rss_before = peak_rss_kb()
+    first_ts = last_ts = None
+    clock = time.perf_counter_ns
+    wall_start = clock()
+
+    for packet in packets:
+        start = clock()
+        eco_score, safety_score = evaluator.process_can_data(packet)
+        elapsed = clock() - start
+
+        # A call that ran the eco calculation is an eco tick even if safety ran too
+        if eco_score is not None:
+            latencies['eco_tick'].append(elapsed)
+        elif safety_score is not None:
+            latencies['safety_tick'].append(elapsed)
+        else:
+            latencies['plain'].append(elapsed)
+        if first_ts is None:
+            first_ts = packet.timestamp
+        last_ts = packet.timestamp
+
+    wall_ns = clock() - wall_start
+    evaluator.close_log()
+
+    all_latencies = latencies['eco_tick'] + latencies['safety_tick'] + latencies['plain']
+    total_calls = len(all_latencies)
+    scoring_sec = sum(all_latencies) / 1e9
+    return {
+        'name': name,
+        'packets': total_calls,
+        'simulated_sec': (last_ts - first_ts) if total_calls else 0.0,
+        'wall_sec': wall_ns / 1e9,
+        'scoring_sec': scoring_sec,
+        'packets_per_sec': total_calls / scoring_sec if scoring_sec > 0 else None,
+        'latency': {
+            'all': latency_summary(all_latencies),
+            'eco_tick': latency_summary(latencies['eco_tick']),
+            'safety_tick': latency_summary(latencies['safety_tick']),
+            'plain': latency_summary(latencies['plain']),
+        },
+        'peak_rss_kb_before': rss_before,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def print_result(result):
+    print(f"\n== {result['name']} ==")
+    print(f"Packets: {result['packets']} ({result['simulated_sec']:.0f}s simulated) in {result['wall_sec']:.2f}s wall")
+    if result['packets_per_sec']:
+        print(f"Throughput: {result['packets_per_sec']:.0f} packets/s")
+    for kind, summary in result['latency'].items():
+        if summary['count']:
+            print(f"  {kind:<12} n={summary['count']:<8} p50={summary['p50_us']:.1f}us "
+                  f"p99={summary['p99_us']:.1f}us max={summary['max_us']:.1f}us")
+    print(f"Peak RSS: {result['peak_rss_kb'] / 1024:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DrivingScoreEvaluator.process_can_data")
+    parser.add_argument('--workload', choices=['scenarios', 'csv', 'all'], default='all')
+    parser.add_argument('--repeats', type=int, default=10, help="Times to replay the simulator scenarios")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--csv', default=str(DEFAULT_CSV), help="Trip CSV to tile into a long drive")
+    parser.add_argument('--hours', type=float, default=1.0, help="Length of the tiled CSV trip")
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING'])
+    parser.add_argument('--log-format', default='jsonl', choices=['jsonl', 'text', 'binary'])
+    parser.add_argument('--log-file', default=None,
+                        help="Keep the event logs here instead of a temp file (as <stem>-<workload><ext>)")
+    parser.add_argument('--config', default=None, help="JSON object of evaluator config overrides")
+    parser.add_argument('--output', default=None, help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    config = json.loads(args.config) if args.config else {}
+    config.update({'LOG_LEVEL': args.log_level, 'LOG_FORMAT': args.log_format})
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # One log per workload, so '--workload all' doesn't overwrite the first one
+        stem, ext = os.path.splitext(args.log_file or os.path.join(tmp_dir, 'benchmark_events.log'))
+        if args.workload in ('scenarios', 'all'):
+            results.append(run_benchmark(f"scenarios x{args.repeats}", scenario_packets(args.repeats, args.seed),
+                                         config, f"{stem}-scenarios{ext}"))
+            print_result(results[-1])
+        if args.workload in ('csv', 'all'):
+            results.append(run_benchmark(f"csv {args.hours:g}h", csv_packets(args.csv, args.hours),
+                                         config, f"{stem}-csv{ext}"))
+            print_result(results[-1])
+
+    report = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'args': vars(args),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
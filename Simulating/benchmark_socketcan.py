@@ -0,0 +1,158 @@
+# benchmark_socketcan.py
+#
+# Receive throughput on a SocketCAN interface: python-can's bus.recv() (one
+# system call and one can.Message per frame) against SocketCANReader's
+# recvmmsg batches.
+#
+#   sudo modprobe vcan && sudo ip link add dev vcan0 type vcan && sudo ip link set up vcan0
+#   python Simulating/benchmark_socketcan.py --channel vcan0 --seconds 5
+#   python Simulating/benchmark_socketcan.py --decode --batch-size 512 --output socketcan.json
+#
+# For each reader a sender process floods the interface with the monitored
+# frames for --seconds while the reader counts (and with --decode, decodes)
+# what it gets. Frames the reader can't keep up with are dropped by the kernel,
+# so 'lost' shows how far each reader is from the offered load.
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import struct
+import time
+
+from FrameDecoder import MONITORED_FRAME_IDS, FrameDecoder
+from SocketCANReader import SocketCANReader
+
+DBC_FILE = 'data/BOSCH_CAN.dbc'
+
+
+def flood(channel, seconds, sent_count, started):
+    """Sender process: write 8-byte frames of the monitored IDs as fast as the interface takes them."""
+    sock = socket.socket(socket.AF_CAN, socket.SOCK_RAW, socket.CAN_RAW)
+    sock.bind((channel,))
+    frames = [struct.pack('=IB3x8s', frame_id, 8, os.urandom(8)) for frame_id in MONITORED_FRAME_IDS * 20]
+    sent = 0
+    started.set()
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        for frame in frames:
+            try:
+                sock.send(frame)
+                sent += 1
+            except OSError:  # ENOBUFS: the tx queue is full, let it drain
+                time.sleep(0.0001)
+    sent_count.value = sent
+    sock.close()
+
+
+def receive_python_can(channel, seconds, decoder, start_sender):
+    import can
+
+    bus = can.interface.Bus(channel=channel, interface='socketcan')
+    bus.set_filters([{"can_id": frame_id, "can_mask": 0x7FF} for frame_id in MONITORED_FRAME_IDS])
+    received = 0
+    try:
+        start_sender()
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            msg = bus.recv(timeout=0.1)
+            if msg is None:
+                continue
+            received += 1
+            if decoder is not None:
+                decoder.decode(msg.arbitration_id, msg.data)
+    finally:
+        bus.shutdown()
+    return received
+
+
+def receive_recvmmsg(channel, seconds, decoder, batch_size, start_sender):
+    received = 0
+    with SocketCANReader(channel, MONITORED_FRAME_IDS, batch_size=batch_size) as reader:
+        start_sender()
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            batch = reader.read(timeout=0.1)
+            received += len(batch)
+            if decoder is not None:
+                for frame in batch.frames():
+                    decoder.decode(frame.arbitration_id, frame.data)
+    return received
+
+
+def run_benchmark(name, receive, channel, seconds):
+    sent_count = multiprocessing.Value('q', 0)
+    started = multiprocessing.Event()
+    sender = multiprocessing.Process(target=flood, args=(channel, seconds, sent_count, started))
+
+    def start_sender():
+        # Called once the reader's socket is bound, so every frame sent can be received
+        sender.start()
+        started.wait()
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    received = receive(seconds, start_sender)
+    wall_sec = time.perf_counter() - wall_start
+    cpu_sec = time.process_time() - cpu_start
+    sender.join()
+    return {
+        'name': name,
+        'sent': sent_count.value,
+        'received': received,
+        'lost': max(sent_count.value - received, 0),
+        'wall_sec': wall_sec,
+        'cpu_sec': cpu_sec,
+        'frames_per_sec': received / wall_sec if wall_sec > 0 else None,
+        'cpu_us_per_frame': cpu_sec / received * 1e6 if received else None,
+    }
+
+
+def print_result(result):
+    print(f"\n== {result['name']} ==")
+    print(f"Received {result['received']} of {result['sent']} frames ({result['lost']} lost) "
+          f"in {result['wall_sec']:.2f}s")
+    if result['received']:
+        print(f"Throughput: {result['frames_per_sec']:.0f} frames/s, {result['cpu_us_per_frame']:.2f} us CPU/frame")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare bus.recv() and recvmmsg receive throughput")
+    parser.add_argument('--channel', default='vcan0')
+    parser.add_argument('--seconds', type=float, default=5.0, help="Flood duration per reader")
+    parser.add_argument('--batch-size', type=int, default=256, help="Frames per recvmmsg call")
+    parser.add_argument('--reader', choices=['recv', 'recvmmsg', 'all'], default='all')
+    parser.add_argument('--decode', action='store_true', help="Decode every frame with FrameDecoder too")
+    parser.add_argument('--output', default=None, help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    decoder = FrameDecoder(DBC_FILE) if args.decode else None
+    results = []
+    if args.reader in ('recv', 'all'):
+        results.append(run_benchmark('python-can bus.recv', lambda seconds, start_sender: receive_python_can(
+            args.channel, seconds, decoder, start_sender), args.channel, args.seconds))
+        print_result(results[-1])
+    if args.reader in ('recvmmsg', 'all'):
+        results.append(run_benchmark(f"recvmmsg x{args.batch_size}", lambda seconds, start_sender: receive_recvmmsg(
+            args.channel, seconds, decoder, args.batch_size, start_sender), args.channel, args.seconds))
+        print_result(results[-1])
+
+    report = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': vars(args),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# check_startup.py
+#
+# Import-time profile and budget check for the headless detector (detector.py).
+#
+#   python Simulating/check_startup.py                  report, fail if over budget
+#   python Simulating/check_startup.py --budget-ms 250 --top 25
+#   python Simulating/check_startup.py --module Simulator
+#
+# `import <module>` runs in a fresh interpreter under `python -X importtime`;
+# the best of --runs runs is kept to smooth out noise. The report lists the
+# modules with the largest cumulative and self import times. The exit status
+# is 1 if the import took longer than the budget or pulled in a module the
+# headless path must not load (plotting, HTTP, pandas, python-can, cantools).
+# tests/test_startup.py enforces the same budget in the test suite; this
+# script is for finding out where the time went.
+
+import argparse
+import os
+import subprocess
+import sys
+
+SIMULATING_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STARTUP_BUDGET_MS = 200.0
+# Only loaded when actually used: --plot, the first published event, a live bus, a cantools fallback
+LAZY_MODULES = ('matplotlib', 'pandas', 'requests', 'can', 'cantools')
+
+
+def profile_import(module):
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+
+    Returns (entries, loaded): entries are (self_us, cumulative_us, depth, name)
+    in the order importtime prints them; loaded is the set of top-level
+    packages in sys.modules afterwards.
+    """
+    code = (f"import sys; sys.path.insert(0, {SIMULATING_DIR!r}); import {module}; "
+            "print('\\n'.join(sorted({name.partition('.')[0] for name in sys.modules})))")
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, cwd=SIMULATING_DIR)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The header line
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((int(fields[0]), int(fields[1]), depth, name.strip()))
+    return entries, set(result.stdout.split())
+
+
+def import_ms(entries, module):
+    """Cumulative import time of `module` itself, in ms."""
+    for self_us, cumulative_us, depth, name in entries:
+        if name == module:
+            return cumulative_us / 1000.0
+    return 0.0
+
+
+def print_report(entries, module, total_ms, top):
+    print(f"import {module}: {total_ms:.1f} ms")
+    print(f"\nTop {top} by cumulative time:")
+    print(f"{'cumul ms':>9} {'self ms':>8}  module")
+    for self_us, cumulative_us, depth, name in sorted(entries, key=lambda e: -e[1])[:top]:
+        print(f"{cumulative_us / 1000:9.1f} {self_us / 1000:8.1f}  {'  ' * depth}{name}")
+    print(f"\nTop {top} by self time:")
+    for self_us, cumulative_us, depth, name in sorted(entries, key=lambda e: -e[0])[:top]:
+        print(f"{self_us / 1000:9.1f}  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile and budget for the headless detector")
+    parser.add_argument('--module', default='detector', help="Module to import (default: detector)")
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS,
+                        help=f"Fail above this import time (default: {STARTUP_BUDGET_MS:.0f} ms)")
+    parser.add_argument('--runs', type=int, default=3, help="Keep the fastest of this many imports")
+    parser.add_argument('--top', type=int, default=15, help="Modules to list in the report")
+    args = parser.parse_args()
+
+    best = None
+    for _ in range(max(args.runs, 1)):
+        entries, loaded = profile_import(args.module)
+        total_ms = import_ms(entries, args.module)
+        if best is None or total_ms < best[0]:
+            best = (total_ms, entries, loaded)
+    total_ms, entries, loaded = best
+
+    print_report(entries, args.module, total_ms, args.top)
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"import {args.module} took {total_ms:.1f} ms, budget is {args.budget_ms:.1f} ms")
+    eager = sorted(name for name in LAZY_MODULES if name in loaded)
+    if eager:
+        failures.append(f"import {args.module} loaded {', '.join(eager)}, which should only load when used")
+
+    print()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print(f"OK: {total_ms:.1f} ms of {args.budget_ms:.1f} ms budget")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
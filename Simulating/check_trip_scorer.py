@@ -0,0 +1,133 @@
+# check_trip_scorer.py
+#
+# Parity check of the offline trip scorer (scoring/TripScorer.py) against the
+# streaming DrivingScoreEvaluator on a long trip.
+#
+#   python Simulating/check_trip_scorer.py                  3 h synthetic trip
+#   python Simulating/check_trip_scorer.py --hours 6 --seed 7
+#   python Simulating/check_trip_scorer.py --csv scoring/driving_simulation_data.csv --hours 2
+#
+# The synthetic trip has noisy torque and pedal for its first half and holds
+# them constant for the second, the case where whole-trip running sums lose
+# the variance of the later windows. With --csv the recorded trip is tiled end
+# to end instead. Every packet goes through process_can_data (publishing
+# stubbed out), then the same columns through score_trip(); the tick
+# timestamps must match and every score must agree within --tolerance.
+# The exit status is 1 otherwise, so it can gate CI the way a test would.
+
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from scoring.CANDataPackage import CANDataPackage
+from scoring.DrivingScoreEvaluator import DrivingScoreEvaluator
+from scoring.TripScorer import TRIP_COLUMNS, score_trip
+
+TOLERANCE = 1e-6  # Score points, as promised by TripScorer
+
+
+def synthetic_trip(hours, seed, step=0.05):
+    """Column arrays: noisy torque/pedal for the first half of the trip, constant for the second."""
+    rng = np.random.default_rng(seed)
+    count = int(hours * 3600 / step)
+    timestamps = np.cumsum(rng.choice([step * 0.4, step, step * 1.6], count))
+    noisy = np.arange(count) < count // 2
+    return {
+        'timestamp': timestamps,
+        'ENG_DRIVER_REQ_TRQ_13C': np.where(noisy, 5000 * rng.standard_normal(count), 120.0),
+        'ENG_SMART_ACCELE_PEDAL_POS_13C': np.where(noisy, rng.uniform(0, 100, count), 20.0),
+        'VSA_ABS_FL_WHEEL_SPEED': np.maximum(0, 50 + 60 * np.sin(timestamps / 90)),
+        'ENG_ENG_SPEED': 1800 + 900 * np.sin(timestamps / 20),
+        'CVT_GEAR_POSITION_IND_CVT': (timestamps // 7 % 5).astype(int),
+        'ENG_IS_PROGRESS': (timestamps % 40) < 3,
+        'VSA_LON_G': 6 * np.sin(timestamps / 3),
+        'VSA_LAT_G': 5 * np.cos(timestamps / 4),
+        'VSA_YAW_1': 40 * np.sin(timestamps / 5),
+        'STR_ANGLE': np.where(timestamps % 60 < 5, rng.uniform(-60, 60, count), 10 * np.sin(timestamps)),
+        'VSA_VSA_TCS_ACT': rng.random(count) < 1e-3,
+        'VSA_ABS_EBD_ACT': rng.random(count) < 1e-3,
+    }
+
+
+def csv_trip(csv_path, hours):
+    """The recorded CSV trip tiled to `hours`, as column arrays."""
+    from benchmark_scoring import csv_packets
+
+    columns = {name: [] for name in TRIP_COLUMNS}
+    for packet in csv_packets(csv_path, hours):
+        for name in TRIP_COLUMNS:
+            columns[name].append(getattr(packet, name))
+    return {name: np.asarray(values, dtype=object if name == 'CVT_GEAR_POSITION_IND_CVT' else None)
+            for name, values in columns.items()}
+
+
+def stream_scores(arrays, log_file):
+    """(eco_timestamps, eco_scores, safety_timestamps, safety_scores) from process_can_data."""
+    evaluator = DrivingScoreEvaluator(log_file_path=log_file)
+    evaluator._send_event = lambda safety_score, eco_score, feedback: None
+    eco_ts, eco, safety_ts, safety = [], [], [], []
+    signal_names = TRIP_COLUMNS[1:]
+    columns = [arrays[name].tolist() for name in TRIP_COLUMNS]
+    try:
+        for timestamp, *values in zip(*columns):
+            eco_score, safety_score = evaluator.process_can_data(
+                CANDataPackage(timestamp, **dict(zip(signal_names, values))))
+            if eco_score is not None:
+                eco_ts.append(timestamp)
+                eco.append(eco_score)
+            if safety_score is not None:
+                safety_ts.append(timestamp)
+                safety.append(safety_score)
+    finally:
+        evaluator.close_log()
+    return np.asarray(eco_ts), np.asarray(eco), np.asarray(safety_ts), np.asarray(safety)
+
+
+def compare(name, streamed_ts, streamed, offline_ts, offline, tolerance):
+    """Print the largest difference; return a failure message or None."""
+    if not np.array_equal(streamed_ts, offline_ts):
+        return f"{name}: {len(offline_ts)} offline ticks do not line up with {len(streamed_ts)} streamed ones"
+    diff = np.abs(offline - streamed)
+    worst = int(np.argmax(diff)) if len(diff) else 0
+    over = int(np.count_nonzero(diff > tolerance))
+    print(f"{name:7s} ticks={len(diff):<7d} max diff={diff.max() if len(diff) else 0.0:.3g} "
+          f"(at t={offline_ts[worst] if len(diff) else 0.0:.2f}s)  over tolerance: {over}")
+    if over:
+        return f"{name}: {over} of {len(diff)} ticks differ by more than {tolerance:g}"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check TripScorer against the streaming evaluator on a long trip")
+    parser.add_argument('--hours', type=float, default=3.0, help="Trip length")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic trip")
+    parser.add_argument('--csv', default=None, help="Tile this recorded trip CSV instead of the synthetic trip")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="Largest allowed score difference")
+    args = parser.parse_args()
+
+    arrays = csv_trip(args.csv, args.hours) if args.csv else synthetic_trip(args.hours, args.seed)
+    print(f"Trip: {len(arrays['timestamp'])} samples, {args.hours:g} h "
+          f"({'tiled ' + os.path.basename(args.csv) if args.csv else f'synthetic, seed {args.seed}'})")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        eco_ts, eco, safety_ts, safety = stream_scores(arrays, os.path.join(tmp_dir, 'check_events.log'))
+    result = score_trip(arrays)
+
+    failures = [failure for failure in (
+        compare('eco', eco_ts, eco, result['eco_timestamps'], result['eco_scores'], args.tolerance),
+        compare('safety', safety_ts, safety, result['safety_timestamps'], result['safety_scores'], args.tolerance),
+    ) if failure]
+
+    print()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print(f"OK: every score within {args.tolerance:g}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
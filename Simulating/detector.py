@@ -0,0 +1,60 @@
+# Headless entry point of the driving behaviour detector.
+#
+#   python Simulating/detector.py            listen on the live bus (vcan0)
+#   python Simulating/detector.py --local    replay data/CANWIN.asc instead
+#   python Simulating/detector.py --local --trace-cache
+#                                            ... through its binary cache (built on the first run)
+#   python Simulating/detector.py --plot     ... and plot the scores at the end
+#
+# Importing this module only loads what scoring needs (numpy, the evaluator,
+# the frame decoder). python-can is imported when the bus is opened, cantools
+# only if a frame has to fall back to it (the DBC layouts are cached), requests
+# once the first event is published and matplotlib only with --plot.
+# check_startup.py holds the import to a time budget.
+import argparse
+
+from FramePipeline import OVERLOAD_POLICIES
+from Simulator import IDLE_TIMEOUT, PIPELINE_QUEUE_SIZE, RECV_BATCH_SIZE, RECV_MAX_DELAY, RING_SIZE, Simulator
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score driving behaviour from CAN frames, without a GUI")
+    parser.add_argument('--local', action='store_true', help="Replay the ASC log instead of the live bus")
+    parser.add_argument('--trace-cache', action='store_true',
+                        help="With --local: replay through the indexed binary copy of the log, built on first use")
+    parser.add_argument('--plot', action='store_true', help="Plot the scores when the run ends")
+    parser.add_argument('--recvmmsg', action='store_true',
+                        help="Linux: read the bus in recvmmsg batches instead of through python-can")
+    parser.add_argument('--batch-size', type=int, default=RECV_BATCH_SIZE, help="Most frames scored per wake-up")
+    parser.add_argument('--max-delay', type=float, default=RECV_MAX_DELAY,
+                        help="Longest a received frame waits for its batch to fill (s)")
+    parser.add_argument('--idle-timeout', type=float, default=IDLE_TIMEOUT,
+                        help="Stop after this long without any frames (s)")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Receive on a separate thread, through a bounded queue, from decoding and scoring")
+    parser.add_argument('--queue-size', type=int, default=PIPELINE_QUEUE_SIZE, help="Pipeline queue capacity (frames)")
+    parser.add_argument('--overload', choices=OVERLOAD_POLICIES, default='block',
+                        help="What the pipeline does when the queue is full")
+    parser.add_argument('--stats-interval', type=float, default=None,
+                        help="Print the pipeline gauges every this many seconds")
+    parser.add_argument('--processes', action='store_true',
+                        help="Capture in a separate process, through a shared-memory ring, from scoring")
+    parser.add_argument('--ring-size', type=int, default=RING_SIZE, help="Shared ring capacity (frames)")
+    args = parser.parse_args(argv)
+
+    simulator = Simulator()
+    if args.local:
+        simulator.run_simulation_local(use_cache=args.trace_cache)
+    elif args.processes:
+        simulator.run_simulation_multiprocess(args.ring_size, args.batch_size, args.idle_timeout, bulk=args.recvmmsg)
+    elif args.pipeline:
+        simulator.run_simulation_pipelined(args.queue_size, args.overload, args.batch_size, args.idle_timeout,
+                                           bulk=args.recvmmsg, stats_interval=args.stats_interval)
+    else:
+        simulator.run_simulation(args.batch_size, args.max_delay, args.idle_timeout, bulk=args.recvmmsg)
+    if args.plot:
+        simulator.plot_results()
+
+
+if __name__ == "__main__":
+    main()
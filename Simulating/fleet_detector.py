@@ -0,0 +1,242 @@
+# fleet_detector.py
+#
+# Score many vehicles at once, each with its own CANDataAdapter and
+# DrivingScoreEvaluator, sharded across worker processes.
+#
+#   python Simulating/fleet_detector.py --channels vcan0 vcan1 vcan2 vcan3 --workers 2
+#   python Simulating/fleet_detector.py --channels vcan0 --vehicles 16 --id-stride 0x800 --workers 4
+#   python Simulating/fleet_detector.py --replay data/CANWIN.asc --vehicles 24 --workers 4 --output fleet.json
+#
+# A vehicle is either a whole interface (one per --channels entry) or, with
+# --vehicles N, one of N ID namespaces on each interface: vehicle k sends the
+# monitored frames at ID + k * --id-stride (above 0x7FF as extended frames).
+# Every worker process opens its own sockets with kernel filters for just its
+# vehicles' IDs, so vehicles on the same bus still spread over cores.
+# --replay feeds every vehicle the frames of a trace instead of a bus, as fast
+# as they can be scored, to measure throughput and scaling without vcan.
+#
+# Each vehicle's event log goes to --log-dir/<vehicle>.jsonl. Dashboard
+# publishing is off unless --publish is given (the dashboard shows one car).
+
+import argparse
+import json
+import os
+import select
+import time
+from typing import NamedTuple
+
+from CANDataAdapter import CANDataAdapter
+from FrameDecoder import FrameDecoder
+from scoring.DrivingScoreEvaluator import DrivingScoreEvaluator, LOG_FILE_EXTENSIONS
+
+DBC_FILE = 'data/BOSCH_CAN.dbc'
+LOG_DIR = 'fleet_logs'
+BATCH_SIZE = 256
+IDLE_TIMEOUT = 10.0
+
+
+class VehicleSpec(NamedTuple):
+    name: str
+    channel: str  # None when replaying a trace
+    id_offset: int
+
+
+def fleet_specs(channels, vehicles=None, id_stride=0x800, replay=False):
+    """One vehicle per channel, or `vehicles` ID namespaces per channel (or trace replay)."""
+    if replay:
+        return [VehicleSpec(f"replay-{k}", None, 0) for k in range(vehicles or 1)]
+    if vehicles is None:
+        return [VehicleSpec(channel, channel, 0) for channel in channels]
+    return [VehicleSpec(f"{channel}-{k}", channel, k * id_stride) for channel in channels for k in range(vehicles)]
+
+
+def shard(specs, workers):
+    """Round-robin the vehicles over at most `workers` shards."""
+    shards = [specs[i::workers] for i in range(min(workers, len(specs)))]
+    return [s for s in shards if s]
+
+
+class VehicleScorer:
+    """One vehicle's adapter, evaluator and counters inside a worker."""
+    def __init__(self, spec, log_dir, publish, log_format='jsonl'):
+        self.spec = spec
+        self.adapter = CANDataAdapter()
+        log_path = os.path.join(log_dir, spec.name + LOG_FILE_EXTENSIONS.get(log_format, '.log'))
+        self.evaluator = DrivingScoreEvaluator(config={'LOG_FORMAT': log_format}, log_file_path=log_path)
+        if not publish:
+            self.evaluator._send_event = lambda safety_score, eco_score, feedback: None
+        self.stats = {'frames': 0, 'failures': 0, 'eco_scores': 0, 'safety_scores': 0,
+                      'eco_score': None, 'safety_score': None, 'busy_sec': 0.0}
+
+    def score(self, decoder, frame_id, timestamp, data):
+        stats = self.stats
+        start = time.perf_counter()
+        try:
+            decoded_data = decoder.decode(frame_id, data)
+        except Exception:
+            stats['failures'] += 1
+            return
+        self.adapter.msg_to_package(timestamp, decoded_data)
+        eco_score, safety_score = self.evaluator.process_can_data(self.adapter.get_data_package())
+        if eco_score is not None:
+            stats['eco_scores'] += 1
+            stats['eco_score'] = eco_score
+        if safety_score is not None:
+            stats['safety_scores'] += 1
+            stats['safety_score'] = safety_score
+        stats['frames'] += 1
+        stats['busy_sec'] += time.perf_counter() - start
+
+    def close(self):
+        self.evaluator.close_log()
+        return dict(self.stats, name=self.spec.name, channel=self.spec.channel, id_offset=self.spec.id_offset)
+
+
+def _open_source(channel, wire_ids, bulk, batch_size):
+    """(fileno, read, close) for one interface, filtered to `wire_ids`."""
+    if bulk:
+        from SocketCANReader import SocketCANReader
+
+        reader = SocketCANReader(channel, wire_ids, batch_size=batch_size)
+        return reader.fileno(), lambda: reader.read(0).frames(), reader.close
+
+    import can
+    from FramePipeline import recv_available
+
+    bus = can.interface.Bus(channel=channel, bustype='socketcan')
+    bus.set_filters([{"can_id": wire_id, "can_mask": 0x1FFFFFFF if wire_id > 0x7FF else 0x7FF,
+                      "extended": wire_id > 0x7FF} for wire_id in wire_ids])
+    return bus.fileno(), lambda: recv_available(bus, 0, batch_size), bus.shutdown
+
+
+def _score_bus(scorers, decoder, bulk, batch_size, idle_timeout):
+    # (channel, wire ID) -> (vehicle, DBC frame ID)
+    routes = {}
+    for scorer in scorers:
+        for frame_id in decoder.frame_ids:
+            routes.setdefault(scorer.spec.channel, {})[frame_id + scorer.spec.id_offset] = (scorer, frame_id)
+
+    sources = {}
+    try:
+        for channel, channel_routes in routes.items():
+            fileno, read, close = _open_source(channel, sorted(channel_routes), bulk, batch_size)
+            sources[fileno] = (read, close, channel_routes)
+        while True:
+            ready, _, _ = select.select(list(sources), [], [], idle_timeout)
+            if not ready:
+                break
+            for fileno in ready:
+                read, _, channel_routes = sources[fileno]
+                for frame in read():
+                    route = channel_routes.get(frame.arbitration_id)
+                    if route is not None:
+                        route[0].score(decoder, route[1], frame.timestamp, frame.data)
+    finally:
+        for _, close, _ in sources.values():
+            close()
+
+
+def _score_replay(scorers, decoder, trace_path):
+    from TraceCache import TraceCache
+
+    for frame in TraceCache().load(trace_path).frames(can_ids=decoder.frame_ids):
+        for scorer in scorers:
+            scorer.score(decoder, frame.arbitration_id, frame.timestamp, frame.data)
+
+
+def run_worker(specs, options, cpu=None):
+    """
+    Worker process: score `specs` until their buses go idle (or the replay
+    ends). Returns (per-vehicle stats, wall seconds).
+    """
+    from SharedFrameRing import pin_to_cpu
+
+    pin_to_cpu(cpu)
+    os.makedirs(options['log_dir'], exist_ok=True)
+    decoder = FrameDecoder(DBC_FILE, signals=CANDataAdapter.SIGNALS)
+    scorers = [VehicleScorer(spec, options['log_dir'], options['publish']) for spec in specs]
+    start = time.perf_counter()
+    try:
+        if options['replay']:
+            _score_replay(scorers, decoder, options['replay'])
+        else:
+            _score_bus(scorers, decoder, options['bulk'], options['batch_size'], options['idle_timeout'])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        wall_sec = time.perf_counter() - start
+        results = [scorer.close() for scorer in scorers]
+    for result in results:
+        result['frames_per_sec'] = result['frames'] / result['busy_sec'] if result['busy_sec'] else None
+        result['worker_pid'] = os.getpid()
+    return results, wall_sec
+
+
+def run_fleet(specs, workers, options):
+    """Shard `specs` over `workers` processes; returns (per-vehicle stats, wall seconds)."""
+    import multiprocessing
+
+    if options['replay']:
+        # Build the trace cache once, before the workers race for it
+        from TraceCache import TraceCache
+        TraceCache().load(options['replay'])
+
+    shards = shard(specs, workers)
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else []
+    tasks = [(s, options, cpus[i % len(cpus)] if len(cpus) > 1 else None) for i, s in enumerate(shards)]
+    start = time.perf_counter()
+    context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else multiprocessing
+    with context.Pool(len(shards)) as pool:
+        parts = pool.starmap(run_worker, tasks, chunksize=1)
+    wall_sec = time.perf_counter() - start
+    order = {spec.name: i for i, spec in enumerate(specs)}
+    vehicles = sorted((vehicle for results, _ in parts for vehicle in results), key=lambda v: order[v['name']])
+    return vehicles, wall_sec
+
+
+def print_report(vehicles, wall_sec, workers):
+    print(f"\n{'vehicle':<16} {'frames':>9} {'frames/s':>10} {'eco':>6} {'safety':>7} {'fail':>5}  pid")
+    for v in vehicles:
+        rate = f"{v['frames_per_sec']:.0f}" if v['frames_per_sec'] else '-'
+        eco = f"{v['eco_score']:.1f}" if v['eco_score'] is not None else '-'
+        safety = f"{v['safety_score']:.1f}" if v['safety_score'] is not None else '-'
+        print(f"{v['name']:<16} {v['frames']:>9} {rate:>10} {eco:>6} {safety:>7} {v['failures']:>5}  {v['worker_pid']}")
+    total = sum(v['frames'] for v in vehicles)
+    print(f"\n{len(vehicles)} vehicles on {workers} workers: {total} frames in {wall_sec:.2f}s "
+          f"({total / wall_sec if wall_sec else 0:.0f} frames/s overall)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score many vehicles across interfaces and worker processes")
+    parser.add_argument('--channels', nargs='+', default=['vcan0'], help="SocketCAN interfaces to listen on")
+    parser.add_argument('--vehicles', type=int, default=None,
+                        help="Vehicles per interface as ID namespaces (or replayed vehicles with --replay)")
+    parser.add_argument('--id-stride', type=lambda v: int(v, 0), default=0x800,
+                        help="ID offset between namespaced vehicles (default: 0x800)")
+    parser.add_argument('--replay', default=None, help="Feed every vehicle this ASC trace instead of a bus")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--recvmmsg', action='store_true', help="Read the buses in recvmmsg batches")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--idle-timeout', type=float, default=IDLE_TIMEOUT,
+                        help="A worker stops after this long without frames on any of its buses (s)")
+    parser.add_argument('--log-dir', default=LOG_DIR, help="Per-vehicle event logs go here")
+    parser.add_argument('--publish', action='store_true', help="Post every vehicle's events to the dashboard")
+    parser.add_argument('--output', default=None, help="Write per-vehicle results as JSON to this file")
+    args = parser.parse_args()
+
+    specs = fleet_specs(args.channels, args.vehicles, args.id_stride, replay=args.replay is not None)
+    options = {'bulk': args.recvmmsg, 'batch_size': args.batch_size, 'idle_timeout': args.idle_timeout,
+               'log_dir': args.log_dir, 'publish': args.publish, 'replay': args.replay}
+    workers = min(args.workers, len(specs))
+    print(f"Scoring {len(specs)} vehicles on {workers} workers...")
+    vehicles, wall_sec = run_fleet(specs, workers, options)
+    print_report(vehicles, wall_sec, workers)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'workers': workers, 'wall_sec': wall_sec, 'vehicles': vehicles}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
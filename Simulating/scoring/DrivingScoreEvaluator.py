@@ -1,91 +1,142 @@
-import math
 import time # For simulation of timestamps
-from scoring.CircularBuffer import CircularBuffer
+import numpy as np
+from scoring.SignalWindow import SignalWindow
+from scoring.EventPublisher import EventPublisher
+from scoring.EventLogger import EventLogger, DEBUG, INFO
+from scoring.RollingStats import IdleStats, OscillationStats, RateStats, RpmStats, ValueStats
+
+# --- Configuration (Tunable Parameters) ---
+DEFAULT_CONFIG = {
+    # Window Durations (seconds)
+    'ECO_WINDOW_DURATION_SEC': 60,
+    'SAFETY_WINDOW_DURATION_SEC': 10,
+    'EVENT_CHECK_HISTORY_SEC': 1, # For rate-of-change/duration checks
+
+    # Calculation Intervals (seconds)
+    'ECO_CALC_INTERVAL_SEC': 2.0,
+    'SAFETY_CALC_INTERVAL_SEC': 0.5,
+
+    # Eco-Friendly Thresholds & Weights
+    'MIN_SPEED_FOR_RPM_RATIO_CALC': 5.0, # km/h
+    'HIGH_RPM_THRESHOLD': 2500, # rpm
+    'MIN_DRIVING_SPEED_FOR_IDLE': 0.5, # km/h
+    'MIN_IDLE_RPM_THRESHOLD': 300, # rpm
+    'AGGRESSIVE_ACCEL_DECEL_THRESHOLD_KMPHPS': 5.0, # km/h/s
+    'GEAR_CHANGE_THRESHOLD': 3,
+
+    'k1_accel_jt': 0.01,  'k2_accel_jp': 0.05,  'k3_accel_vs': 0.001, 'k4_accel_eagg': 0.5,
+    'w1_accel': 0.25, 'w2_accel': 0.25, 'w3_accel': 0.25, 'w4_accel': 0.25,
+    
+    'k5_rpm_ratio': 0.001, 'k6_rpm_high': 0.1,
+    'w5_rpm': 0.7, 'w6_rpm': 0.3,
+
+    'k7_idle_time': 0.2, 'k8_idle_is': 1.0,
+    'w7_idle': 0.9, 'w8_idle': 0.1,
+
+    'W_accel_overall': 0.4, 'W_rpm_overall': 0.2, 'W_idle_overall': 0.3, 'W_gear_overall': 0.1,
+
+    # Safety Thresholds & Weights
+    'G_ACCEL_THRESHOLD_STATIC': 3.9, # m/s^2 (approx 0.4G)
+    'G_BRAKE_THRESHOLD_STATIC': 5.8, # m/s^2 (approx 0.6G)
+    'G_MAX_EXPECTED_ACCEL': 8.0, # m/s^2 (approx 1.0G, for normalization)
+    'G_MAX_EXPECTED_BRAKE': 10.0, # m/s^2
+
+    'LAT_G_THRESHOLD_DYNAMIC_LOW_SPEED': 2.9, # m/s^2 (e.g., at 0-20 km/h)
+    'LAT_G_THRESHOLD_DYNAMIC_HIGH_SPEED': 4.9, # m/s^2 (e.g., at >80 km/h)
+    'YAW_THRESHOLD_DYNAMIC_LOW_SPEED': 20, # deg/s
+    'YAW_THRESHOLD_DYNAMIC_HIGH_SPEED': 40, # deg/s
+    'MAX_LAT_G': 9.8, # m/s^2
+    'MAX_YAW_RATE': 80, # deg/s
+
+    'STEERING_RATE_THRESHOLD': 40, # deg/s
+    'MAX_STEERING_RATE': 300, # deg/s (e.g., lock-to-lock in ~1 sec)
+
+    'C_LonG': 25,
+    'C_LatG_Yaw': 35,
+    'C_Steering': 15,
+    'C_Intervention': 70,
+
+    'ALPHA_LON_G': -1.5,
+    'BETA_LAT_G_YAW': -1.0,
+    'GAMMA_STEERING': -1.0,
+    
+    'IDLING_COOLDOWN_SEC': 10.0,  # Idling event cooldown
+    'SCORE_UPDATE_COOLDOWN_SEC': 1.0,  # Score update cooldown
+    'EVENT_COOLDOWN_SEC': 0.5,  # General event cooldown
 
-class DrivingScoreEvaluator:
-    def __init__(self, config=None, log_file_path='driving_events_log.txt'):
-        # --- Configuration (Tunable Parameters) ---
-        self.config = {
-            # Window Durations (seconds)
-            'ECO_WINDOW_DURATION_SEC': 60,
-            'SAFETY_WINDOW_DURATION_SEC': 10,
-            'EVENT_CHECK_HISTORY_SEC': 1, # For rate-of-change/duration checks
-
-            # Calculation Intervals (seconds)
-            'ECO_CALC_INTERVAL_SEC': 2.0,
-            'SAFETY_CALC_INTERVAL_SEC': 0.5,
-
-            # Eco-Friendly Thresholds & Weights
-            'MIN_SPEED_FOR_RPM_RATIO_CALC': 5.0, # km/h
-            'HIGH_RPM_THRESHOLD': 2500, # rpm
-            'MIN_DRIVING_SPEED_FOR_IDLE': 0.5, # km/h
-            'MIN_IDLE_RPM_THRESHOLD': 300, # rpm
-            'AGGRESSIVE_ACCEL_DECEL_THRESHOLD_KMPHPS': 5.0, # km/h/s
-            'GEAR_CHANGE_THRESHOLD': 3,
-
-            'k1_accel_jt': 0.01,  'k2_accel_jp': 0.05,  'k3_accel_vs': 0.001, 'k4_accel_eagg': 0.5,
-            'w1_accel': 0.25, 'w2_accel': 0.25, 'w3_accel': 0.25, 'w4_accel': 0.25,
-            
-            'k5_rpm_ratio': 0.001, 'k6_rpm_high': 0.1,
-            'w5_rpm': 0.7, 'w6_rpm': 0.3,
-
-            'k7_idle_time': 0.2, 'k8_idle_is': 1.0,
-            'w7_idle': 0.9, 'w8_idle': 0.1,
-
-            'W_accel_overall': 0.4, 'W_rpm_overall': 0.2, 'W_idle_overall': 0.3, 'W_gear_overall': 0.1,
-
-            # Safety Thresholds & Weights
-            'G_ACCEL_THRESHOLD_STATIC': 3.9, # m/s^2 (approx 0.4G)
-            'G_BRAKE_THRESHOLD_STATIC': 5.8, # m/s^2 (approx 0.6G)
-            'G_MAX_EXPECTED_ACCEL': 8.0, # m/s^2 (approx 1.0G, for normalization)
-            'G_MAX_EXPECTED_BRAKE': 10.0, # m/s^2
-
-            'LAT_G_THRESHOLD_DYNAMIC_LOW_SPEED': 2.9, # m/s^2 (e.g., at 0-20 km/h)
-            'LAT_G_THRESHOLD_DYNAMIC_HIGH_SPEED': 4.9, # m/s^2 (e.g., at >80 km/h)
-            'YAW_THRESHOLD_DYNAMIC_LOW_SPEED': 20, # deg/s
-            'YAW_THRESHOLD_DYNAMIC_HIGH_SPEED': 40, # deg/s
-            'MAX_LAT_G': 9.8, # m/s^2
-            'MAX_YAW_RATE': 80, # deg/s
-
-            'STEERING_RATE_THRESHOLD': 40, # deg/s
-            'MAX_STEERING_RATE': 300, # deg/s (e.g., lock-to-lock in ~1 sec)
-
-            'C_LonG': 25,
-            'C_LatG_Yaw': 35,
-            'C_Steering': 15,
-            'C_Intervention': 70,
-
-            'ALPHA_LON_G': -1.5,
-            'BETA_LAT_G_YAW': -1.0,
-            'GAMMA_STEERING': -1.0,
-            
-            'IDLING_COOLDOWN_SEC': 10.0,  # Idling event cooldown
-            'SCORE_UPDATE_COOLDOWN_SEC': 1.0,  # Score update cooldown
-            'EVENT_COOLDOWN_SEC': 0.5,  # General event cooldown
+    # Dashboard publishing
+    'EVENT_ENDPOINT_URL': "http://127.0.0.1:8000/event",
+    'EVENT_QUEUE_SIZE': 256,  # Feedback events kept while the dashboard is slow; oldest dropped first
 
-        }
+    # Event log
+    'LOG_LEVEL': 'INFO',  # 'DEBUG' also records the per-packet score line and steering diagnostics
+    'LOG_FORMAT': 'jsonl',  # 'jsonl', 'text' or 'binary' (msgpack)
+    'LOG_FLUSH_INTERVAL_SEC': 1.0,
+    'LOG_BUFFER_RECORDS': 1000,  # Flush early once this many records are pending
+    'LOG_MAX_BYTES': 10 * 1024 * 1024,  # Rotate the log file past this size
+    'LOG_BACKUP_COUNT': 3,
+
+}
+
+LOG_FILE_EXTENSIONS = {'jsonl': '.jsonl', 'text': '.txt', 'binary': '.msgpack'}
+
+class DrivingScoreEvaluator:
+    def __init__(self, config=None, log_file_path=None):
+        self.config = dict(DEFAULT_CONFIG)
         if config:
             self.config.update(config)
 
-        # --- Circular Buffers for each signal ---
-        self.eco_buffers = {
-            'trq_req': CircularBuffer(self.config['ECO_WINDOW_DURATION_SEC']),
-            'pedal_pos': CircularBuffer(self.config['ECO_WINDOW_DURATION_SEC']),
-            'speed': CircularBuffer(self.config['ECO_WINDOW_DURATION_SEC']),
-            'rpm': CircularBuffer(self.config['ECO_WINDOW_DURATION_SEC']),
-            'gear': CircularBuffer(self.config['ECO_WINDOW_DURATION_SEC']),
-            'is_progress': CircularBuffer(self.config['ECO_WINDOW_DURATION_SEC']),
+        # --- Incremental statistics for the eco window (O(1) per sample) ---
+        self.eco_stats = {
+            'trq_req_rate': RateStats(),
+            'pedal_pos_rate': RateStats(),
+            'speed_value': ValueStats(),
+            'speed_rate': RateStats(abs_threshold=self.config['AGGRESSIVE_ACCEL_DECEL_THRESHOLD_KMPHPS']),
+            'idle': IdleStats(min_driving_speed=self.config['MIN_DRIVING_SPEED_FOR_IDLE']),
+            'rpm': RpmStats(min_speed_for_ratio=self.config['MIN_SPEED_FOR_RPM_RATIO_CALC'],
+                            high_rpm_threshold=self.config['HIGH_RPM_THRESHOLD']),
         }
 
-        self.safety_buffers = {
-            'lon_g': CircularBuffer(self.config['SAFETY_WINDOW_DURATION_SEC']),
-            'lat_g': CircularBuffer(self.config['SAFETY_WINDOW_DURATION_SEC']),
-            'yaw': CircularBuffer(self.config['SAFETY_WINDOW_DURATION_SEC']),
-            'steering_angle': CircularBuffer(self.config['SAFETY_WINDOW_DURATION_SEC']),
-            'speed_safety': CircularBuffer(self.config['SAFETY_WINDOW_DURATION_SEC']),
-            'vsa_tcs_act': CircularBuffer(self.config['SAFETY_WINDOW_DURATION_SEC']),
-            'abs_ebd_act': CircularBuffer(self.config['SAFETY_WINDOW_DURATION_SEC']),
+        # --- Sliding windows: one shared timestamp column per window ---
+        self.eco_window = SignalWindow(
+            self.config['ECO_WINDOW_DURATION_SEC'],
+            columns={
+                'trq_req': np.float64,
+                'pedal_pos': np.float64,
+                'speed': np.float64,
+                'rpm': np.float64,
+                'gear': object, # 'P'/'D'/... or int
+                'is_progress': np.bool_,
+            },
+            trackers={
+                'trq_req': [self.eco_stats['trq_req_rate']],
+                'pedal_pos': [self.eco_stats['pedal_pos_rate']],
+                'speed': [self.eco_stats['speed_value'], self.eco_stats['speed_rate']],
+                ('speed', 'rpm', 'is_progress'): [self.eco_stats['idle']],
+                ('rpm', 'speed'): [self.eco_stats['rpm']],
+            },
+        )
+
+        # --- Incremental statistics for the safety window ---
+        self.safety_stats = {
+            'steering_oscillation': OscillationStats(significant_step=3),
         }
+
+        self.safety_window = SignalWindow(
+            self.config['SAFETY_WINDOW_DURATION_SEC'],
+            columns={
+                'lon_g': np.float64,
+                'lat_g': np.float64,
+                'yaw': np.float64,
+                'steering_angle': np.float64,
+                'speed_safety': np.float64,
+                'vsa_tcs_act': np.bool_,
+                'abs_ebd_act': np.bool_,
+            },
+            trackers={
+                'steering_angle': [self.safety_stats['steering_oscillation']],
+            },
+        )
         
         self.event_buffers = {
             'score_update': 0.0,
@@ -119,52 +170,42 @@ class DrivingScoreEvaluator:
         self.safety_score = 100
         self.eco_score = 100
         
+        # --- Dashboard publisher (background thread, never blocks scoring) ---
+        self.publisher = EventPublisher(self.config['EVENT_ENDPOINT_URL'],
+                                        max_queue_size=self.config['EVENT_QUEUE_SIZE'])
+
         # --- Logging Setup ---
+        if log_file_path is None:
+            log_file_path = 'driving_events_log' + LOG_FILE_EXTENSIONS.get(self.config['LOG_FORMAT'], '.log')
         self.log_file_path = log_file_path
-        self.log_file = open(self.log_file_path, 'w') # 'w' will overwrite, 'a' will append
+        self.logger = EventLogger(
+            self.log_file_path,
+            level=self.config['LOG_LEVEL'],
+            fmt=self.config['LOG_FORMAT'],
+            flush_interval_sec=self.config['LOG_FLUSH_INTERVAL_SEC'],
+            max_buffer_records=self.config['LOG_BUFFER_RECORDS'],
+            max_bytes=self.config['LOG_MAX_BYTES'],
+            backup_count=self.config['LOG_BACKUP_COUNT'],
+        )
         self._log_message("--- Driving Event Log Started ---", to_console=True)
 
 
-    def _log_message(self, message, current_timestamp=None, to_console=False):
-        """Writes a timestamped message to the log file and optionally to console."""
-        timestamp_str = f"[{current_timestamp:.3f}s] " if current_timestamp is not None else ""
-        full_message = f"{timestamp_str}{message}\n"
-        self.log_file.write(full_message)
+    def _log_message(self, message, current_timestamp=None, to_console=False, level=INFO, **fields):
+        """Queues a structured record for the event log and optionally prints to console."""
+        self.logger.log(level, message, current_timestamp, **fields)
         if to_console:
             print(message)
 
     def close_log(self):
-        """Closes the log file."""
-        if self.log_file and not self.log_file.closed:
+        """Stops the event publisher, flushes and closes the event log."""
+        self.publisher.close()
+        if not self.logger.closed:
             self._log_message("--- Driving Event Log Ended ---", to_console=True)
-            self.log_file.close()
-
-    def _get_values_in_window(self, buffer, duration_sec, current_timestamp):
-        """Helper to get items within a time window, assumes buffer is trimmed externally."""
-        return buffer.get_all_items()
-
-    def _calculate_std_dev(self, values):
-        if len(values) < 2:
-            return 0.0
-        mean = sum(values)/len(values)
-        return math.sqrt(sum((x - mean)**2 for x in values) / (len(values) -1))
-
-    def _calculate_average(self, values):
-        if not values:
-            return 0.0
-        return sum(values) / len(values)
+            self.logger.close()
 
     def _send_event(self, safety_score, eco_score, feedback):
-        """Sends event data to the FastAPI backend."""
-        import requests
-        import json
-        url = "http://127.0.0.1:8000/event"
-        try:
-            payload = {"safety_score": int(safety_score), "eco_score": int(eco_score), "reminder": feedback}
-            requests.post(url, json=payload)
-        except requests.exceptions.ConnectionError:
-            # print("Dashboard is not running. Could not send update.")
-            pass
+        """Queues event data for the FastAPI backend; the post happens on the publisher thread."""
+        self.publisher.publish(safety_score, eco_score, feedback)
 
     def process_can_data(self, new_can_data_packet):
         current_timestamp = new_can_data_packet.timestamp
@@ -197,47 +238,45 @@ class DrivingScoreEvaluator:
         if should_send_event:
             self._send_event(self.safety_score, self.eco_score, "")
 
-        self._log_message(f"Time: {current_timestamp:.1f}s | Eco Score: {self.eco_score:.2f} | Safety Score: {self.safety_score:.2f}")
+        # Per-packet line: only formatted when DEBUG logging is on
+        if self.logger.is_enabled_for(DEBUG):
+            self._log_message(f"Time: {current_timestamp:.1f}s | Eco Score: {self.eco_score:.2f} | Safety Score: {self.safety_score:.2f}",
+                              current_timestamp, level=DEBUG, eco_score=self.eco_score, safety_score=self.safety_score)
         return eco_score, safety_score
 
     def _update_window_buffers(self, packet, current_timestamp):
-        # Add new data
-        self.eco_buffers['trq_req'].add((current_timestamp, packet.ENG_DRIVER_REQ_TRQ_13C))
-        self.eco_buffers['pedal_pos'].add((current_timestamp, packet.ENG_SMART_ACCELE_PEDAL_POS_13C))
-        self.eco_buffers['speed'].add((current_timestamp, packet.VSA_ABS_FL_WHEEL_SPEED))
-        self.eco_buffers['rpm'].add((current_timestamp, packet.ENG_ENG_SPEED))
-        self.eco_buffers['gear'].add((current_timestamp, packet.CVT_GEAR_POSITION_IND_CVT))
-        self.eco_buffers['is_progress'].add((current_timestamp, packet.ENG_IS_PROGRESS))
-
-        self.safety_buffers['lon_g'].add((current_timestamp, packet.VSA_LON_G))
-        self.safety_buffers['lat_g'].add((current_timestamp, packet.VSA_LAT_G))
-        self.safety_buffers['yaw'].add((current_timestamp, packet.VSA_YAW_1))
-        self.safety_buffers['steering_angle'].add((current_timestamp, packet.STR_ANGLE))
-        self.safety_buffers['speed_safety'].add((current_timestamp, packet.VSA_ABS_FL_WHEEL_SPEED))
-        self.safety_buffers['vsa_tcs_act'].add((current_timestamp, packet.VSA_VSA_TCS_ACT))
-        self.safety_buffers['abs_ebd_act'].add((current_timestamp, packet.VSA_ABS_EBD_ACT))
-
-        # Trim old data from buffers
-        oldest_eco_ts = current_timestamp - self.config['ECO_WINDOW_DURATION_SEC']
-        for buffer in self.eco_buffers.values():
-            buffer.trim_older_than(oldest_eco_ts)
-
-        oldest_safety_ts = current_timestamp - self.config['SAFETY_WINDOW_DURATION_SEC']
-        for buffer in self.safety_buffers.values():
-            buffer.trim_older_than(oldest_safety_ts)
+        # Add new data (one row per window, sharing the timestamp)
+        self.eco_window.append(
+            current_timestamp,
+            trq_req=packet.ENG_DRIVER_REQ_TRQ_13C,
+            pedal_pos=packet.ENG_SMART_ACCELE_PEDAL_POS_13C,
+            speed=packet.VSA_ABS_FL_WHEEL_SPEED,
+            rpm=packet.ENG_ENG_SPEED,
+            gear=packet.CVT_GEAR_POSITION_IND_CVT,
+            is_progress=packet.ENG_IS_PROGRESS,
+        )
+        self.safety_window.append(
+            current_timestamp,
+            lon_g=packet.VSA_LON_G,
+            lat_g=packet.VSA_LAT_G,
+            yaw=packet.VSA_YAW_1,
+            steering_angle=packet.STR_ANGLE,
+            speed_safety=packet.VSA_ABS_FL_WHEEL_SPEED,
+            vsa_tcs_act=packet.VSA_VSA_TCS_ACT,
+            abs_ebd_act=packet.VSA_ABS_EBD_ACT,
+        )
+
+        # Trim old data, once per window
+        self.eco_window.trim_older_than(current_timestamp - self.config['ECO_WINDOW_DURATION_SEC'])
+        self.safety_window.trim_older_than(current_timestamp - self.config['SAFETY_WINDOW_DURATION_SEC'])
 
     def _calculate_eco_score(self, current_timestamp):
-        trq_req_data = self.eco_buffers['trq_req'].get_all_items()
-        pedal_pos_data = self.eco_buffers['pedal_pos'].get_all_items()
-        speed_data = self.eco_buffers['speed'].get_all_items()
-        rpm_data = self.eco_buffers['rpm'].get_all_items()
-        gear_data = self.eco_buffers['gear'].get_all_items()
-        is_progress_data = self.eco_buffers['is_progress'].get_all_items()
-
-        s_accel = self._calculate_accel_smoothness_score(trq_req_data, pedal_pos_data, speed_data, current_timestamp)
-        s_rpm = self._calculate_rpm_efficiency_score(rpm_data, speed_data, gear_data, current_timestamp)
-        s_idle = self._calculate_idling_score_alternative(speed_data, rpm_data, is_progress_data, current_timestamp)
-        s_gear = self._calculate_gear_selection_score(gear_data, current_timestamp)
+        window = self.eco_window
+
+        s_accel = self._calculate_accel_smoothness_score(current_timestamp)
+        s_rpm = self._calculate_rpm_efficiency_score(window, current_timestamp)
+        s_idle = self._calculate_idling_score_alternative(window, current_timestamp)
+        s_gear = self._calculate_gear_selection_score(window, current_timestamp)
 
         score_eco = (self.config['W_accel_overall'] * s_accel +
                      self.config['W_rpm_overall'] * s_rpm +
@@ -247,35 +286,16 @@ class DrivingScoreEvaluator:
         self._log_message(f"ECO Sub-Scores: Accel Smoothness={s_accel:.2f}, RPM Efficiency={s_rpm:.2f}, Idling={s_idle:.2f}, Gear Change={s_gear:.2f}", current_timestamp)
         return score_eco
 
-    def _calculate_accel_smoothness_score(self, trq_req_data, pedal_pos_data, speed_data, current_timestamp):
-        trq_req_deltas = []
-        for i in range(1, len(trq_req_data)):
-            delta_t = trq_req_data[i][0] - trq_req_data[i-1][0]
-            if delta_t > 0:
-                trq_req_deltas.append( (trq_req_data[i][1] - trq_req_data[i-1][1]) / delta_t )
-
-        pedal_pos_deltas = []
-        for i in range(1, len(pedal_pos_data)):
-            delta_t = pedal_pos_data[i][0] - pedal_pos_data[i-1][0]
-            if delta_t > 0:
-                pedal_pos_deltas.append( (pedal_pos_data[i][1] - pedal_pos_data[i-1][1]) / delta_t )
-
-        JT = self._calculate_std_dev(trq_req_deltas)
-        JP = self._calculate_std_dev(pedal_pos_deltas)
-        
-        speed_values = [d[1] for d in speed_data]
-        VS = self._calculate_std_dev(speed_values)
-
-        E_agg = 0
-        aggressive_accel_detected = False
-        for i in range(1, len(speed_data)):
-            delta_t = speed_data[i][0] - speed_data[i-1][0]
-            if delta_t > 0:
-                accel = (speed_data[i][1] - speed_data[i-1][1]) / delta_t # km/h/s
-                if abs(accel) > self.config['AGGRESSIVE_ACCEL_DECEL_THRESHOLD_KMPHPS']:
-                    E_agg += 1
-                    aggressive_accel_detected = True
-        
+    def _calculate_accel_smoothness_score(self, current_timestamp):
+        # JT, JP, VS and E_agg are maintained incrementally by the eco window's
+        # trackers as samples are added and trimmed, so this is constant time.
+        JT = self.eco_stats['trq_req_rate'].std_dev()
+        JP = self.eco_stats['pedal_pos_rate'].std_dev()
+        VS = self.eco_stats['speed_value'].std_dev()
+
+        E_agg = self.eco_stats['speed_rate'].over_threshold_count
+        aggressive_accel_detected = E_agg > 0
+
         score_JT = max(0, 1 - self.config['k1_accel_jt'] * JT)
         score_JP = max(0, 1 - self.config['k2_accel_jp'] * JP)
         score_VS = max(0, 1 - self.config['k3_accel_vs'] * VS)
@@ -297,26 +317,12 @@ class DrivingScoreEvaluator:
 
         return S_accel
 
-    def _calculate_rpm_efficiency_score(self, rpm_data, speed_data, gear_data, current_timestamp):
-        rpm_speed_ratios = []
-        min_len = min(len(rpm_data), len(speed_data))
-        for i in range(min_len):
-            current_rpm = rpm_data[i][1]
-            current_speed = speed_data[i][1]
-            if current_speed > self.config['MIN_SPEED_FOR_RPM_RATIO_CALC']:
-                rpm_speed_ratios.append(current_rpm / current_speed)
-
-        R_ratio = self._calculate_average(rpm_speed_ratios)
-
-        D_high_rpm = 0.0
-        total_duration_in_window = 0.0
-        for i in range(1, len(rpm_data)):
-            current_rpm = rpm_data[i][1]
-            delta_t = rpm_data[i][0] - rpm_data[i-1][0]
-            if delta_t > 0:
-                total_duration_in_window += delta_t
-                if current_rpm > self.config['HIGH_RPM_THRESHOLD']:
-                    D_high_rpm += delta_t
+    def _calculate_rpm_efficiency_score(self, window, current_timestamp):
+        # Ratio mean and high-RPM dwell are maintained by the rpm tracker on the eco window
+        rpm_stats = self.eco_stats['rpm']
+        R_ratio = rpm_stats.mean_ratio()
+        total_duration_in_window = rpm_stats.total_duration.total
+        D_high_rpm = rpm_stats.high_rpm_duration.total
             
         D_high_rpm_proportion = D_high_rpm / total_duration_in_window if total_duration_in_window > 0 else 0.0
 
@@ -339,25 +345,18 @@ class DrivingScoreEvaluator:
 
         return S_rpm
 
-    def _calculate_idling_score(self, speed_data, rpm_data, is_progress_data, current_timestamp):
-        T_idle = 0.0
-        N_is_active = 0
-        
-        for i in range(1, len(is_progress_data)):
-            if is_progress_data[i][1] == True and is_progress_data[i-1][1] == False:
-                N_is_active += 1
-
-        total_duration_in_window = 0.0
-        min_len = min(len(speed_data), len(rpm_data))
-        for i in range(1, min_len):
-            current_speed = speed_data[i][1]
-            current_rpm = rpm_data[i][1]
-            delta_t = speed_data[i][0] - speed_data[i-1][0]
-            if delta_t > 0:
-                total_duration_in_window += delta_t
-                if current_speed < self.config['MIN_DRIVING_SPEED_FOR_IDLE'] and \
-                   current_rpm > self.config['MIN_IDLE_RPM_THRESHOLD']:
-                    T_idle += delta_t
+    def _calculate_idling_score(self, window, current_timestamp):
+        is_values = window.column('is_progress')
+        N_is_active = int(np.count_nonzero((is_values[1:] == True) & (is_values[:-1] == False)))
+
+        speed_values = window.column('speed')[1:]
+        rpm_values = window.column('rpm')[1:]
+        delta_t = np.diff(window.timestamps)
+        valid = delta_t > 0
+        total_duration_in_window = float(delta_t[valid].sum())
+        idle_mask = valid & (speed_values < self.config['MIN_DRIVING_SPEED_FOR_IDLE']) & \
+                    (rpm_values > self.config['MIN_IDLE_RPM_THRESHOLD'])
+        T_idle = float(delta_t[idle_mask].sum())
             
         T_idle_proportion = T_idle / total_duration_in_window if total_duration_in_window > 0 else 0.0
 
@@ -375,50 +374,20 @@ class DrivingScoreEvaluator:
 
         return S_idle
 
-    def _calculate_idling_score_alternative(self, speed_data, rpm_data, is_progress_data, current_timestamp):
+    def _calculate_idling_score_alternative(self, window, current_timestamp):
         """
         Alternative approach: More granular detection of different idling patterns
         """
         
-        # Different categories of idling behavior
-        metrics = {
-            'normal_idle_time': 0.0,        # Reasonable idle (800-1200 RPM)
-            'high_idle_time': 0.0,          # Wasteful idle (1200-2000 RPM)  
-            'excessive_idle_time': 0.0,     # Very wasteful (>2000 RPM)
-            'engine_off_time': 0.0,         # Engine off while stationary (good!)
-            'total_stationary_time': 0.0,   # Total time not moving
-            'is_activations': 0,            # Idle-stop system uses
-            'total_duration': 0.0
-        }
-        
-        # Count idle-stop activations
-        for i in range(1, len(is_progress_data)):
-            if is_progress_data[i][1] == True and is_progress_data[i-1][1] == False:
-                metrics['is_activations'] += 1
-        
-        # Analyze each time segment
-        min_len = min(len(speed_data), len(rpm_data))
-        for i in range(1, min_len):
-            current_speed = speed_data[i][1]
-            current_rpm = rpm_data[i][1]
-            delta_t = speed_data[i][0] - speed_data[i-1][0]
-            
-            if delta_t > 0:
-                metrics['total_duration'] += delta_t
-                
-                # Only analyze when vehicle is stationary
-                if current_speed < self.config['MIN_DRIVING_SPEED_FOR_IDLE']:
-                    metrics['total_stationary_time'] += delta_t
-                    
-                    # Categorize the type of idling
-                    if current_rpm < 500:  # Engine likely off
-                        metrics['engine_off_time'] += delta_t
-                    elif current_rpm <= 1200:  # Normal idle range
-                        metrics['normal_idle_time'] += delta_t
-                    elif current_rpm <= 2000:  # High idle - wasteful
-                        metrics['high_idle_time'] += delta_t
-                    else:  # Excessive RPM - very wasteful
-                        metrics['excessive_idle_time'] += delta_t
+        # Different categories of idling behavior, accumulated by the idle tracker
+        # as segments enter and leave the eco window:
+        #   normal_idle_time     - reasonable idle (500-1200 RPM)
+        #   high_idle_time       - wasteful idle (1200-2000 RPM)
+        #   excessive_idle_time  - very wasteful (>2000 RPM)
+        #   engine_off_time      - engine off while stationary (good!)
+        #   total_stationary_time, total_duration
+        #   is_activations       - idle-stop system uses
+        metrics = self.eco_stats['idle'].metrics()
         
         # Calculate efficiency score based on idling behavior
         if metrics['total_stationary_time'] > 0:
@@ -472,14 +441,10 @@ class DrivingScoreEvaluator:
         
         return S_idle
 
-    def _calculate_gear_selection_score(self, gear_data, current_timestamp):
+    def _calculate_gear_selection_score(self, window, current_timestamp):
         # Count gear changes
-        gear_changes = 0
-        for i in range(1, len(gear_data)):
-            prev_gear = gear_data[i-1][1]
-            curr_gear = gear_data[i][1]
-            if curr_gear != prev_gear:
-                gear_changes += 1
+        gears = window.column('gear')
+        gear_changes = int(np.count_nonzero(gears[1:] != gears[:-1])) if len(gears) > 1 else 0
 
         # Threshold for excessive gear changes (tunable)
         threshold = self.config['GEAR_CHANGE_THRESHOLD']
@@ -509,13 +474,13 @@ class DrivingScoreEvaluator:
             self.last_vsa_abs_act_event_time = 0.0
             self._log_message(f"Safety Window Reset. New window started.", current_timestamp)
 
-        last_lon_g_data = self.safety_buffers['lon_g'].get_last_value()
-        last_lat_g_data = self.safety_buffers['lat_g'].get_last_value()
-        last_yaw_data = self.safety_buffers['yaw'].get_last_value()
-        last_steering_angle_data = self.safety_buffers['steering_angle'].get_last_value()
-        last_speed_data = self.safety_buffers['speed_safety'].get_last_value()
-        last_vsa_tcs_act_data = self.safety_buffers['vsa_tcs_act'].get_last_value()
-        last_abs_ebd_act_data = self.safety_buffers['abs_ebd_act'].get_last_value()
+        last_lon_g_data = self.safety_window.last('lon_g')
+        last_lat_g_data = self.safety_window.last('lat_g')
+        last_yaw_data = self.safety_window.last('yaw')
+        last_steering_angle_data = self.safety_window.last('steering_angle')
+        last_speed_data = self.safety_window.last('speed_safety')
+        last_vsa_tcs_act_data = self.safety_window.last('vsa_tcs_act')
+        last_abs_ebd_act_data = self.safety_window.last('abs_ebd_act')
 
         if not all([last_lon_g_data, last_lat_g_data, last_yaw_data, last_steering_angle_data, last_speed_data]):
             return 100.0
@@ -540,9 +505,9 @@ class DrivingScoreEvaluator:
         # CORRECTED: Use .value for this complex signal
         current_g = float(current_lon_g_data[1])
         
-        recent_speed_history = self.safety_buffers['speed_safety'].get_all_items()
+        last_speed_data = self.safety_window.last('speed_safety')
         # CORRECTED: Do NOT use .value for this primitive signal
-        current_speed = recent_speed_history[-1][1] if recent_speed_history else 0.0
+        current_speed = last_speed_data[1] if last_speed_data else 0.0
         
         if current_speed < self.config['MIN_DRIVING_SPEED_FOR_IDLE']:
             return 0.0
@@ -579,8 +544,8 @@ class DrivingScoreEvaluator:
         penalty = 0.0
         current_g = float(current_lon_g_data[1])
         
-        recent_speed_history = self.safety_buffers['speed_safety'].get_all_items()
-        current_speed = recent_speed_history[-1][1] if recent_speed_history else 0.0
+        last_speed_data = self.safety_window.last('speed_safety')
+        current_speed = last_speed_data[1] if last_speed_data else 0.0
         
         if current_speed < self.config['MIN_DRIVING_SPEED_FOR_IDLE']:
             return 0.0
@@ -637,8 +602,8 @@ class DrivingScoreEvaluator:
         current_lat_g = float(current_lat_g_data[1])
         current_yaw = float(current_yaw_data[1])
         
-        recent_speed_history = self.safety_buffers['speed_safety'].get_all_items()
-        current_speed = recent_speed_history[-1][1] if recent_speed_history else 0.0
+        last_speed_data = self.safety_window.last('speed_safety')
+        current_speed = last_speed_data[1] if last_speed_data else 0.0
 
         if current_speed < self.config['MIN_DRIVING_SPEED_FOR_IDLE']:
             return 0.0
@@ -672,13 +637,14 @@ class DrivingScoreEvaluator:
 
     def _detect_jerky_steering_event(self, current_steering_angle_data, current_timestamp):
         penalty = 0.0
-        recent_steering_history = self.safety_buffers['steering_angle'].get_all_items()
+        steering_ts = self.safety_window.timestamps
+        steering_angles = self.safety_window.column('steering_angle')
 
-        if len(recent_steering_history) < 2:
+        if len(steering_angles) < 2:
             return 0.0
 
-        angle_prev_ts, angle_prev_val = recent_steering_history[-2]
-        angle_curr_ts, angle_curr_val = recent_steering_history[-1]
+        angle_prev_ts, angle_prev_val = steering_ts[-2], steering_angles[-2]
+        angle_curr_ts, angle_curr_val = steering_ts[-1], steering_angles[-1]
         
         angle_prev = float(angle_prev_val)
         angle_curr = float(angle_curr_val)
@@ -707,59 +673,39 @@ class DrivingScoreEvaluator:
         Oscillation-based jerky steering detection without speed filtering
         """
         penalty = 0.0
-        recent_steering_history = self.safety_buffers['steering_angle'].get_all_items()
-        # print("DEBUG: Recent steering history for oscillation detection:", recent_steering_history)
+        oscillation = self.safety_stats['steering_oscillation']
 
         # Need minimum samples for oscillation detection
-        if len(recent_steering_history) < 6:
-            self._log_message("DEBUG: Not enough steering data for oscillation detection", current_timestamp)
+        if len(self.safety_window) < 6:
+            self._log_message("DEBUG: Not enough steering data for oscillation detection", current_timestamp, level=DEBUG)
             return 0.0
 
-        # Direction change frequency (oscillation detection)
-        direction_changes = 0
-        significant_changes = 0
-        total_angle_change = 0.0
-        
-        # Debug: collect steering angles for analysis
-        angles = [float(item[1]) for item in recent_steering_history]
-        
-        for i in range(2, len(recent_steering_history)):
-            prev_angle = float(recent_steering_history[i-2][1])
-            curr_angle = float(recent_steering_history[i-1][1])
-            next_angle = float(recent_steering_history[i][1])
-            
-            # Calculate direction vectors
-            dir1 = curr_angle - prev_angle
-            dir2 = next_angle - curr_angle
-            
-            # Check for direction change (oscillation)
-            if dir1 * dir2 < 0:  # Signs are different = direction change
-                direction_changes += 1
-                angle_change_magnitude = abs(dir1) + abs(dir2)
-                total_angle_change += angle_change_magnitude
-                
-                # Count only significant direction changes
-                if abs(dir1) > 3 and abs(dir2) > 3:  # Lowered threshold for more sensitivity
-                    significant_changes += 1
+        # Direction change / significant change counts and magnitude sum are kept
+        # up to date by the steering tracker as samples enter and leave the window
+        direction_changes = oscillation.direction_changes
+        significant_changes = oscillation.significant_changes
+        total_angle_change = oscillation.total_angle_change
         
         # Time window for frequency calculation
-        time_window = recent_steering_history[-1][0] - recent_steering_history[0][0]
+        steering_ts = self.safety_window.timestamps
+        time_window = float(steering_ts[-1] - steering_ts[0])
         
         if time_window > 0:
             oscillation_frequency = direction_changes / time_window  # total changes per second
             significant_frequency = significant_changes / time_window  # significant changes per second
             avg_change_magnitude = total_angle_change / max(1, direction_changes)
             
-            # Debug logging - always log for tuning
-            self._log_message(
-                f"DEBUG Steering: Total changes={direction_changes}, "
-                f"Significant={significant_changes}, "
-                f"Freq={oscillation_frequency:.2f}/s, "
-                f"Sig_freq={significant_frequency:.2f}/s, "
-                f"Avg_magnitude={avg_change_magnitude:.1f}°, "
-                f"Window={time_window:.1f}s",
-                current_timestamp
-            )
+            # Debug logging for tuning (LOG_LEVEL='DEBUG')
+            if self.logger.is_enabled_for(DEBUG):
+                self._log_message(
+                    f"DEBUG Steering: Total changes={direction_changes}, "
+                    f"Significant={significant_changes}, "
+                    f"Freq={oscillation_frequency:.2f}/s, "
+                    f"Sig_freq={significant_frequency:.2f}/s, "
+                    f"Avg_magnitude={avg_change_magnitude:.1f}°, "
+                    f"Window={time_window:.1f}s",
+                    current_timestamp, level=DEBUG
+                )
             
             # Detection criteria - more sensitive thresholds
             jerky_detected = False
@@ -794,7 +740,7 @@ class DrivingScoreEvaluator:
             elif jerky_detected:
                 # Reset penalty if still in cooldown
                 penalty = 0.0
-                self._log_message(f"DEBUG: Jerky steering detected but in cooldown period", current_timestamp)
+                self._log_message("DEBUG: Jerky steering detected but in cooldown period", current_timestamp, level=DEBUG)
 
         return penalty
 
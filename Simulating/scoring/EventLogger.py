@@ -0,0 +1,171 @@
+import os
+import threading
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING'}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+
+def _to_builtin(obj):
+    # numpy scalars (np.bool_, np.float32, ...) that reach the log as field values
+    if hasattr(obj, 'item'):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+class EventLogger:
+    """
+    Buffered, levelled, structured log for the driving evaluator.
+
+    Records below `level` are rejected before anything is formatted; callers
+    that build expensive messages should check is_enabled_for() first.
+    Accepted records are kept in memory as plain tuples and written by a
+    background thread once `max_buffer_records` are pending or every
+    `flush_interval_sec`, whichever comes first.
+
+    Output formats:
+      * 'jsonl'  - one JSON object per line: {"t": .., "level": .., "msg": .., <fields>}
+      * 'text'   - the classic "[12.345s] message" lines
+      * 'binary' - a stream of msgpack maps with the same keys as 'jsonl'
+
+    When the file grows past `max_bytes` it is rotated to path.1 .. path.N.
+
+    A record that can't be serialized is dropped and counted in
+    stats['dropped']; a batch that can't be written is counted in
+    stats['write_errors']. Neither stops the flusher thread.
+    """
+    def __init__(self, path, level=INFO, fmt='jsonl', flush_interval_sec=1.0,
+                 max_buffer_records=1000, max_bytes=10 * 1024 * 1024, backup_count=3):
+        if fmt not in ('jsonl', 'text', 'binary'):
+            raise ValueError(f"Unknown log format: {fmt}")
+        self.path = path
+        self.level = LEVELS[level] if isinstance(level, str) else level
+        self.fmt = fmt
+        self.flush_interval_sec = flush_interval_sec
+        self.max_buffer_records = max_buffer_records
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+        self._serialize = self._make_serializer(fmt)
+        self._records = deque()
+        self._file = open(self.path, 'wb')
+        self._file_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self.stats = {
+            'written': 0,
+            'dropped': 0,
+            'write_errors': 0,
+        }
+        self._flusher = threading.Thread(target=self._run, name="EventLogger", daemon=True)
+        self._flusher.start()
+
+    @staticmethod
+    def _make_serializer(fmt):
+        if fmt == 'binary':
+            import msgpack
+            packer = msgpack.Packer(default=_to_builtin)
+            return lambda record: packer.pack(record)
+        if fmt == 'text':
+            def to_text(record):
+                ts = record.get('t')
+                prefix = f"[{ts:.3f}s] " if ts is not None else ""
+                return f"{prefix}{record['msg']}\n".encode('utf-8')
+            return to_text
+        try:
+            import orjson
+            return lambda record: orjson.dumps(record, default=_to_builtin,
+                                                option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+        except ImportError:
+            import json
+            return lambda record: (json.dumps(record, default=_to_builtin) + "\n").encode('utf-8')
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def is_enabled_for(self, level):
+        return level >= self.level
+
+    def log(self, level, message, timestamp=None, **fields):
+        if level < self.level or self._closed:
+            return
+        self._records.append((timestamp, level, message, fields))
+        if len(self._records) >= self.max_buffer_records:
+            self._wakeup.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval_sec)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Whatever went wrong, later records must still be written
+                self.stats['write_errors'] += 1
+
+    def flush(self):
+        """Write every pending record. Safe to call from any thread."""
+        with self._file_lock:
+            if self._file.closed and not self._reopen():
+                return
+            chunks = []
+            records = self._records
+            while records:
+                timestamp, level, message, fields = records.popleft()
+                record = {'t': timestamp, 'level': LEVEL_NAMES.get(level, level), 'msg': message}
+                if fields:
+                    record.update(fields)
+                try:
+                    chunks.append(self._serialize(record))
+                except (TypeError, ValueError, OverflowError):
+                    self.stats['dropped'] += 1
+            if not chunks:
+                return
+            try:
+                self._file.write(b"".join(chunks))
+                self._file.flush()
+                self.stats['written'] += len(chunks)
+                if self.max_bytes and self._file.tell() >= self.max_bytes:
+                    self._rotate()
+            except OSError:
+                # Disk full, file removed, failed rotation...: this batch is lost
+                self.stats['write_errors'] += 1
+
+    def _reopen(self):
+        # Called with the file lock held, after a failed rotation left no file open
+        if self._closed:
+            return False
+        try:
+            self._file = open(self.path, 'ab')
+            return True
+        except OSError:
+            # Still nowhere to write: drop what is pending rather than let it pile up
+            self.stats['write_errors'] += 1
+            self.stats['dropped'] += len(self._records)
+            self._records.clear()
+            return False
+
+    def _rotate(self):
+        self._file.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, 'wb')
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join()
+        self.flush()
+        with self._file_lock:
+            self._file.close()
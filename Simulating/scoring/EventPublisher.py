@@ -0,0 +1,95 @@
+import threading
+from collections import deque
+
+class EventPublisher:
+    """
+    Posts score/feedback events to the dashboard from a background thread.
+
+    publish() never blocks the caller on the network:
+      * events that carry feedback go into a bounded FIFO; when it is full the
+        oldest event is dropped and counted;
+      * score-only updates (empty feedback) are coalesced into a single slot,
+        so only the most recent scores are sent;
+      * one worker thread sends everything over a pooled keep-alive
+        requests.Session.
+
+    The worker is started on the first publish() and stopped by close().
+    """
+    def __init__(self, url="http://127.0.0.1:8000/event", max_queue_size=256,
+                 connect_timeout=0.5, read_timeout=2.0):
+        self.url = url
+        self.max_queue_size = max_queue_size
+        self.timeout = (connect_timeout, read_timeout)
+
+        self._events = deque()
+        self._pending_scores = None
+        self._cond = threading.Condition()
+        self._closing = False
+        self._worker = None
+
+        self.stats = {
+            'queued': 0,
+            'sent': 0,
+            'failed': 0,
+            'dropped': 0,
+            'coalesced': 0,
+        }
+
+    def publish(self, safety_score, eco_score, feedback):
+        payload = {"safety_score": int(safety_score), "eco_score": int(eco_score), "reminder": feedback}
+        with self._cond:
+            if self._closing:
+                self.stats['dropped'] += 1
+                return
+            if not feedback:
+                # Score-only update: only the latest one matters
+                if self._pending_scores is not None:
+                    self.stats['coalesced'] += 1
+                self._pending_scores = payload
+            else:
+                if len(self._events) >= self.max_queue_size:
+                    self._events.popleft()
+                    self.stats['dropped'] += 1
+                self._events.append(payload)
+            self.stats['queued'] += 1
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="EventPublisher", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+
+    def _next_payload(self):
+        # Called with the condition held. Feedback events first, in order, then the latest scores.
+        if self._events:
+            return self._events.popleft()
+        payload, self._pending_scores = self._pending_scores, None
+        return payload
+
+    def _run(self):
+        import requests  # Only needed once something is actually published
+
+        session = requests.Session()
+        try:
+            while True:
+                with self._cond:
+                    while not self._events and self._pending_scores is None and not self._closing:
+                        self._cond.wait()
+                    payload = self._next_payload()
+                    if payload is None:  # closing and fully drained
+                        return
+                try:
+                    session.post(self.url, json=payload, timeout=self.timeout)
+                    self.stats['sent'] += 1
+                except requests.exceptions.RequestException:
+                    # Dashboard is not running or too slow; the event is lost
+                    self.stats['failed'] += 1
+        finally:
+            session.close()
+
+    def close(self, timeout=2.0):
+        """Stop accepting events, give the worker `timeout` seconds to drain, then return."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+            worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
@@ -0,0 +1,306 @@
+import math
+import sys
+from collections import deque
+
+class RunningMoments:
+    """
+    Count / sum / sum-of-squares over a sliding set of values, supporting
+    both insertion and eviction in O(1). Values must be removed in the order
+    they were pushed.
+
+    Values are stored relative to a shift (the first value seen since the
+    set was last empty) so the sum-of-squares does not lose precision when
+    the values sit far from zero.
+
+    Removing a value cancels its contribution only up to rounding, and the
+    error builds up with every squared deviation that goes through the sums.
+    Once that bound is no longer negligible next to the variance (typically
+    after a burst of large values has left the window) std_dev() recomputes
+    the sums from the values held, centred on their mean.
+    """
+    # Recompute when the rounding bound could reach this fraction of the variance
+    RECENTER_TOLERANCE = 1e-9
+
+    def __init__(self):
+        self.count = 0
+        self._values = deque()
+        self._shift = 0.0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._churn = 0.0  # Squared deviations pushed or removed since the sums were last computed
+
+    def push(self, x):
+        if self.count == 0:
+            self._shift = x
+            self._sum = 0.0
+            self._sum_sq = 0.0
+            self._churn = 0.0
+        d = x - self._shift
+        self.count += 1
+        self._sum += d
+        self._sum_sq += d * d
+        self._churn += d * d
+        self._values.append(x)
+
+    def remove(self, x):
+        d = x - self._shift
+        self.count -= 1
+        self._sum -= d
+        self._sum_sq -= d * d
+        self._churn += d * d
+        self._values.popleft()
+        if self.count <= 0:
+            self.count = 0
+            self._sum = 0.0
+            self._sum_sq = 0.0
+            self._churn = 0.0
+            self._values.clear()
+
+    def _recenter(self):
+        values = self._values
+        self._shift = math.fsum(values) / len(values)
+        deviations = [x - self._shift for x in values]
+        self._sum = math.fsum(deviations)
+        self._sum_sq = math.fsum(d * d for d in deviations)
+        self._churn = self._sum_sq
+
+    def mean(self):
+        if self.count == 0:
+            return 0.0
+        return self._shift + self._sum / self.count
+
+    def std_dev(self):
+        # Sample standard deviation (n - 1)
+        if self.count < 2:
+            return 0.0
+        spread = self._sum_sq - self._sum * self._sum / self.count
+        if 4 * sys.float_info.epsilon * self._churn > self.RECENTER_TOLERANCE * spread:
+            self._recenter()
+            spread = self._sum_sq - self._sum * self._sum / self.count
+        variance = spread / (self.count - 1)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+
+class ValueStats:
+    """Running moments of the values of one SignalWindow column."""
+    def __init__(self):
+        self.moments = RunningMoments()
+
+    def on_add(self, prev_item, item):
+        self.moments.push(item[1])
+
+    def on_evict(self, item, next_item):
+        self.moments.remove(item[1])
+
+    def std_dev(self):
+        return self.moments.std_dev()
+
+
+class RateStats:
+    """
+    Running moments of the rate of change between consecutive samples,
+    (v[i] - v[i-1]) / (t[i] - t[i-1]) for every pair with a positive time step.
+    Optionally also counts the pairs whose absolute rate exceeds a threshold.
+    """
+    def __init__(self, abs_threshold=None):
+        self.moments = RunningMoments()
+        self.abs_threshold = abs_threshold
+        self.over_threshold_count = 0
+
+    def _rate(self, earlier, later):
+        delta_t = later[0] - earlier[0]
+        if delta_t > 0:
+            return (later[1] - earlier[1]) / delta_t
+        return None
+
+    def on_add(self, prev_item, item):
+        if prev_item is None:
+            return
+        rate = self._rate(prev_item, item)
+        if rate is None:
+            return
+        self.moments.push(rate)
+        if self.abs_threshold is not None and abs(rate) > self.abs_threshold:
+            self.over_threshold_count += 1
+
+    def on_evict(self, item, next_item):
+        if next_item is None:
+            return
+        rate = self._rate(item, next_item)
+        if rate is None:
+            return
+        self.moments.remove(rate)
+        if self.abs_threshold is not None and abs(rate) > self.abs_threshold:
+            self.over_threshold_count -= 1
+
+    def std_dev(self):
+        return self.moments.std_dev()
+
+
+class OscillationStats:
+    """
+    Streaming direction-change statistics over a window of samples.
+
+    Every three consecutive samples (a, b, c) form a triple with steps
+    dir1 = b - a and dir2 = c - b. A triple is a direction change when the
+    steps have opposite signs, and a significant one when both steps are
+    larger than `significant_step`. Triple contributions are queued in window
+    order so they can be taken back out when their first sample is evicted.
+    """
+    def __init__(self, significant_step=3):
+        self.significant_step = significant_step
+        self.sample_count = 0
+        self.direction_changes = 0
+        self.significant_changes = 0
+        self.total_angle_change = 0.0
+        self._last_step = 0.0
+        self._triples = deque()  # (is_change, is_significant, magnitude) per triple
+
+    def on_add(self, prev_item, item):
+        self.sample_count += 1
+        if prev_item is None:
+            return
+        step = item[1] - prev_item[1]
+        if self.sample_count >= 3:
+            dir1, dir2 = self._last_step, step
+            if dir1 * dir2 < 0:
+                significant = abs(dir1) > self.significant_step and abs(dir2) > self.significant_step
+                magnitude = abs(dir1) + abs(dir2)
+                self.direction_changes += 1
+                self.significant_changes += significant
+                self.total_angle_change += magnitude
+                self._triples.append((True, significant, magnitude))
+            else:
+                self._triples.append((False, False, 0.0))
+        self._last_step = step
+
+    def on_evict(self, item, next_item):
+        if self.sample_count >= 3:
+            is_change, significant, magnitude = self._triples.popleft()
+            if is_change:
+                self.direction_changes -= 1
+                self.significant_changes -= significant
+                self.total_angle_change -= magnitude
+        self.sample_count -= 1
+        if not self._triples:
+            self.total_angle_change = 0.0
+
+
+class WindowedDuration:
+    """Sum of segment durations with a segment count, exact zero once empty."""
+    def __init__(self):
+        self.count = 0
+        self._total = 0.0
+
+    def add(self, delta_t, sign):
+        self.count += sign
+        self._total += sign * delta_t
+        if self.count <= 0:
+            self.count = 0
+            self._total = 0.0
+
+    @property
+    def total(self):
+        return self._total if self.count else 0.0
+
+
+class IdleStats:
+    """
+    Idling time buckets and idle-stop activations over a window.
+
+    Items are (timestamp, (speed, rpm, is_progress)). Each pair of consecutive
+    samples with a positive time step is a segment, classified by the later
+    sample (same rules as DrivingScoreEvaluator._calculate_idling_score_alternative):
+    stationary when speed < min_driving_speed, then engine off (< engine_off_rpm),
+    normal idle (<= normal_idle_max_rpm), high idle (<= high_idle_max_rpm) or
+    excessive idle. Idle-stop activations are False -> True edges of is_progress.
+    """
+    BUCKETS = ('total_duration', 'total_stationary_time', 'engine_off_time',
+               'normal_idle_time', 'high_idle_time', 'excessive_idle_time')
+
+    def __init__(self, min_driving_speed, engine_off_rpm=500, normal_idle_max_rpm=1200, high_idle_max_rpm=2000):
+        self.min_driving_speed = min_driving_speed
+        self.engine_off_rpm = engine_off_rpm
+        self.normal_idle_max_rpm = normal_idle_max_rpm
+        self.high_idle_max_rpm = high_idle_max_rpm
+        self.durations = {name: WindowedDuration() for name in self.BUCKETS}
+        self.is_activations = 0
+
+    def _apply(self, earlier, later, sign):
+        prev_is_progress = earlier[1][2]
+        speed, rpm, is_progress = later[1]
+        if is_progress == True and prev_is_progress == False:
+            self.is_activations += sign
+
+        delta_t = later[0] - earlier[0]
+        if delta_t <= 0:
+            return
+        self.durations['total_duration'].add(delta_t, sign)
+        if speed < self.min_driving_speed:
+            self.durations['total_stationary_time'].add(delta_t, sign)
+            if rpm < self.engine_off_rpm:
+                self.durations['engine_off_time'].add(delta_t, sign)
+            elif rpm <= self.normal_idle_max_rpm:
+                self.durations['normal_idle_time'].add(delta_t, sign)
+            elif rpm <= self.high_idle_max_rpm:
+                self.durations['high_idle_time'].add(delta_t, sign)
+            else:
+                self.durations['excessive_idle_time'].add(delta_t, sign)
+
+    def on_add(self, prev_item, item):
+        if prev_item is not None:
+            self._apply(prev_item, item, 1)
+
+    def on_evict(self, item, next_item):
+        if next_item is not None:
+            self._apply(item, next_item, -1)
+
+    def metrics(self):
+        metrics = {name: duration.total for name, duration in self.durations.items()}
+        metrics['is_activations'] = self.is_activations
+        return metrics
+
+
+class RpmStats:
+    """
+    RPM efficiency metrics over a window.
+
+    Items are (timestamp, (rpm, speed)). Keeps the mean rpm/speed ratio over
+    samples faster than min_speed_for_ratio, and the time spent above
+    high_rpm_threshold over segments with a positive time step (classified
+    by the later sample), together with the total segment time.
+    """
+    def __init__(self, min_speed_for_ratio, high_rpm_threshold):
+        self.min_speed_for_ratio = min_speed_for_ratio
+        self.high_rpm_threshold = high_rpm_threshold
+        self.ratio = RunningMoments()
+        self.total_duration = WindowedDuration()
+        self.high_rpm_duration = WindowedDuration()
+
+    def _apply_sample(self, item, sign):
+        rpm, speed = item[1]
+        if speed > self.min_speed_for_ratio:
+            if sign > 0:
+                self.ratio.push(rpm / speed)
+            else:
+                self.ratio.remove(rpm / speed)
+
+    def _apply_segment(self, earlier, later, sign):
+        delta_t = later[0] - earlier[0]
+        if delta_t > 0:
+            self.total_duration.add(delta_t, sign)
+            if later[1][0] > self.high_rpm_threshold:
+                self.high_rpm_duration.add(delta_t, sign)
+
+    def on_add(self, prev_item, item):
+        self._apply_sample(item, 1)
+        if prev_item is not None:
+            self._apply_segment(prev_item, item, 1)
+
+    def on_evict(self, item, next_item):
+        self._apply_sample(item, -1)
+        if next_item is not None:
+            self._apply_segment(item, next_item, -1)
+
+    def mean_ratio(self):
+        return self.ratio.mean()
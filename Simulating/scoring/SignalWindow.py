@@ -0,0 +1,105 @@
+import numpy as np
+
+class SignalWindow:
+    """
+    Time window over several signals sampled together (struct of arrays).
+
+    All columns share one timestamp column, so a packet costs one timestamp
+    write and one trim no matter how many signals are tracked. The live
+    window always sits in one contiguous slice [_start:_end]; `timestamps`
+    and `column(name)` are zero-copy NumPy views that stay row-aligned.
+    When the tail reaches the end of the storage the window is either slid
+    back to the front or, if it fills more than half of the storage, every
+    array is doubled.
+    """
+    def __init__(self, capacity_seconds, columns, trackers=None, initial_size=256):
+        """
+        :param capacity_seconds: Window length used by the owner when trimming.
+        :param columns: Mapping of column name -> NumPy dtype, in insertion order.
+        :param trackers: Optional mapping of column name -> list of incremental
+                         statistics. Each tracker gets on_add(prev_item, item) and
+                         on_evict(item, next_item) with (timestamp, value) items.
+                         A tuple of column names as key gives the trackers
+                         (timestamp, (value1, value2, ...)) items instead.
+        """
+        self.capacity_seconds = capacity_seconds
+        self.dtypes = dict(columns)
+        self._ts = np.empty(initial_size, dtype=np.float64)
+        self._cols = {name: np.empty(initial_size, dtype=dtype) for name, dtype in self.dtypes.items()}
+        self._start = 0
+        self._end = 0
+        self.trackers = {name: list(t) for name, t in (trackers or {}).items() if t}
+
+    def _make_room(self):
+        size = self._end - self._start
+        grow = size * 2 > len(self._ts)
+        new_len = len(self._ts) * 2 if grow else len(self._ts)
+
+        def moved(array):
+            target = np.empty(new_len, dtype=array.dtype) if grow else array
+            target[:size] = array[self._start:self._end]
+            return target
+
+        self._ts = moved(self._ts)
+        self._cols = {name: moved(array) for name, array in self._cols.items()}
+        self._start, self._end = 0, size
+
+    def _stored_value(self, key, i):
+        if isinstance(key, tuple):
+            return tuple(self._cols[name][i] for name in key)
+        return self._cols[key][i]
+
+    def append(self, timestamp, **values):
+        """Append one row. Every column must be given a value."""
+        if self._end == len(self._ts):
+            self._make_room()
+        end = self._end
+        if self.trackers:
+            has_prev = end > self._start
+            for key, key_trackers in self.trackers.items():
+                prev_item = (self._ts[end - 1], self._stored_value(key, end - 1)) if has_prev else None
+                value = tuple(values[name] for name in key) if isinstance(key, tuple) else values[key]
+                item = (timestamp, value)
+                for tracker in key_trackers:
+                    tracker.on_add(prev_item, item)
+        self._ts[end] = timestamp
+        for name, array in self._cols.items():
+            array[end] = values[name]
+        self._end = end + 1
+
+    def trim_older_than(self, oldest_allowed_timestamp):
+        if self._end == self._start or self._ts[self._start] >= oldest_allowed_timestamp:
+            return
+        # Timestamps are appended in order, so the cut point is a binary search away
+        cut = self._start + int(np.searchsorted(self._ts[self._start:self._end], oldest_allowed_timestamp, side='left'))
+        for key, key_trackers in self.trackers.items():
+            for i in range(self._start, cut):
+                item = (self._ts[i], self._stored_value(key, i))
+                next_item = (self._ts[i + 1], self._stored_value(key, i + 1)) if i + 1 < self._end else None
+                for tracker in key_trackers:
+                    tracker.on_evict(item, next_item)
+        self._start = cut
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    @property
+    def timestamps(self):
+        # Zero-copy view of the timestamps currently in the window
+        return self._ts[self._start:self._end]
+
+    def column(self, name):
+        # Zero-copy view of one signal, aligned with `timestamps`
+        return self._cols[name][self._start:self._end]
+
+    def last(self, name):
+        # Returns the last (timestamp, value) item of a column, or None if the window is empty
+        if self._end == self._start:
+            return None
+        return (self._ts[self._end - 1], self._cols[name][self._end - 1])
+
+    def row_nbytes(self):
+        # Bytes used per stored row (timestamp plus every column)
+        return self._ts.itemsize + sum(array.itemsize for array in self._cols.values())
+
+    def __len__(self):
+        return self._end - self._start
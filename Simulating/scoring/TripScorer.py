@@ -0,0 +1,376 @@
+"""
+Offline, vectorized scoring of a whole recorded trip.
+
+score_trip() reproduces the eco and safety score timelines that
+DrivingScoreEvaluator.process_can_data would emit if the trip were streamed
+through it packet by packet, but works on column arrays:
+
+  * tick positions follow the same ECO_CALC_INTERVAL_SEC / SAFETY_CALC_INTERVAL_SEC
+    cadence (first sample at least one interval after t=0, then every sample
+    that is at least one interval after the previous tick);
+  * every windowed quantity (rate moments, durations, edge counts, oscillation
+    counts) is summed over that window's own samples only (np.add.reduceat
+    on the window bounds), for all ticks at once; standard deviations are
+    two-pass within each window. Noisy stretches elsewhere in a long trip
+    therefore never cost a window any precision;
+  * only the safety cooldown/reset state machine runs as a loop, once per
+    safety tick, on precomputed scalars.
+
+Tolerance: scores agree with the streaming evaluator to within 1e-6 points,
+on trips of any length; check_trip_scorer.py verifies that on a long
+synthetic trip. The only differences come from floating point summation
+order. A value sitting exactly on a detector threshold can in principle fall
+on the other side and change a safety tick, which never happens on the
+bundled simulation data.
+
+Timestamps must be non-decreasing, as they are in a CAN trace.
+"""
+import csv
+import sys
+
+import numpy as np
+
+from scoring.DrivingScoreEvaluator import DEFAULT_CONFIG
+
+TRIP_COLUMNS = [
+    'timestamp',
+    'ENG_DRIVER_REQ_TRQ_13C', 'ENG_SMART_ACCELE_PEDAL_POS_13C',
+    'VSA_ABS_FL_WHEEL_SPEED', 'ENG_ENG_SPEED', 'CVT_GEAR_POSITION_IND_CVT',
+    'ENG_IS_PROGRESS', 'VSA_LON_G', 'VSA_LAT_G', 'VSA_YAW_1', 'STR_ANGLE',
+    'VSA_VSA_TCS_ACT', 'VSA_ABS_EBD_ACT',
+]
+
+
+def _window_sums(x, lo, hi):
+    """sum(x[lo[k]:hi[k]]) for every k, adding up only the samples inside each window."""
+    n = len(x)
+    x = np.append(np.asarray(x, dtype=np.float64), 0.0)  # so a bound may be len(x)
+    bounds = np.empty(2 * len(lo), dtype=np.int64)
+    bounds[0::2] = np.minimum(lo, n)
+    bounds[1::2] = np.minimum(hi, n)
+    sums = np.add.reduceat(x, bounds)[0::2]
+    # reduceat gives x[lo] for an empty window
+    return np.where(bounds[1::2] > bounds[0::2], sums, 0.0)
+
+
+def _window_std(x, valid, lo, hi, chunk_samples=1 << 20):
+    """
+    Sample std of the valid x[lo[k]:hi[k]] for every k, two-pass within each
+    window (mean first, then the squared deviations from it), so no window is
+    affected by the size of the values elsewhere in the trip. Windows are
+    expanded into one flat array a few at a time, about `chunk_samples`
+    samples per pass.
+    """
+    count = _window_sums(valid, lo, hi)
+    x = np.where(valid, x, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, _window_sums(x, lo, hi) / count, 0.0)
+
+    lengths = hi - lo
+    ends = np.cumsum(lengths)
+    total_sq = np.zeros(len(lo))
+    first = 0
+    while first < len(lo):
+        done = ends[first - 1] if first else 0
+        last = max(first + 1, int(np.searchsorted(ends, done + chunk_samples, side='right')))
+        n = lengths[first:last]
+        starts = np.zeros(len(n), dtype=np.int64)
+        np.cumsum(n[:-1], out=starts[1:])
+        flat = np.arange(int(n.sum())) + np.repeat(lo[first:last] - starts, n)
+        deviation = np.where(valid[flat], x[flat] - np.repeat(mean[first:last], n), 0.0)
+        total_sq[first:last] = _window_sums(deviation * deviation, starts, starts + n)
+        first = last
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = total_sq / (count - 1)
+    return np.where(count >= 2, np.sqrt(np.maximum(variance, 0.0)), 0.0)
+
+
+def _tick_indices(timestamps, interval):
+    """Sample indices at which the streaming evaluator would run a calculation."""
+    ticks = []
+    last = 0.0
+    i = 0
+    n = len(timestamps)
+    while i < n:
+        # First sample with t - last >= interval. Binary search on last + interval,
+        # then nudge so the comparison is exactly the one process_can_data makes.
+        j = max(i, int(np.searchsorted(timestamps, last + interval, side='left')))
+        while j > i and timestamps[j - 1] - last >= interval:
+            j -= 1
+        while j < n and timestamps[j] - last < interval:
+            j += 1
+        if j >= n:
+            break
+        ticks.append(j)
+        last = timestamps[j]
+        i = j + 1
+    return np.asarray(ticks, dtype=np.int64)
+
+
+def _window_starts(timestamps, ticks, duration):
+    # Index of the oldest sample kept after trim_older_than(t - duration)
+    return np.searchsorted(timestamps, timestamps[ticks] - duration, side='left')
+
+
+def _rate_moments(timestamps, values, valid_dt, lo, hi):
+    """Sample std of (v[j]-v[j-1])/dt over pairs lo < j <= hi with dt > 0, for every tick."""
+    delta_t = np.diff(timestamps)
+    rates = np.zeros(len(delta_t))
+    np.divide(np.diff(values), delta_t, out=rates, where=valid_dt)
+    # pair j (1-based) lives at position j-1 of the diff arrays -> range [lo, hi)
+    return _window_std(rates, valid_dt, lo, hi)
+
+
+def _eco_scores(cols, ticks, config):
+    cfg = config
+    ts = cols['timestamp']
+    lo = _window_starts(ts, ticks, cfg['ECO_WINDOW_DURATION_SEC'])
+    hi = ticks  # inclusive sample index; as an exclusive pair index it covers pairs lo+1..hi
+
+    delta_t = np.diff(ts)
+    valid_dt = delta_t > 0
+    pos_dt = np.where(valid_dt, delta_t, 0.0)
+
+    # --- Acceleration smoothness ---
+    JT = _rate_moments(ts, cols['ENG_DRIVER_REQ_TRQ_13C'], valid_dt, lo, hi)
+    JP = _rate_moments(ts, cols['ENG_SMART_ACCELE_PEDAL_POS_13C'], valid_dt, lo, hi)
+
+    speed = cols['VSA_ABS_FL_WHEEL_SPEED']
+    VS = _window_std(speed, np.ones(len(speed), dtype=bool), lo, hi + 1)
+
+    speed_rates = np.zeros(len(delta_t))
+    np.divide(np.diff(speed), delta_t, out=speed_rates, where=valid_dt)
+    aggressive = valid_dt & (np.abs(speed_rates) > cfg['AGGRESSIVE_ACCEL_DECEL_THRESHOLD_KMPHPS'])
+    E_agg = _window_sums(aggressive, lo, hi)
+
+    s_accel = (cfg['w1_accel'] * np.maximum(0, 1 - cfg['k1_accel_jt'] * JT) +
+               cfg['w2_accel'] * np.maximum(0, 1 - cfg['k2_accel_jp'] * JP) +
+               cfg['w3_accel'] * np.maximum(0, 1 - cfg['k3_accel_vs'] * VS) +
+               cfg['w4_accel'] * np.maximum(0, 1 - cfg['k4_accel_eagg'] * E_agg)) * 100
+
+    # --- RPM efficiency ---
+    rpm = cols['ENG_ENG_SPEED']
+    ratio_mask = speed > cfg['MIN_SPEED_FOR_RPM_RATIO_CALC']
+    ratios = np.zeros(len(speed))
+    np.divide(rpm, speed, out=ratios, where=ratio_mask)
+    ratio_count = _window_sums(ratio_mask, lo, hi + 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        R_ratio = np.where(ratio_count > 0, _window_sums(ratios, lo, hi + 1) / ratio_count, 0.0)
+
+    total_duration = _window_sums(pos_dt, lo, hi)
+    D_high = _window_sums(np.where(rpm[1:] > cfg['HIGH_RPM_THRESHOLD'], pos_dt, 0.0), lo, hi)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        D_high_prop = np.where(total_duration > 0, D_high / total_duration, 0.0)
+
+    s_rpm = (cfg['w5_rpm'] * np.maximum(0, 1 - cfg['k5_rpm_ratio'] * R_ratio) +
+             cfg['w6_rpm'] * np.maximum(0, 1 - cfg['k6_rpm_high'] * D_high_prop)) * 100
+
+    # --- Idling (same categories as _calculate_idling_score_alternative) ---
+    is_progress = cols['ENG_IS_PROGRESS']
+    is_activations = _window_sums((is_progress[1:] == True) & (is_progress[:-1] == False), lo, hi)
+
+    seg_speed = speed[1:]
+    seg_rpm = rpm[1:]
+    stationary = np.where(seg_speed < cfg['MIN_DRIVING_SPEED_FOR_IDLE'], pos_dt, 0.0)
+
+    def windowed(x):
+        return _window_sums(x, lo, hi)
+
+    stationary_time = windowed(stationary)
+    engine_off = windowed(np.where(seg_rpm < 500, stationary, 0.0))
+    normal_idle = windowed(np.where((seg_rpm >= 500) & (seg_rpm <= 1200), stationary, 0.0))
+    high_idle = windowed(np.where((seg_rpm > 1200) & (seg_rpm <= 2000), stationary, 0.0))
+
+    has_stop = stationary_time > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        composition = (engine_off * 1.0 + normal_idle * 0.7 + high_idle * 0.3) / stationary_time
+        periods = stationary_time / 10
+        bonus = np.minimum(0.2, is_activations / periods * 0.2)
+    composition = np.where(has_stop, composition + bonus, 1.0)
+    s_idle = np.clip(composition * 100, 0, 100)
+
+    # --- Gear selection ---
+    gear = cols['CVT_GEAR_POSITION_IND_CVT']
+    gear_changes = _window_sums(gear[1:] != gear[:-1], lo, hi)
+    threshold = cfg['GEAR_CHANGE_THRESHOLD']
+    s_gear = np.maximum(0, 100 - np.maximum(0, (gear_changes - threshold) / threshold) * 100)
+
+    eco = (cfg['W_accel_overall'] * s_accel + cfg['W_rpm_overall'] * s_rpm +
+           cfg['W_idle_overall'] * s_idle + cfg['W_gear_overall'] * s_gear)
+    return eco, {'accel': s_accel, 'rpm': s_rpm, 'idle': s_idle, 'gear': s_gear}
+
+
+def _steering_oscillation(ts, angle, ticks, lo):
+    """Per safety tick: window size, direction changes, significant changes, magnitude sum, span."""
+    steps = np.diff(angle)
+    dir1, dir2 = steps[:-1], steps[1:]
+    reversal = dir1 * dir2 < 0
+    significant = reversal & (np.abs(dir1) > 3) & (np.abs(dir2) > 3)
+    magnitude = np.where(reversal, np.abs(dir1) + np.abs(dir2), 0.0)
+    # triple (k-2, k-1, k) lives at position k-2; window triples are k in [lo+2, tick]
+    b = np.maximum(ticks - 1, lo)
+    return (ticks + 1 - lo,
+            _window_sums(reversal, lo, b),
+            _window_sums(significant, lo, b),
+            _window_sums(magnitude, lo, b),
+            ts[ticks] - ts[lo])
+
+
+def _safety_scores(cols, ticks, config):
+    cfg = config
+    ts = cols['timestamp']
+    lo = _window_starts(ts, ticks, cfg['SAFETY_WINDOW_DURATION_SEC'])
+    n_window, changes, significant, magnitude, span = _steering_oscillation(ts, cols['STR_ANGLE'], ticks, lo)
+
+    tick_ts = ts[ticks].tolist()
+    speed = cols['VSA_ABS_FL_WHEEL_SPEED'][ticks].tolist()
+    lon_g = cols['VSA_LON_G'][ticks].tolist()
+    lat_g = cols['VSA_LAT_G'][ticks].tolist()
+    yaw = cols['VSA_YAW_1'][ticks].tolist()
+    tcs = (cols['VSA_VSA_TCS_ACT'][ticks] == True).tolist()
+    abs_ebd = (cols['VSA_ABS_EBD_ACT'][ticks] == True).tolist()
+    n_window, changes, significant, magnitude, span = (
+        n_window.tolist(), changes.tolist(), significant.tolist(), magnitude.tolist(), span.tolist())
+
+    min_speed = cfg['MIN_DRIVING_SPEED_FOR_IDLE']
+    cooldown = cfg['EVENT_COOLDOWN_SEC']
+    last_reset = 0.0
+    last_corner = last_jerky = last_vsa_abs = 0.0
+    scores = np.empty(len(ticks))
+
+    for k, t in enumerate(tick_ts):
+        if t - last_reset >= cfg['SAFETY_WINDOW_DURATION_SEC']:
+            last_reset = t
+            last_corner = last_jerky = last_vsa_abs = 0.0
+
+        penalty = 0.0
+        v = speed[k]
+
+        # Longitudinal G: tiered, not gated by cooldown
+        if v >= min_speed:
+            g = lon_g[k]
+            if g > 0:
+                if g > 7.0: penalty += 40
+                elif g > 5.0: penalty += 25
+                elif g > cfg['G_ACCEL_THRESHOLD_STATIC']: penalty += 10
+            elif g < 0:
+                if -g > 8.0: penalty += 40
+                elif -g > 6.0: penalty += 25
+                elif -g > cfg['G_BRAKE_THRESHOLD_STATIC']: penalty += 10
+
+        # Cornering
+        if v >= min_speed:
+            speed_ratio = max(0, min(1, v / 100))
+            lat_thr = cfg['LAT_G_THRESHOLD_DYNAMIC_LOW_SPEED'] + \
+                (cfg['LAT_G_THRESHOLD_DYNAMIC_HIGH_SPEED'] - cfg['LAT_G_THRESHOLD_DYNAMIC_LOW_SPEED']) * speed_ratio
+            yaw_thr = cfg['YAW_THRESHOLD_DYNAMIC_LOW_SPEED'] + \
+                (cfg['YAW_THRESHOLD_DYNAMIC_HIGH_SPEED'] - cfg['YAW_THRESHOLD_DYNAMIC_LOW_SPEED']) * speed_ratio
+            lat_thr = max(0.5, min(cfg['MAX_LAT_G'], lat_thr))
+            yaw_thr = max(5, min(cfg['MAX_YAW_RATE'], yaw_thr))
+            a_lat, a_yaw = abs(lat_g[k]), abs(yaw[k])
+            if (a_lat > lat_thr or a_yaw > yaw_thr) and t - last_corner >= cooldown:
+                sev_lat = max(0, (a_lat - lat_thr) / (cfg['MAX_LAT_G'] - lat_thr)) if cfg['MAX_LAT_G'] - lat_thr > 0 else 0
+                sev_yaw = max(0, (a_yaw - yaw_thr) / (cfg['MAX_YAW_RATE'] - yaw_thr)) if cfg['MAX_YAW_RATE'] - yaw_thr > 0 else 0
+                severity = max(sev_lat, sev_yaw)
+                if severity > 0:
+                    penalty += cfg['C_LatG_Yaw'] * (severity ** cfg['BETA_LAT_G_YAW'])
+                    last_corner = t
+
+        # Jerky steering (oscillation)
+        if n_window[k] >= 6 and span[k] > 0:
+            freq = changes[k] / span[k]
+            sig_freq = significant[k] / span[k]
+            avg_mag = magnitude[k] / max(1, changes[k])
+            jerky = 0.0
+            if sig_freq > 1.5 and avg_mag > 8:
+                jerky = min(25, sig_freq * 10 + avg_mag * 0.5)
+            elif freq > 3.0 and avg_mag > 5:
+                jerky = min(20, freq * 4)
+            elif sig_freq > 0.8 and avg_mag > 15:
+                jerky = min(15, avg_mag * 0.8)
+            if jerky:
+                if t - last_jerky >= cooldown:
+                    penalty += jerky
+                    last_jerky = t
+
+        # System intervention
+        if tcs[k] and t - last_vsa_abs >= cooldown:
+            penalty += cfg['C_Intervention']
+            last_vsa_abs = t
+        if abs_ebd[k] and t - last_vsa_abs >= cooldown:
+            penalty += cfg['C_Intervention']
+            last_vsa_abs = t
+
+        scores[k] = max(0, 100 - penalty)
+    return scores
+
+
+def score_trip(arrays, config=None):
+    """
+    Score a full trip from column arrays.
+
+    :param arrays: mapping with 'timestamp' and the 12 CANDataPackage signals,
+                   each an array-like of the same length.
+    :param config: optional overrides for DEFAULT_CONFIG, as for DrivingScoreEvaluator.
+    :return: dict with 'eco_timestamps', 'eco_scores', 'eco_sub_scores',
+             'safety_timestamps' and 'safety_scores'.
+    """
+    cfg = dict(DEFAULT_CONFIG)
+    if config:
+        cfg.update(config)
+
+    missing = [c for c in TRIP_COLUMNS if c not in arrays]
+    if missing:
+        raise KeyError(f"Trip arrays are missing columns: {missing}")
+
+    cols = {}
+    for name in TRIP_COLUMNS:
+        column = np.asarray(arrays[name])
+        if name != 'CVT_GEAR_POSITION_IND_CVT' and column.dtype.kind not in 'fb':
+            column = column.astype(np.float64)
+        cols[name] = column
+    ts = cols['timestamp']
+
+    eco_ticks = _tick_indices(ts, cfg['ECO_CALC_INTERVAL_SEC'])
+    safety_ticks = _tick_indices(ts, cfg['SAFETY_CALC_INTERVAL_SEC'])
+
+    eco, eco_sub = _eco_scores(cols, eco_ticks, cfg) if len(eco_ticks) else (np.empty(0), {})
+    safety = _safety_scores(cols, safety_ticks, cfg) if len(safety_ticks) else np.empty(0)
+
+    return {
+        'eco_timestamps': ts[eco_ticks],
+        'eco_scores': eco,
+        'eco_sub_scores': eco_sub,
+        'safety_timestamps': ts[safety_ticks],
+        'safety_scores': safety,
+    }
+
+
+def load_trip_csv(csv_file_path):
+    """Read a trip CSV (e.g. driving_simulation_data.csv) into column arrays."""
+    columns = {name: [] for name in TRIP_COLUMNS}
+    with open(csv_file_path, newline='') as csvfile:
+        for row in csv.DictReader(csvfile):
+            for name in TRIP_COLUMNS:
+                columns[name].append(row[name])
+
+    arrays = {}
+    for name, raw in columns.items():
+        if name == 'CVT_GEAR_POSITION_IND_CVT':
+            arrays[name] = np.asarray(raw, dtype=object)
+        elif raw and raw[0] in ('True', 'False'):
+            arrays[name] = np.asarray([v == 'True' for v in raw])
+        else:
+            arrays[name] = np.asarray(raw, dtype=np.float64)
+    return arrays
+
+
+if __name__ == "__main__":
+    # Run from Simulating/: python -m scoring.TripScorer scoring/driving_simulation_data.csv
+    trip_path = sys.argv[1] if len(sys.argv) > 1 else 'scoring/driving_simulation_data.csv'
+    result = score_trip(load_trip_csv(trip_path))
+    print(f"Eco ticks: {len(result['eco_scores'])}, "
+          f"mean eco score: {np.mean(result['eco_scores']) if len(result['eco_scores']) else 100:.2f}")
+    print(f"Safety ticks: {len(result['safety_scores'])}, "
+          f"mean safety score: {np.mean(result['safety_scores']) if len(result['safety_scores']) else 100:.2f}")
@@ -3,7 +3,6 @@
 import math
 import time
 import csv
-import matplotlib.pyplot as plt
 from CANDataPackage import CANDataPackage
 from DrivingScoreEvaluator import DrivingScoreEvaluator
 
@@ -158,6 +157,8 @@ if __name__ == "__main__":
     print(f"Simulation data exported to {csv_file_path}")
 
     # --- Plotting ---
+    import matplotlib.pyplot as plt  # Only the plot needs it; the simulation and CSV run headless
+
     plt.figure(figsize=(14, 7))
 
     plt.subplot(2, 1, 1)
@@ -6,6 +6,7 @@ import cantools
 import time
 from typing import Literal
 from ecu_simulator import *
+from DBCCache import DBCCache
 import os
 from pathlib import Path
 
@@ -29,7 +30,7 @@ def map_gear_indicator_to_literal(gear_indicator: str) -> GearSelection:
 
 def simulate_can_traffic(csv_file: str, dbc_file: str, bus_type: str, channel: str):
     print(f"Loading DBC file from: {dbc_file}")
-    db = cantools.database.load_file(dbc_file)
+    db = DBCCache().load(dbc_file)
     print("DBC file loaded successfully.")
 
     print(f"Loading data from CSV file: {csv_file}")
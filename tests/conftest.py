@@ -0,0 +1,59 @@
+import os
+import random
+import shutil
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIMULATING_DIR = os.path.join(REPO_DIR, 'Simulating')
+UTILS_DIR = os.path.join(REPO_DIR, 'utils')
+DBC_FILE = os.path.join(REPO_DIR, 'data', 'BOSCH_CAN.dbc')
+UNKNOWN_ID = 0x7FF
+
+# The modules under test import each other as top-level modules, the way the scripts run them
+for path in (SIMULATING_DIR, UTILS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture
+def workdir(tmp_path):
+    # The utils scripts read data/BOSCH_CAN.dbc relative to the working directory
+    (tmp_path / 'data').mkdir()
+    shutil.copy(DBC_FILE, tmp_path / 'data' / 'BOSCH_CAN.dbc')
+    return tmp_path
+
+
+def write_trace(db, path, steps=300, seed=0):
+    """
+    Classic CAN log of the messages carrying the target signals. Messages
+    shorter than 8 bytes are sometimes padded to 8 (cantools decodes the
+    first message-length bytes), and some frames are too short to decode.
+    """
+    rng = random.Random(seed)
+    messages = [db.get_message_by_name(name) for name in
+                ('ENG_13C', 'CVT_191', 'ENG_17C', 'STR_156', 'VSA_1D0', 'VSA_1A4', 'VSA_091')]
+    lines = [
+        'date Sat Oct 17 04:00:57.372 2026',
+        'base hex  timestamps absolute',
+        'internal events logged',
+        'Begin Triggerblock Thu Jan 01 00:00:00.0 1970',
+        ' 0.000000 Start of measurement',
+    ]
+    t = 0.0
+    for _ in range(steps):
+        for message in messages + [None]:
+            frame_id = UNKNOWN_ID if message is None else message.frame_id
+            length = 8 if message is None else message.length
+            roll = rng.random()
+            if roll < 0.3 and length < 8:
+                length = 8
+            elif roll > 0.95:
+                length -= 1
+            data = ' '.join(f'{rng.getrandbits(8):02X}' for _ in range(length))
+            lines.append(f' {t:.6f} 1  {frame_id:X}             Rx   d {length} {data}')
+            t += 0.0003
+        t += 0.01
+    lines.append('End TriggerBlock')
+    path.write_text('\n'.join(lines) + '\n')
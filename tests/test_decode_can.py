@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+import cantools
+import pytest
+
+from conftest import DBC_FILE, UTILS_DIR, write_trace
+
+SCRIPT = os.path.join(UTILS_DIR, 'decode_can.py')
+
+
+@pytest.fixture(scope='module')
+def db():
+    return cantools.database.load_file(DBC_FILE)
+
+
+def run(workdir, *args):
+    return subprocess.run([sys.executable, SCRIPT, *args], cwd=workdir, check=True, capture_output=True, text=True)
+
+
+def test_streaming_matches_cache(db, workdir):
+    write_trace(db, workdir / 'trip.asc')
+    run(workdir, '--log', 'trip.asc', '--output', 'cached.jsonl')
+    run(workdir, '--log', 'trip.asc', '--output', 'streamed.jsonl', '--no-cache')
+
+    assert (workdir / '.trace_cache').is_dir()
+    assert (workdir / 'streamed.jsonl').read_bytes() == (workdir / 'cached.jsonl').read_bytes()
+
+
+def test_falls_back_when_cache_cannot_be_written(db, workdir):
+    write_trace(db, workdir / 'trip.asc')
+    run(workdir, '--log', 'trip.asc', '--output', 'streamed.jsonl', '--no-cache')
+    # A file where the cache directory should go
+    (workdir / '.trace_cache').write_text('')
+    result = run(workdir, '--log', 'trip.asc', '--output', 'fallback.jsonl')
+
+    assert 'streaming the log instead' in result.stdout
+    assert (workdir / 'fallback.jsonl').read_bytes() == (workdir / 'streamed.jsonl').read_bytes()
@@ -0,0 +1,64 @@
+import random
+import shutil
+
+import cantools
+import pytest
+
+from conftest import DBC_FILE
+from FrameDecoder import MONITORED_FRAME_IDS, FrameDecoder
+
+
+@pytest.fixture(scope='module')
+def db():
+    return cantools.database.load_file(DBC_FILE)
+
+
+def reference(db, frame_id, data):
+    decoded = db.decode_message(frame_id, data, decode_choices=False)
+    return {k: v.value if hasattr(v, 'value') else v for k, v in decoded.items()}
+
+
+def payloads(length, count=50, seed=0):
+    rng = random.Random(seed)
+    return [bytes(rng.getrandbits(8) for _ in range(length)) for _ in range(count)]
+
+
+@pytest.mark.parametrize('frame_id', MONITORED_FRAME_IDS)
+def test_matches_cantools(db, frame_id):
+    decoder = FrameDecoder(db)
+    assert decoder.is_compiled(frame_id)
+    for data in payloads(db.get_message_by_frame_id(frame_id).length):
+        assert decoder.decode(frame_id, data) == reference(db, frame_id, data)
+
+
+@pytest.mark.parametrize('frame_id', MONITORED_FRAME_IDS)
+@pytest.mark.parametrize('extra', [1, 4, 56])
+def test_padded_frame_matches_cantools(db, frame_id, extra):
+    # A CAN FD frame longer than the DBC message: cantools ignores the trailing bytes
+    decoder = FrameDecoder(db)
+    length = db.get_message_by_frame_id(frame_id).length
+    for data in payloads(length + extra, seed=extra):
+        assert decoder.decode(frame_id, data) == reference(db, frame_id, data)
+
+
+@pytest.mark.parametrize('frame_id', MONITORED_FRAME_IDS)
+def test_short_frame_is_rejected(db, frame_id):
+    decoder = FrameDecoder(db)
+    data = bytes(db.get_message_by_frame_id(frame_id).length - 1)
+    with pytest.raises(ValueError):
+        decoder.decode(frame_id, data)
+    with pytest.raises(Exception):
+        db.decode_message(frame_id, data)
+
+
+def test_from_cached_layouts(db, tmp_path):
+    # Given a path, the decoders are compiled from the DBCCache layouts
+    dbc_copy = tmp_path / 'BOSCH_CAN.dbc'
+    shutil.copy(DBC_FILE, dbc_copy)
+    signals = ['VSA_ABS_FL_WHEEL_SPEED', 'STR_ANGLE', 'ENG_ENG_SPEED']
+    decoder = FrameDecoder(str(dbc_copy), signals=signals)
+    for frame_id in decoder.frame_ids:
+        length = db.get_message_by_frame_id(frame_id).length
+        for data in payloads(length, count=10) + payloads(length + 8, count=10, seed=1):
+            expected = {k: v for k, v in reference(db, frame_id, data).items() if k in signals}
+            assert decoder.decode(frame_id, data) == expected
@@ -0,0 +1,59 @@
+import csv
+import os
+import subprocess
+import sys
+
+import cantools
+import numpy as np
+import pytest
+
+from conftest import DBC_FILE, UTILS_DIR, write_trace
+
+SCRIPT = os.path.join(UTILS_DIR, 'get_data_asc_csv.py')
+
+
+@pytest.fixture(scope='module')
+def db():
+    return cantools.database.load_file(DBC_FILE)
+
+
+def run(workdir, *args):
+    subprocess.run([sys.executable, SCRIPT, *args], cwd=workdir, check=True, capture_output=True)
+
+
+def read_csv(path):
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        values = np.array([[float(v) if v else np.nan for v in row] for row in reader]).reshape(-1, len(header))
+    return header, values
+
+
+def test_bulk_matches_rows_with_padded_frames(db, workdir):
+    write_trace(db, workdir / 'trip.asc')
+    run(workdir, '--log', 'trip.asc', '--output', 'rows.csv', '--no-cache')
+    run(workdir, '--log', 'trip.asc', '--output', 'bulk.npz', '--bulk')
+
+    header, rows = read_csv(workdir / 'rows.csv')
+    bulk = np.load(workdir / 'bulk.npz')
+    assert len(rows) == len(bulk['timestamp'])
+    for i, name in enumerate(header):
+        np.testing.assert_array_equal(rows[:, i], bulk[name], err_msg=name)
+
+
+def test_parallel_matches_single_process(db, workdir):
+    write_trace(db, workdir / 'trip.asc')
+    run(workdir, '--log', 'trip.asc', '--output', 'rows.csv', '--no-cache')
+    run(workdir, '--log', 'trip.asc', '--output', 'cached.csv')
+    run(workdir, '--log', 'trip.asc', '--output', 'parallel.csv', '--jobs', '3')
+    run(workdir, '--log', 'trip.asc', '--output', 'bulk.npz', '--bulk')
+    run(workdir, '--log', 'trip.asc', '--output', 'parallel.npz', '--bulk', '--jobs', '3')
+
+    expected = (workdir / 'rows.csv').read_bytes()
+    assert (workdir / 'cached.csv').read_bytes() == expected
+    assert (workdir / 'parallel.csv').read_bytes() == expected
+    bulk = np.load(workdir / 'bulk.npz')
+    parallel = np.load(workdir / 'parallel.npz')
+    assert sorted(parallel.files) == sorted(bulk.files)
+    for name in bulk.files:
+        np.testing.assert_array_equal(parallel[name], bulk[name], err_msg=name)
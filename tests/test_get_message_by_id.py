@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+
+import cantools
+import pytest
+
+from conftest import DBC_FILE, UTILS_DIR, write_trace
+
+SCRIPT = os.path.join(UTILS_DIR, 'get_message_by_id.py')
+
+
+@pytest.fixture(scope='module')
+def db():
+    return cantools.database.load_file(DBC_FILE)
+
+
+@pytest.mark.parametrize('output', ['str.jsonl', '-'])
+def test_reports_records_written(db, workdir, output):
+    # STR_156 is 6 bytes: padded frames decode, short ones are skipped
+    write_trace(db, workdir / 'trip.asc')
+    result = subprocess.run([sys.executable, SCRIPT, '--log', 'trip.asc', '--id', '0x156', '--output', output],
+                            cwd=workdir, check=True, capture_output=True, text=True)
+    text = result.stdout if output == '-' else (workdir / output).read_text()
+    records = [json.loads(line) for line in text.splitlines()]
+
+    with open(workdir / 'trip.asc') as f:
+        payloads = [bytes.fromhex(''.join(line.split()[6:])) for line in f if line.split()[2:3] == ['156']]
+    decodable = [data for data in payloads if len(data) >= 6]
+    assert len(decodable) < len(payloads)
+    assert len(records) == len(decodable)
+    assert result.stderr.splitlines()[-1].startswith(f"{len(records)} frames of 0x156 ")
@@ -0,0 +1,21 @@
+from check_startup import LAZY_MODULES, STARTUP_BUDGET_MS, import_ms, profile_import
+
+
+def best_import(module, runs=3):
+    # Fastest of a few clean-interpreter imports, to smooth out noise
+    best = None
+    for _ in range(runs):
+        entries, loaded = profile_import(module)
+        total_ms = import_ms(entries, module)
+        if best is None or total_ms < best[0]:
+            best = (total_ms, loaded)
+    return best
+
+
+def test_detector_import_within_budget():
+    total_ms, loaded = best_import('detector')
+    assert total_ms <= STARTUP_BUDGET_MS, (
+        f"import detector took {total_ms:.1f} ms, budget is {STARTUP_BUDGET_MS:.1f} ms "
+        f"(python Simulating/check_startup.py for the breakdown)")
+    eager = sorted(name for name in LAZY_MODULES if name in loaded)
+    assert not eager, f"import detector loaded {', '.join(eager)}, which should only load when used"
@@ -0,0 +1,308 @@
+import gzip
+import json
+import os
+import sys
+
+import numpy as np
+
+SIMULATING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Simulating')
+
+# One CAN frame per record; payloads are zero-padded to 8 bytes
+FRAME_DTYPE = np.dtype([
+    ('timestamp', np.float64),
+    ('can_id', np.uint32),
+    ('dlc', np.uint8),
+    ('data', np.uint8, (8,)),
+])
+
+
+def _use_simulating_modules():
+    if SIMULATING_DIR not in sys.path:
+        sys.path.insert(0, SIMULATING_DIR)
+
+
+def read_asc_frames(path, start=0, end=None, base=None):
+    """
+    Parse a Vector ASC log (or the `start`..`end` byte range of it) into a
+    FRAME_DTYPE structured array.
+
+    Parsing is Simulating/TraceReader.py's ASCTraceReader: same header and
+    frame handling as can.ASCReader, minus the remote, error and oversized
+    CAN FD frames that couldn't be decoded anyway.
+    """
+    _use_simulating_modules()
+    from TraceReader import ASCTraceReader
+
+    timestamps = []
+    can_ids = []
+    dlcs = []
+    payload = bytearray()
+    pad = bytes(8)
+    for chunk in ASCTraceReader(path, start=start, end=end, base=base).iter_chunks():
+        for frame in chunk:
+            timestamps.append(frame.timestamp)
+            can_ids.append(frame.arbitration_id)
+            dlcs.append(len(frame.data))
+            payload += frame.data + pad[len(frame.data):]
+
+    frames = np.empty(len(timestamps), dtype=FRAME_DTYPE)
+    frames['timestamp'] = timestamps
+    frames['can_id'] = can_ids
+    frames['dlc'] = dlcs
+    frames['data'] = np.frombuffer(bytes(payload), dtype=np.uint8).reshape(-1, 8)
+    return frames
+
+
+def load_dbc(path):
+    """cantools database for `path` through the pickled DBC cache (see Simulating/DBCCache.py)."""
+    _use_simulating_modules()
+    from DBCCache import DBCCache
+    return DBCCache().load(path)
+
+
+def load_trace(path):
+    """The log's indexed binary trace cache (see Simulating/TraceCache.py), built on first use."""
+    _use_simulating_modules()
+    from TraceCache import TraceCache
+    return TraceCache().load(path)
+
+
+def decode_signal(data, signal):
+    """
+    Decode one signal from an (n, 8) uint8 payload array, column-wise.
+
+    Same bit layout and scaling as cantools' decode_message(decode_choices=False):
+    integer scale/offset give int64, anything else float64.
+    """
+    words = np.ascontiguousarray(data)
+    mask = np.uint64((1 << signal.length) - 1)
+    if signal.byte_order == 'big_endian':
+        # Start bit is the MSB in DBC sawtooth numbering
+        msb = (signal.start // 8) * 8 + (7 - signal.start % 8)
+        word = words.view('>u8').ravel()
+        shift = 64 - msb - signal.length
+    else:
+        word = words.view('<u8').ravel()
+        shift = signal.start
+    raw = ((word >> np.uint64(shift)) & mask).astype(np.int64)
+    if signal.is_signed:
+        sign_bit = np.int64(1 << (signal.length - 1))
+        raw = (raw ^ sign_bit) - sign_bit
+
+    if signal.scale == 1 and signal.offset == 0:
+        return raw
+    if isinstance(signal.scale, int) and isinstance(signal.offset, int):
+        return raw * signal.scale + signal.offset
+    return raw.astype(np.float64) * signal.scale + signal.offset
+
+
+def decode_columns(db, frames, signal_names):
+    """
+    Decode `signal_names` for every frame cantools would accept: known ID and
+    at least the message length. Like cantools, only the first message-length
+    bytes of a padded frame are decoded.
+
+    Returns (rows, columns): `rows` is the frames that decoded and `columns`
+    maps each signal to a float64 array aligned with `rows`, holding the
+    value where the frame carries the signal and NaN elsewhere.
+    """
+    lengths = {message.frame_id: message.length for message in db.messages}
+    known_ids = np.fromiter(lengths.keys(), dtype=np.uint32)
+    known = np.isin(frames['can_id'], known_ids)
+    expected = np.zeros(len(frames), dtype=np.int64)
+    for frame_id, length in lengths.items():
+        expected[frames['can_id'] == frame_id] = length
+    rows = frames[known & (frames['dlc'] >= expected)]
+
+    wanted = set(signal_names)
+    columns = {name: np.full(len(rows), np.nan) for name in signal_names}
+    for message in db.messages:
+        signals = [s for s in message.signals if s.name in wanted]
+        if not signals:
+            continue
+        selected = np.flatnonzero(rows['can_id'] == message.frame_id)
+        if len(selected) == 0:
+            continue
+        data = rows['data'][selected]
+        data[:, message.length:] = 0
+        for signal in signals:
+            columns[signal.name][selected] = decode_signal(data, signal)
+    return rows, columns
+
+
+def forward_fill(column):
+    """Carry the last non-NaN value forward; leading NaNs stay NaN."""
+    has_value = ~np.isnan(column)
+    source = np.where(has_value, np.arange(len(column)), -1)
+    np.maximum.accumulate(source, out=source)
+    filled = column[np.maximum(source, 0)]
+    filled[source < 0] = np.nan
+    return filled
+
+
+# --- Parallel decoding ------------------------------------------------------
+#
+# The log is cut into line-aligned byte ranges (ASCTraceReader.split) that
+# worker processes parse and decode independently. Ranges are handed back in
+# file order, so concatenating them keeps the log's timestamp order; the only
+# state that crosses a range boundary is the forward-fill, which is stitched
+# by stitch_forward_fill().
+
+_worker_dbs = {}
+
+
+def _pool(jobs):
+    # The utils scripts parse their arguments at import time, so workers are
+    # forked rather than spawned (which would re-run the script) where possible.
+    import multiprocessing
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork').Pool(jobs)
+    return multiprocessing.Pool(jobs)
+
+
+def _worker_db(db_path):
+    # One DBC load per worker process
+    if db_path not in _worker_dbs:
+        _worker_dbs[db_path] = load_dbc(db_path)
+    return _worker_dbs[db_path]
+
+
+def plan_ranges(log_path, jobs, ranges_per_job=4):
+    """(start, end, base) tasks for `jobs` workers; a few ranges each to even out the load."""
+    _use_simulating_modules()
+    from TraceReader import ASCTraceReader
+
+    base = ASCTraceReader.read_base(log_path)
+    return [(start, end, base) for start, end in ASCTraceReader.split(log_path, jobs * ranges_per_job)]
+
+
+def decode_range_columns(task):
+    """
+    Worker: parse and decode one byte range.
+
+    Returns (timestamps, columns, skipped) where columns are forward-filled
+    within the range only (NaN until the signal's first frame in the range).
+    """
+    log_path, db_path, signal_names, (start, end, base) = task
+    db = _worker_db(db_path)
+    frames = read_asc_frames(log_path, start, end, base)
+    known_ids = np.fromiter((m.frame_id for m in db.messages), dtype=np.uint32)
+    rows, columns = decode_columns(db, frames, signal_names)
+    skipped = int(np.isin(frames['can_id'], known_ids).sum()) - len(rows)
+    return rows['timestamp'], {name: forward_fill(column) for name, column in columns.items()}, skipped
+
+
+def stitch_forward_fill(parts, signal_names):
+    """
+    Join per-range results in order, filling each range's leading gaps with
+    the last value carried out of the ranges before it.
+    """
+    carry = {name: np.nan for name in signal_names}
+    for _, columns, _ in parts:
+        for name in signal_names:
+            column = columns[name]
+            if len(column) == 0:
+                continue
+            # Within a forward-filled range, NaNs can only be leading
+            column[np.isnan(column)] = carry[name]
+            if not np.isnan(column[-1]):
+                carry[name] = column[-1]
+    timestamps = np.concatenate([p[0] for p in parts]) if parts else np.empty(0)
+    columns = {name: np.concatenate([p[1][name] for p in parts]) if parts else np.empty(0)
+               for name in signal_names}
+    skipped = sum(p[2] for p in parts)
+    return timestamps, columns, skipped
+
+
+def decode_columns_parallel(log_path, db_path, signal_names, jobs):
+    """decode_columns + forward_fill over the whole log, in `jobs` processes."""
+    tasks = [(log_path, db_path, signal_names, r) for r in plan_ranges(log_path, jobs)]
+    with _pool(jobs) as pool:
+        parts = pool.map(decode_range_columns, tasks, chunksize=1)
+    return stitch_forward_fill(parts, signal_names)
+
+
+def format_csv_rows(task):
+    """
+    Worker: render forward-filled columns as CSV text, the way csv.DictWriter
+    writes decoded values (NaN -> '', int signals without '.0').
+    """
+    import csv
+    import io
+
+    timestamps, columns, as_int = task
+    formatted = [[
+        '' if v != v else str(int(v)) if is_int else repr(v)  # v != v: NaN
+        for v in column.tolist()] for column, is_int in zip(columns, as_int)]
+    out = io.StringIO()
+    csv.writer(out).writerows(zip(map(repr, timestamps.tolist()), *formatted))
+    return out.getvalue()
+
+
+def format_csv_parallel(timestamps, columns, signal_names, int_signals, jobs, rows_per_task=50000):
+    """CSV body text for the stitched columns, formatted in `jobs` processes, in order."""
+    as_int = [name in int_signals for name in signal_names]
+    tasks = [(timestamps[i:i + rows_per_task], [columns[name][i:i + rows_per_task] for name in signal_names], as_int)
+             for i in range(0, len(timestamps), rows_per_task)]
+    with _pool(jobs) as pool:
+        yield from pool.imap(format_csv_rows, tasks)
+
+
+def decode_range_jsonl(task):
+    """
+    Worker: decode every known frame of one byte range into a JSONL part
+    file (gzip member if compressed). Returns (part_path, records, failures).
+    """
+    log_path, db_path, (start, end, base), part_path, compress = task
+    db = _worker_db(db_path)
+    known_ids = set(message.frame_id for message in db.messages)
+    try:
+        import orjson
+        dumps = lambda record: orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+    except ImportError:
+        dumps = lambda record: (json.dumps(record) + "\n").encode('utf-8')
+
+    _use_simulating_modules()
+    from TraceReader import ASCTraceReader
+
+    records = failures = 0
+    out_file = gzip.open(part_path, 'wb', compresslevel=6) if compress else open(part_path, 'wb', buffering=1024 * 1024)
+    with out_file:
+        for msg in ASCTraceReader(log_path, start=start, end=end, base=base):
+            if msg.arbitration_id not in known_ids:
+                continue
+            try:
+                decoded = db.decode_message(msg.arbitration_id, msg.data, decode_choices=False)
+            except Exception as e:
+                print(f"Failed to decode {hex(msg.arbitration_id)}: {e}")
+                failures += 1
+                continue
+            out_file.write(dumps({
+                'Timestamp': msg.timestamp,
+                'CAN_ID': hex(msg.arbitration_id),
+                'Decoded': {k: v.value if hasattr(v, "value") else v for k, v in decoded.items()},
+            }))
+            records += 1
+    return part_path, records, failures
+
+
+def decode_jsonl_parallel(log_path, db_path, output_path, compress, jobs):
+    """
+    Decode the log to JSONL in `jobs` processes. Parts are concatenated in
+    range order (gzip members concatenate into one valid .gz). Returns the
+    record count.
+    """
+    import shutil
+    import tempfile
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path))) as tmp:
+        tasks = [(log_path, db_path, r, os.path.join(tmp, f"part{i:05d}"), compress)
+                 for i, r in enumerate(plan_ranges(log_path, jobs))]
+        with _pool(jobs) as pool:
+            parts = pool.map(decode_range_jsonl, tasks, chunksize=1)
+        with open(output_path, 'wb') as out_file:
+            for part_path, _, _ in parts:
+                with open(part_path, 'rb') as part:
+                    shutil.copyfileobj(part, out_file, 1024 * 1024)
+    return sum(p[1] for p in parts)
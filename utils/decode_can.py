@@ -1,17 +1,43 @@
-import can
-import cantools
+# Decode every known frame of the ASC log to JSON Lines, one record per frame:
+#   {"Timestamp": 12.34, "CAN_ID": "0x13c", "Decoded": {...}}
+#
+#   python utils/decode_can.py           -> data/decoded_can.jsonl
+#   python utils/decode_can.py --gzip    -> data/decoded_can.jsonl.gz
+#
+# Records are written as they are decoded, so memory stays flat whatever the log size.
+# The log is read through the binary trace cache unless --no-cache is given (or
+# the cache can't be written, in which case the ASC text is streamed instead).
+# --jobs N decodes line-aligned byte ranges of the ASC text in N processes and
+# concatenates their parts in file order.
+import argparse
+import gzip
 import os
 import json
+from asc_bulk import _use_simulating_modules, load_dbc, load_trace, decode_jsonl_parallel
 from cantools.database.can.signal import NamedSignalValue
 
+parser = argparse.ArgumentParser(description="Decode an ASC log to JSON Lines")
+parser.add_argument('--log', default=os.path.join('data', 'CANWIN.asc'))
+parser.add_argument('--output', default=None)
+parser.add_argument('--gzip', action='store_true', help="Gzip the output (also implied by a .gz output name)")
+parser.add_argument('--no-cache', action='store_true', help="Parse the ASC text instead of using the binary trace cache")
+parser.add_argument('--jobs', type=int, default=1, help="Decode the ASC text in this many processes")
+args = parser.parse_args()
+
 # Paths
 db_path = os.path.join('data', 'BOSCH_CAN.dbc')
-log_path = os.path.join('data', 'CANWIN.asc')
-output_json_path = os.path.join('data', 'decoded_can.json')
+log_path = args.log
+output_json_path = args.output or os.path.join('data', 'decoded_can.jsonl' + ('.gz' if args.gzip else ''))
+compress = args.gzip or output_json_path.endswith('.gz')
+
+try:
+    import orjson
+    dumps = lambda record: orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+except ImportError:
+    dumps = lambda record: (json.dumps(record) + "\n").encode('utf-8')
 
-# Load DBC and ASC log
-db = cantools.database.load_file(db_path)
-log = can.ASCReader(log_path)
+# Load DBC
+db = load_dbc(db_path)
 
 # signal = db.get_message_by_frame_id(0x91).get_signal_by_name('VSA_YAW_1')
 # print(signal.scale, signal.offset)
@@ -32,29 +58,48 @@ def sanitize(decoded_dict):
             sanitized[key] = value
     return sanitized
 
-# Store decoded results
-decoded_output = []
-
-# Decode only known messages
-for msg in log:
-    if msg.arbitration_id in known_ids:
+def open_log():
+    # ASC log through the binary trace cache, built on the first run
+    if not args.no_cache:
         try:
-            decoded = db.decode_message(msg.arbitration_id, msg.data, decode_choices=False)
-            # if 'VSA_YAW_1' in decoded:
-            #     print(f"ID: {hex(msg.arbitration_id)}, VSA_YAW_1: {decoded['VSA_YAW_1']}")
-            decoded_output.append({
-                'Timestamp': msg.timestamp,
-                'CAN_ID': hex(msg.arbitration_id),
-                'Decoded': sanitize(decoded)
-            })
-        except Exception as e:
-            print(f"Failed to decode {hex(msg.arbitration_id)}: {e}")
+            return load_trace(log_path)
+        except OSError as e:
+            print(f"Trace cache unavailable ({e}), streaming the log instead.")
+    _use_simulating_modules()
+    from TraceReader import ASCTraceReader
+    return ASCTraceReader(log_path, can_ids=known_ids)
+
+def decode_sequential():
+    log = open_log()
+
+    # Decode only known messages, writing each record straight out
+    if compress:
+        out_file = gzip.open(output_json_path, 'wb', compresslevel=6)
     else:
-        # Skip unknown messages
-        continue
+        out_file = open(output_json_path, 'wb', buffering=1024 * 1024)
+
+    with out_file:
+        for msg in log:
+            if msg.arbitration_id in known_ids:
+                try:
+                    decoded = db.decode_message(msg.arbitration_id, msg.data, decode_choices=False)
+                    # if 'VSA_YAW_1' in decoded:
+                    #     print(f"ID: {hex(msg.arbitration_id)}, VSA_YAW_1: {decoded['VSA_YAW_1']}")
+                    out_file.write(dumps({
+                        'Timestamp': msg.timestamp,
+                        'CAN_ID': hex(msg.arbitration_id),
+                        'Decoded': sanitize(decoded)
+                    }))
+                except Exception as e:
+                    print(f"Failed to decode {hex(msg.arbitration_id)}: {e}")
+            else:
+                # Skip unknown messages
+                continue
 
-# Write to JSON file
-with open(output_json_path, 'w') as f:
-    json.dump(decoded_output, f, indent=2)
 
-print(f"✅ Decoding complete. Output saved to: {output_json_path}")
+if args.jobs > 1:
+    count = decode_jsonl_parallel(log_path, db_path, output_json_path, compress, args.jobs)
+    print(f"✅ Decoded {count} frames with {args.jobs} processes. Output saved to: {output_json_path}")
+else:
+    decode_sequential()
+    print(f"✅ Decoding complete. Output saved to: {output_json_path}")
@@ -4,6 +4,7 @@ import can
 import time
 import json
 
+from DBCCache import DBCCache
 from ecu_simulator import (
     create_eng_13c_message,
     create_vsa_1d0_message,
@@ -14,7 +15,7 @@ from ecu_simulator import (
 )
 
 # Load the DBC file
-db = cantools.database.load_file('BOSCH_CAN.dbc')
+db = DBCCache().load('BOSCH_CAN.dbc')
 
 def generate_and_log_can_messages(csv_file_path: str, output_log_path: str):
     """
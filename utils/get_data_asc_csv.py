@@ -1,18 +1,37 @@
+# Decode the ASC log into one forward-filled row per frame.
+#
+#   python utils/get_data_asc_csv.py          -> data/decoded_can.csv, frame by frame
+#   python utils/get_data_asc_csv.py --bulk   -> data/decoded_can.npz, column-wise with NumPy
+#
+# The .npz has a 'timestamp' array plus one float64 array per target signal
+# (NaN until the signal's first frame); np.load() or pandas.DataFrame(dict(np.load(...))) reads it.
+# Both modes read the log through the binary trace cache unless --no-cache is given.
+# --jobs N splits the ASC text into line-aligned byte ranges and decodes them in
+# N processes instead; the forward-fill is stitched across range boundaries.
+import argparse
 import can
-import cantools
+from asc_bulk import load_dbc
 import os
 import json
 import csv
+import time
 from cantools.database.can.signal import NamedSignalValue
 
+parser = argparse.ArgumentParser(description="Decode the target signals from an ASC log")
+parser.add_argument('--bulk', action='store_true', help="Vectorized decode to a columnar .npz file")
+parser.add_argument('--log', default=os.path.join('data', 'CANWIN.asc'))
+parser.add_argument('--output', default=None)
+parser.add_argument('--no-cache', action='store_true', help="Parse the ASC text instead of using the binary trace cache")
+parser.add_argument('--jobs', type=int, default=1, help="Parse and decode the ASC text in this many processes")
+args = parser.parse_args()
+
 # Paths
 db_path = os.path.join('data', 'BOSCH_CAN.dbc')
-log_path = os.path.join('data', 'CANWIN.asc')
-output_csv_path = os.path.join('data', 'decoded_can.csv')
+log_path = args.log
+output_csv_path = args.output or os.path.join('data', 'decoded_can.npz' if args.bulk else 'decoded_can.csv')
 
 # Load DBC and ASC log
-db = cantools.database.load_file(db_path)
-log = can.ASCReader(log_path)
+db = load_dbc(db_path)
 
 # Ensure output folder exists
 os.makedirs('output', exist_ok=True)
@@ -47,30 +66,89 @@ def sanitize(decoded_dict):
             sanitized[key] = value
     return sanitized
 
-# Open CSV writer
-with open(output_csv_path, 'w', newline='') as csvfile:
-    writer = csv.DictWriter(csvfile, fieldnames=['timestamp'] + target_signals)
-    writer.writeheader()
-
-    # Decode and write to CSV
-    for msg in log:
-        if msg.arbitration_id in known_ids:
-            try:
-                decoded = db.decode_message(msg.arbitration_id, msg.data, decode_choices=False)
-                decoded = sanitize(decoded)
-
-                # Update last known values
-                for sig in target_signals:
-                    if sig in decoded:
-                        last_known[sig] = decoded[sig]
-
-                # Write row using current timestamp and last known values
-                row = {'timestamp': msg.timestamp}
-                row.update(last_known)
-                writer.writerow(row)
-
-            except Exception as e:
-                print(f"⚠️ Failed to decode {hex(msg.arbitration_id)}: {e}")
-                continue
-
-print(f"✅ CSV decoding complete. Output saved to: {output_csv_path}")
+def int_signals():
+    # Signals cantools decodes to int (row mode writes them without a '.0')
+    return {s.name for m in db.messages for s in m.signals
+            if (s.scale == 1 and s.offset == 0) or (isinstance(s.scale, int) and isinstance(s.offset, int))}
+
+
+def decode_parallel():
+    import numpy as np
+    from asc_bulk import decode_columns_parallel, format_csv_parallel
+
+    start = time.perf_counter()
+    timestamps, columns, skipped = decode_columns_parallel(log_path, db_path, target_signals, args.jobs)
+    if skipped:
+        print(f"⚠️ Skipped {skipped} frames shorter than their DBC length")
+
+    if args.bulk:
+        np.savez(output_csv_path, timestamp=timestamps, **columns)
+    else:
+        with open(output_csv_path, 'w', newline='') as csvfile:
+            csv.writer(csvfile).writerow(['timestamp'] + target_signals)
+            for text in format_csv_parallel(timestamps, columns, target_signals, int_signals(), args.jobs):
+                csvfile.write(text)
+    print(f"Decoded {len(timestamps)} frames with {args.jobs} processes in {time.perf_counter() - start:.1f}s")
+
+
+def decode_bulk():
+    import numpy as np
+    from asc_bulk import read_asc_frames, load_trace, decode_columns, forward_fill
+
+    start = time.perf_counter()
+    frames = read_asc_frames(log_path) if args.no_cache else load_trace(log_path).records()
+    rows, columns = decode_columns(db, frames, target_signals)
+    skipped = int(np.isin(frames['can_id'], list(known_ids)).sum()) - len(rows)
+    if skipped:
+        print(f"⚠️ Skipped {skipped} frames shorter than their DBC length")
+
+    output = {'timestamp': rows['timestamp']}
+    for sig in target_signals:
+        output[sig] = forward_fill(columns[sig])
+    np.savez(output_csv_path, **output)
+    print(f"Decoded {len(rows)} of {len(frames)} frames in {time.perf_counter() - start:.1f}s")
+
+
+def decode_rows():
+    if args.no_cache:
+        log = can.ASCReader(log_path)
+    else:
+        from asc_bulk import load_trace
+        log = load_trace(log_path)
+
+    # Open CSV writer
+    with open(output_csv_path, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=['timestamp'] + target_signals)
+        writer.writeheader()
+
+        # Decode and write to CSV
+        for msg in log:
+            if msg.arbitration_id in known_ids:
+                try:
+                    decoded = db.decode_message(msg.arbitration_id, msg.data, decode_choices=False)
+                    decoded = sanitize(decoded)
+
+                    # Update last known values
+                    for sig in target_signals:
+                        if sig in decoded:
+                            last_known[sig] = decoded[sig]
+
+                    # Write row using current timestamp and last known values
+                    row = {'timestamp': msg.timestamp}
+                    row.update(last_known)
+                    writer.writerow(row)
+
+                except Exception as e:
+                    print(f"⚠️ Failed to decode {hex(msg.arbitration_id)}: {e}")
+                    continue
+
+
+if args.jobs > 1:
+    decode_parallel()
+    print(f"✅ Parallel decoding complete. Output saved to: {output_csv_path}")
+elif args.bulk:
+    decode_bulk()
+    print(f"✅ Bulk decoding complete. Output saved to: {output_csv_path}")
+else:
+    decode_rows()
+    print(f"✅ CSV decoding complete. Output saved to: {output_csv_path}")
@@ -1,16 +1,84 @@
+# Pull the frames of one or more CAN IDs, optionally in a time range, out of a trace.
+#
+#   python utils/get_message_by_id.py                           -> messages/0x156.jsonl
+#   python utils/get_message_by_id.py --id 0x13C --id 0x1D0 --start 120 --end 180
+#   python utils/get_message_by_id.py --id 0x091 --format npz --output yaw.npz
+#   python utils/get_message_by_id.py --id 0x156 --output -     (JSONL to stdout)
+#
+# Queries go through the binary trace cache (Simulating/TraceCache.py) and its
+# per-ID / time-block index, so only the matching frames are read and decoded.
+# JSONL lines look like decode_can.py's records: {"Timestamp", "CAN_ID", "Decoded"}.
+# The .npz has 'timestamp', 'can_id' and one float64 column per signal (NaN on
+# frames that don't carry it).
+import argparse
 import json
 import os
+import sys
+import time
 
-log_json_path = "data/decoded_can.json"
-target_can_id = "0x156".lower()
+import numpy as np
 
-with open(log_json_path, "r", encoding="utf-8") as f:
-    data = json.load(f)
+from asc_bulk import _use_simulating_modules, load_dbc, load_trace, decode_columns
 
+parser = argparse.ArgumentParser(description="Query the frames of some CAN IDs from a trace")
+parser.add_argument('--id', dest='ids', action='append', help="CAN ID, hex (0x156) or decimal; repeatable")
+parser.add_argument('--start', type=float, default=None, help="First timestamp (s), inclusive")
+parser.add_argument('--end', type=float, default=None, help="Last timestamp (s), inclusive")
+parser.add_argument('--log', default=os.path.join('data', 'CANWIN.asc'))
+parser.add_argument('--format', choices=['jsonl', 'npz'], default='jsonl')
+parser.add_argument('--output', default=None, help="Output file, '-' for stdout (jsonl only)")
+args = parser.parse_args()
 
-filtered_messages = [msg for msg in data if msg.get("CAN_ID", "").lower() == target_can_id]
+target_can_ids = [int(i, 0) for i in (args.ids or ['0x156'])]
+name = "_".join(f"0x{i:x}" for i in target_can_ids)
+output_path = args.output or os.path.join('messages', f"{name}.{args.format}")
 
-os.makedirs("messages", exist_ok=True)
+db = load_dbc(os.path.join('data', 'BOSCH_CAN.dbc'))
 
-with open(f"messages/{target_can_id}.json", "w", encoding="utf-8") as out_file:
-    json.dump(filtered_messages, out_file, indent=4)
+try:
+    import orjson
+    dumps = lambda record: orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+except ImportError:
+    dumps = lambda record: (json.dumps(record) + "\n").encode('utf-8')
+
+
+def write_jsonl(trace, rows, out):
+    _use_simulating_modules()
+    from FrameDecoder import FrameDecoder
+
+    known = [i for i in target_can_ids if i in {m.frame_id for m in db.messages}]
+    decoder = FrameDecoder(db, frame_ids=known)
+    written = 0
+    for frame in trace.frames_at(rows):
+        try:
+            decoded = decoder.decode(frame.arbitration_id, frame.data)
+        except Exception as e:
+            print(f"Failed to decode {hex(frame.arbitration_id)}: {e}", file=sys.stderr)
+            continue
+        out.write(dumps({'Timestamp': frame.timestamp, 'CAN_ID': hex(frame.arbitration_id), 'Decoded': decoded}))
+        written += 1
+    return written
+
+
+def write_npz(trace, rows):
+    signal_names = [s.name for m in db.messages if m.frame_id in target_can_ids for s in m.signals]
+    decoded_rows, columns = decode_columns(db, trace.records(rows), signal_names)
+    np.savez(output_path, timestamp=decoded_rows['timestamp'], can_id=decoded_rows['can_id'], **columns)
+    return len(decoded_rows)
+
+
+start = time.perf_counter()
+trace = load_trace(args.log)
+rows = trace.rows(target_can_ids, args.start, args.end)
+
+if args.format == 'npz':
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    count = write_npz(trace, rows)
+elif output_path == '-':
+    count = write_jsonl(trace, rows, sys.stdout.buffer)
+else:
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'wb') as out_file:
+        count = write_jsonl(trace, rows, out_file)
+
+print(f"{count} frames of {name} in {(time.perf_counter() - start) * 1000:.1f} ms -> {output_path}", file=sys.stderr)
@@ -1,10 +1,10 @@
-import cantools
+from asc_bulk import load_dbc
 import json
 import os
 
 # Load the DBC file
 dbc_path = 'data/BOSCH_CAN.dbc'
-db = cantools.database.load_file(dbc_path)
+db = load_dbc(dbc_path)
 
 # Create output folder if it doesn't exist
 output_folder = 'data'